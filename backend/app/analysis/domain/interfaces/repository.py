@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+
+
+class IAnalysisRepository(ABC):
+
+    @abstractmethod
+    async def get_feature_stats(self, direction_id: int, feature: str) -> tuple:
+        pass
+
+    @abstractmethod
+    async def get_interval_means(self, direction_id: int, model_id: int, feature: str,
+                                 edges: list[float] | None) -> list[tuple]:
+        pass
+
+    @abstractmethod
+    async def get_outcomes(self, model_ids: list[int], target: str, direction_id: int | None = None) -> list[tuple]:
+        pass
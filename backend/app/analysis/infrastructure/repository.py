@@ -0,0 +1,71 @@
+from sqlalchemy import Boolean, Integer, and_, case, cast, func, null, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analysis.domain.interfaces.repository import IAnalysisRepository
+from app.predict.infrastructure.models.prediction import Prediction
+from app.student.infrastructure.models.student import Student
+
+
+class AnalysisRepository(IAnalysisRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _feature_column(feature: str):
+        column = getattr(Student, feature)
+        # Логические признаки считаем как 0/1 (MIN/MAX по boolean в PostgreSQL не определены)
+        return cast(column, Integer) if isinstance(column.type, Boolean) else column
+
+    async def get_feature_stats(self, direction_id: int, feature: str) -> tuple:
+        """MIN, MAX признака и число студентов направления."""
+        column = self._feature_column(feature)
+        result = await self.session.execute(
+            select(func.min(column), func.max(column), func.count(Student.id))
+            .where(Student.direction_id == direction_id)
+        )
+        return tuple(result.one())
+
+    async def get_interval_means(self, direction_id: int, model_id: int, feature: str,
+                                 edges: list[float] | None) -> list[tuple]:
+        """
+        Средняя вероятность прогноза модели по интервалам признака: строки (номер интервала, AVG, COUNT).
+        Интервалы как в pd.cut(right=True, include_lowest=True): [e0, e1], (e1, e2], ...
+        Без edges — одна группа по всем студентам. Студенты без прогноза входят в COUNT, но не в AVG.
+        """
+        column = self._feature_column(feature)
+        if edges:
+            bucket = case(
+                (column < edges[0], null()),
+                *[(column <= edge, index) for index, edge in enumerate(edges[1:])],
+                else_=null(),
+            )
+        else:
+            bucket = null()
+
+        stmt = (
+            select(bucket.label("bucket"), func.avg(Prediction.predicted_prob), func.count(Student.id))
+            .select_from(Student)
+            .outerjoin(Prediction, and_(Prediction.student_id == Student.id, Prediction.model_id == model_id))
+            .where(Student.direction_id == direction_id)
+            .group_by("bucket")
+            .order_by("bucket")
+        )
+        result = await self.session.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+    async def get_outcomes(self, model_ids: list[int], target: str, direction_id: int | None = None) -> list[tuple]:
+        """
+        Строки (model_id, predicted_prob, исход 0/1) по прогнозам моделей, отсортированные по model_id.
+        Исход — логическая колонка студента; NULL считается нулём.
+        """
+        outcome = func.coalesce(cast(getattr(Student, target), Integer), 0)
+        stmt = (
+            select(Prediction.model_id, Prediction.predicted_prob, outcome)
+            .join(Student, Student.id == Prediction.student_id)
+            .where(Prediction.model_id.in_(model_ids))
+            .order_by(Prediction.model_id)
+        )
+        if direction_id is not None:
+            stmt = stmt.where(Student.direction_id == direction_id)
+        result = await self.session.execute(stmt)
+        return result.all()
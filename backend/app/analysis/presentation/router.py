@@ -1,9 +1,14 @@
+from typing import Literal
+
 from fastapi import APIRouter, Query, HTTPException, Request, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.api.dependencies.ml import get_model_from_state
 from app.db.session_maker import TransactionSessionDep
 
+from app.analysis.infrastructure.repository import AnalysisRepository
+from app.analysis.services.cache import analysis_cache
+from app.analysis.services.quality import ModelQualityService
 from app.analysis.services.services import ProbabilityAnalysisService
+from app.analysis.presentation.schemas import ModelQualityRequest
 from app.ml_model.infrastructure.db_repository import DBRepository
 from app.predict.infrastructure.repository import PredictRepository
 from app.student.infrastructure.repository import StudentRepository
@@ -15,7 +20,12 @@ def get_service(session: AsyncSession = TransactionSessionDep) -> ProbabilityAna
     db_repository = DBRepository(session)
     student_repository = StudentRepository(session)
     prediction_repository = PredictRepository(session)
-    return ProbabilityAnalysisService(db_repository, student_repository, prediction_repository)
+    analysis_repository = AnalysisRepository(session)
+    return ProbabilityAnalysisService(db_repository, student_repository, prediction_repository, analysis_repository)
+
+
+def get_quality_service(session: AsyncSession = TransactionSessionDep) -> ModelQualityService:
+    return ModelQualityService(DBRepository(session), AnalysisRepository(session))
 
 
 @router.get("/probability-intervals")
@@ -24,14 +34,36 @@ async def get_probability_intervals(
         model_id: int,
         target_feature: str = Query(...),
         direction_id: int = Query(...),
+        mode: Literal["sql", "memory"] = "sql",
         service: ProbabilityAnalysisService = Depends(get_service),
 ):
 
-    #model_data = get_model_from_state(request, model_id)
     try:
-        result = await service.get_probability_intervals(model_id, target_feature, direction_id)
+        result = await service.get_probability_intervals(model_id, target_feature, direction_id, mode)
         return {"probability_intervals": result}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return await analysis_cache.stats()
+
+
+@router.post("/quality")
+async def get_model_quality(
+        request: ModelQualityRequest,
+        service: ModelQualityService = Depends(get_quality_service),
+):
+    try:
+        models = await service.get_quality(
+            request.model_ids, request.target, request.direction_id,
+            bins=request.bins, groups=request.groups, max_points=request.max_points,
+        )
+        return {"models": models}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
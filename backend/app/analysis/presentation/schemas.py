@@ -0,0 +1,12 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class ModelQualityRequest(BaseModel):
+    model_ids: list[int] = Field(min_length=1)
+    target: Literal["session_1_passed", "session_2_passed", "session_3_passed", "session_4_passed"] = "session_4_passed"
+    direction_id: int | None = None
+    bins: int = Field(10, ge=2, le=100)
+    groups: int = Field(10, ge=2, le=100)
+    max_points: int = Field(200, ge=10, le=5000)
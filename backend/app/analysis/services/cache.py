@@ -0,0 +1,303 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.config import settings
+
+# Теги, которые нужно сбросить после коммита сессии (хранятся в session.info)
+PENDING_TAGS = "analysis_cache_tags"
+
+
+def model_tag(model_id: int) -> str:
+    return f"model:{model_id}"
+
+
+def direction_tag(direction_id: int) -> str:
+    return f"direction:{direction_id}"
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_writes = 0
+
+    def to_dict(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_writes": self.stale_writes,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
+
+
+class InMemoryAnalysisCache:
+    """
+    Кэш результатов анализа в памяти процесса: LRU с ограничением размера и временем жизни записей.
+    Каждая запись помечается тегами (модель, направление), по которым её можно сбросить.
+    Сброс тега увеличивает его поколение: set с поколением, прочитанным до расчёта, не запишет
+    результат, если тег за это время сбросили.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_size: int = 256, ttl: float = 600):
+        if max_size < 1:
+            raise ValueError("Размер кэша анализа должен быть положительным")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Any, float, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    async def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry[0]
+
+    async def generation(self, *tags: str) -> tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    async def set(self, key: str, value: Any, tags: tuple[str, ...] = (),
+                  generation: tuple[int, ...] | None = None) -> None:
+        with self._lock:
+            if generation is not None and generation != tuple(self._generations.get(tag, 0) for tag in tags):
+                self._stats.stale_writes += 1
+                return
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    async def invalidate(self, *tags: str) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in self._tags.pop(tag, set()):
+                    if self._remove(key):
+                        self._stats.invalidations += 1
+
+    async def clear(self) -> None:
+        # Поколения не сбрасываются: иначе расчёт, начатый до очистки, мог бы совпасть с ними
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    async def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                **self._stats.to_dict(),
+            }
+
+
+class RedisAnalysisCache:
+    """
+    Кэш результатов анализа в Redis, общий для всех воркеров приложения.
+    Значения хранятся в JSON с TTL; теги — множества ключей; индекс — sorted set по времени истечения,
+    по которому вытесняются самые старые записи сверх max_size. Поколения тегов — счётчики INCR
+    без TTL; set проверяет их под WATCH. Счётчики попаданий — в процессе.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, max_size: int = 256, ttl: float = 600, prefix: str = "analysis"):
+        from redis import asyncio as aioredis
+
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.prefix = prefix
+        self._stats = CacheStats()
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:entry:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    def _generation(self, tag: str) -> str:
+        return f"{self.prefix}:gen:{tag}"
+
+    @property
+    def _index(self) -> str:
+        return f"{self.prefix}:index"
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self.redis.get(self._key(key))
+        if raw is None:
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        return json.loads(raw)
+
+    async def generation(self, *tags: str) -> tuple[int, ...]:
+        if not tags:
+            return ()
+        values = await self.redis.mget([self._generation(tag) for tag in tags])
+        return tuple(int(value or 0) for value in values)
+
+    async def set(self, key: str, value: Any, tags: tuple[str, ...] = (),
+                  generation: tuple[int, ...] | None = None) -> None:
+        from redis.exceptions import WatchError
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if generation is not None and tags:
+                # Сброс тега между проверкой и записью прерывает транзакцию (WatchError)
+                generation_keys = [self._generation(tag) for tag in tags]
+                await pipe.watch(*generation_keys)
+                current = tuple(int(value or 0) for value in await pipe.mget(generation_keys))
+                if current != generation:
+                    self._stats.stale_writes += 1
+                    return
+                pipe.multi()
+            pipe.set(self._key(key), json.dumps(value, ensure_ascii=False), ex=int(self.ttl))
+            for tag in tags:
+                pipe.sadd(self._tag(tag), key)
+                pipe.expire(self._tag(tag), int(self.ttl))
+            # Оценка — время истечения: записи, удалённые Redis по TTL, вычищаются из индекса по ней
+            pipe.zadd(self._index, {key: time.time() + self.ttl})
+            try:
+                await pipe.execute()
+            except WatchError:
+                self._stats.stale_writes += 1
+                return
+
+        excess = await self._live_size() - self.max_size
+        if excess > 0:
+            evicted = [key for key, _ in await self.redis.zpopmin(self._index, excess)]
+            if evicted:
+                await self.redis.delete(*[self._key(key) for key in evicted])
+                self._stats.evictions += len(evicted)
+
+    async def _live_size(self) -> int:
+        """Число живых записей: из индекса сначала удаляются истёкшие по TTL"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(self._index, "-inf", time.time())
+            pipe.zcard(self._index)
+            _, size = await pipe.execute()
+        return size
+
+    async def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            keys = await self.redis.smembers(self._tag(tag))
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if keys:
+                    pipe.delete(*[self._key(key) for key in keys])
+                    pipe.zrem(self._index, *keys)
+                pipe.delete(self._tag(tag))
+                pipe.incr(self._generation(tag))
+                await pipe.execute()
+            self._stats.invalidations += len(keys)
+
+    async def clear(self) -> None:
+        # Поколения тегов остаются (см. InMemoryAnalysisCache.clear)
+        generations = f"{self.prefix}:gen:"
+        keys = [key async for key in self.redis.scan_iter(f"{self.prefix}:*") if not key.startswith(generations)]
+        if keys:
+            await self.redis.delete(*keys)
+
+    async def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "size": await self._live_size(),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            **self._stats.to_dict(),
+        }
+
+
+def _create_cache():
+    if settings.ANALYSIS_CACHE_BACKEND == "redis":
+        return RedisAnalysisCache(
+            settings.ANALYSIS_CACHE_REDIS_URL,
+            max_size=settings.ANALYSIS_CACHE_SIZE,
+            ttl=settings.ANALYSIS_CACHE_TTL,
+        )
+    return InMemoryAnalysisCache(max_size=settings.ANALYSIS_CACHE_SIZE, ttl=settings.ANALYSIS_CACHE_TTL)
+
+
+analysis_cache = _create_cache()
+
+
+def invalidate_on_commit(session: AsyncSession | Session, *tags: str) -> None:
+    """
+    Откладывает сброс тегов до успешного коммита сессии. Сброс до коммита не помогает:
+    параллельный запрос успеет прочитать старые строки и положить их в кэш на всё время TTL.
+    """
+    tags = [tag for tag in tags if tag is not None]
+    if tags:
+        session.info.setdefault(PENDING_TAGS, set()).update(tags)
+
+
+_invalidation_tasks: set[asyncio.Task] = set()
+
+
+def _log_invalidation_error(task: asyncio.Task) -> None:
+    _invalidation_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Не удалось сбросить кэш анализа: {task.exception()}")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    tags = session.info.pop(PENDING_TAGS, None)
+    if not tags:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Синхронная сессия вне event loop (скрипты)
+        asyncio.run(analysis_cache.invalidate(*tags))
+        return
+    # Обработчик синхронный, сам сброс асинхронный — запускаем задачу в том же loop
+    task = loop.create_task(analysis_cache.invalidate(*tags))
+    _invalidation_tasks.add(task)
+    task.add_done_callback(_log_invalidation_error)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    # Изменения откатились — кэш остаётся верным
+    session.info.pop(PENDING_TAGS, None)
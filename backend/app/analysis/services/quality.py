@@ -0,0 +1,186 @@
+import numpy as np
+
+from app.analysis.domain.interfaces.repository import IAnalysisRepository
+from app.executor import blocking_executor
+from app.ml_model.domain.interfaces.db_repository import IDBRepository
+
+OUTCOME_COLUMNS = ("session_1_passed", "session_2_passed", "session_3_passed", "session_4_passed")
+
+
+def thin_indices(size: int, max_points: int) -> np.ndarray:
+    """Не больше max_points равномерно расположенных индексов кривой (первый и последний сохраняются)."""
+    if size <= max_points:
+        return np.arange(size)
+    return np.unique(np.linspace(0, size - 1, max_points).round().astype(np.int64))
+
+
+def threshold_counts(y: np.ndarray, p: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Один проход по отсортированным вероятностям: для каждого различного порога
+    число истинно и ложно положительных при прогнозе «1» для p >= порога.
+    """
+    order = np.argsort(-p, kind="mergesort")
+    p_sorted = p[order]
+    y_sorted = y[order]
+    last = np.r_[np.flatnonzero(np.diff(p_sorted)), p_sorted.size - 1]
+    tps = np.cumsum(y_sorted)[last]
+    fps = last + 1 - tps
+    return tps, fps, p_sorted[last]
+
+
+def roc_pr_curves(y: np.ndarray, p: np.ndarray, max_points: int = 200) -> tuple[dict, dict]:
+    positives = int(y.sum())
+    negatives = int(y.size - positives)
+    if positives == 0 or negatives == 0:
+        empty = {"thresholds": [], "auc": None}
+        return {**empty, "fpr": [], "tpr": []}, {"precision": [], "recall": [], "thresholds": [], "average_precision": None}
+
+    tps, fps, thresholds = threshold_counts(y, p)
+    tpr = np.r_[0.0, tps / positives]
+    fpr = np.r_[0.0, fps / negatives]
+    auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    precision = tps / (tps + fps)
+    recall = tps / positives
+    average_precision = float(np.sum(np.diff(np.r_[0.0, recall]) * precision))
+
+    roc_points = thin_indices(fpr.size, max_points)
+    pr_points = thin_indices(precision.size, max_points)
+    # У точки (0, 0) порога нет: прогноз «1» не даётся никому
+    roc_thresholds = [None, *thresholds.tolist()]
+    roc = {
+        "fpr": fpr[roc_points].tolist(),
+        "tpr": tpr[roc_points].tolist(),
+        "thresholds": [roc_thresholds[i] for i in roc_points],
+        "auc": auc,
+    }
+    pr = {
+        "precision": precision[pr_points].tolist(),
+        "recall": recall[pr_points].tolist(),
+        "thresholds": thresholds[pr_points].tolist(),
+        "average_precision": average_precision,
+    }
+    return roc, pr
+
+
+def calibration_curve(y: np.ndarray, p: np.ndarray, bins: int = 10) -> tuple[list[dict], float]:
+    """Надёжность прогноза по равным интервалам вероятности и ожидаемая ошибка калибровки (ECE)."""
+    index = np.minimum((p * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    sum_p = np.bincount(index, weights=p, minlength=bins)
+    sum_y = np.bincount(index, weights=y, minlength=bins)
+
+    filled = counts > 0
+    mean_p = np.divide(sum_p, counts, out=np.zeros(bins), where=filled)
+    observed = np.divide(sum_y, counts, out=np.zeros(bins), where=filled)
+    ece = float(np.sum(counts * np.abs(mean_p - observed)) / max(p.size, 1))
+
+    curve = [
+        {
+            "bin_lower": i / bins,
+            "bin_upper": (i + 1) / bins,
+            "count": int(counts[i]),
+            "mean_predicted": float(mean_p[i]),
+            "observed_rate": float(observed[i]),
+        }
+        for i in np.flatnonzero(filled)
+    ]
+    return curve, ece
+
+
+def lift_table(y: np.ndarray, p: np.ndarray, groups: int = 10) -> list[dict]:
+    """Таблица lift по группам равного размера (децилям) от самых высоких вероятностей к низким."""
+    if p.size == 0:
+        return []
+    order = np.argsort(-p, kind="mergesort")
+    p_sorted = p[order]
+    y_sorted = y[order]
+    starts = np.unique(np.linspace(0, p.size, groups + 1).round().astype(np.int64)[:-1])
+    starts = starts[starts < p.size]
+
+    counts = np.diff(np.r_[starts, p.size])
+    positives = np.add.reduceat(y_sorted, starts)
+    max_p = np.maximum.reduceat(p_sorted, starts)
+    min_p = np.minimum.reduceat(p_sorted, starts)
+
+    base_rate = y.sum() / y.size
+    rate = positives / counts
+    cum_positives = np.cumsum(positives)
+    cum_counts = np.cumsum(counts)
+    total_positives = max(y.sum(), 1)
+
+    return [
+        {
+            "group": i + 1,
+            "count": int(counts[i]),
+            "min_prob": float(min_p[i]),
+            "max_prob": float(max_p[i]),
+            "positives": int(positives[i]),
+            "rate": float(rate[i]),
+            "lift": float(rate[i] / base_rate) if base_rate else None,
+            "cumulative_gain": float(cum_positives[i] / total_positives),
+            "cumulative_lift": float(cum_positives[i] / cum_counts[i] / base_rate) if base_rate else None,
+        }
+        for i in range(starts.size)
+    ]
+
+
+def quality_report(y: np.ndarray, p: np.ndarray, bins: int = 10, groups: int = 10, max_points: int = 200) -> dict:
+    y = np.asarray(y, dtype=np.float64)
+    p = np.asarray(p, dtype=np.float64)
+    roc, pr = roc_pr_curves(y, p, max_points)
+    calibration, ece = calibration_curve(y, p, bins)
+    return {
+        "n": int(p.size),
+        "positives": int(y.sum()),
+        "brier": float(np.mean((p - y) ** 2)) if p.size else None,
+        "ece": ece,
+        "roc": roc,
+        "pr": pr,
+        "calibration": calibration,
+        "lift": lift_table(y, p, groups),
+    }
+
+
+def quality_reports(model_ids: np.ndarray, y: np.ndarray, p: np.ndarray, requested: list[int],
+                    bins: int, groups: int, max_points: int) -> list[dict]:
+    """Отчёты по нескольким моделям из одной выборки, отсортированной по model_id."""
+    reports = []
+    for model_id in requested:
+        start, end = np.searchsorted(model_ids, [model_id, model_id + 1])
+        reports.append({"model_id": model_id, **quality_report(y[start:end], p[start:end], bins, groups, max_points)})
+    return reports
+
+
+class ModelQualityService:
+    """
+    Качество моделей по сохранённым прогнозам и фактическим исходам (session_N_passed):
+    ROC и PR-кривые, калибровка, lift по децилям и Brier. Все модели считаются из одного запроса.
+    """
+
+    def __init__(self, db_repo: IDBRepository, analysis_repo: IAnalysisRepository):
+        self.db_repo = db_repo
+        self.analysis_repo = analysis_repo
+
+    async def get_quality(
+            self,
+            model_ids: list[int],
+            target: str,
+            direction_id: int | None = None,
+            bins: int = 10,
+            groups: int = 10,
+            max_points: int = 200,
+    ) -> list[dict]:
+        if target not in OUTCOME_COLUMNS:
+            raise ValueError(f"Исход должен быть одним из: {', '.join(OUTCOME_COLUMNS)}")
+        model_ids = list(dict.fromkeys(model_ids))
+        for model_id in model_ids:
+            if not await self.db_repo.get_by_id(model_id):
+                raise ValueError(f"Model with id='{model_id}' not found")
+
+        rows = await self.analysis_repo.get_outcomes(model_ids, target, direction_id)
+        data = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        return await blocking_executor.run_cpu(
+            "model_quality", quality_reports,
+            data[:, 0].astype(np.int64), data[:, 2], data[:, 1], model_ids, bins, groups, max_points,
+        )
@@ -1,60 +1,87 @@
 import numpy as np
 import pandas as pd
 
+from app.analysis.domain.interfaces.repository import IAnalysisRepository
+from app.analysis.services.cache import analysis_cache, direction_tag, model_tag
+from app.executor import blocking_executor
 from app.ml_model.domain.interfaces.db_repository import IDBRepository
 from app.predict.domain.interfaces.repository import IPredictionRepository
 from app.student.domain.interfaces.repository import IStudentRepository
 
 
+def sturges_intervals(min_value: float, max_value: float, count: int) -> tuple[list[float], list[str]]:
+    """Границы и подписи интервалов по правилу Стёрджеса; первый интервал начинается с нуля."""
+    R = max_value - min_value
+    r = int(1 + 3.322 * np.log10(count))
+    h = R / r
+    intervals = [0, min_value + h / 2]
+    for i in range(2, r + 2):
+        intervals.append(intervals[i - 1] + h)
+
+    labels = [f"{intervals[i]:.1f}-{intervals[i + 1]:.1f}" for i in range(len(intervals) - 1)]
+    return intervals, labels
+
+
+def get_intervals(df: pd.DataFrame, target_feature: str) -> pd.DataFrame:
+    df[target_feature] = df[target_feature].apply(lambda x: int(x) if isinstance(x, bool) else x)
+
+    max_target_feature = df[target_feature].max()
+    min_target_feature = df[target_feature].min()
+    count_rows = len(df)
+
+    if max_target_feature == min_target_feature:
+        # Защита от одинаковых значений — создаём один фиктивный интервал
+        df['interval'] = f"{min_target_feature:.1f}-{min_target_feature + 1:.1f}"
+        return df
+
+    intervals, labels = sturges_intervals(min_target_feature, max_target_feature, count_rows)
+
+    df['interval'] = pd.cut(
+        df[target_feature],
+        bins=intervals,
+        labels=labels,
+        include_lowest=True,
+        right=True
+    )
+
+    return df
+
+
+def compute_mean_probabilities(df: pd.DataFrame, target_feature: str) -> dict:
+    df_with_intervals = get_intervals(df, target_feature)
+    mean_prob = df_with_intervals.groupby('interval', observed=True)['predicted_prob'].mean().fillna(0)
+    return mean_prob.to_dict()
+
+
+def merge_and_compute(students: list[dict], predictions: list[tuple], target_feature: str) -> dict:
+    """Расчёт в pandas (mode="memory"). На входе только данные: функция выполняется и в пуле процессов."""
+    students_df = pd.DataFrame(students)
+    predictions_df = pd.DataFrame(predictions, columns=["student_id", "predicted_class", "predicted_prob"])
+    merged_df = pd.merge(students_df, predictions_df, left_on="id", right_on="student_id", how="left")
+
+    return compute_mean_probabilities(merged_df, target_feature)
+
+
 class ProbabilityAnalysisService:
     def __init__(
             self,
             db_repo: IDBRepository,
             student_repo: IStudentRepository,
             prediction_repo: IPredictionRepository,
+            analysis_repo: IAnalysisRepository | None = None,
     ):
         self.db_repo = db_repo
         self.student_repo = student_repo
         self.prediction_repo = prediction_repo
-
-    @staticmethod
-    def get_intervals(df: pd.DataFrame, target_feature: str) -> pd.DataFrame:
-        df[target_feature] = df[target_feature].apply(lambda x: int(x) if isinstance(x, bool) else x)
-
-        max_target_feature = df[target_feature].max()
-        min_target_feature = df[target_feature].min()
-        count_rows = len(df)
-
-        if max_target_feature == min_target_feature:
-            # Защита от одинаковых значений — создаём один фиктивный интервал
-            df['interval'] = f"{min_target_feature:.1f}-{min_target_feature + 1:.1f}"
-            return df
-
-        R = max_target_feature - min_target_feature
-        r = int(1 + 3.322 * np.log10(count_rows))
-        h = R / r
-        intervals = [0, min_target_feature + h / 2]
-        for i in range(2, r + 2):
-            intervals.append(intervals[i - 1] + h)
-
-        labels = [f"{intervals[i]:.1f}-{intervals[i + 1]:.1f}" for i in range(len(intervals) - 1)]
-
-        df['interval'] = pd.cut(
-            df[target_feature],
-            bins=intervals,
-            labels=labels,
-            include_lowest=True,
-            right=True
-        )
-
-        return df
-
-    def compute_mean_probabilities(self, df: pd.DataFrame, target_feature: str) -> dict:
-        df_with_intervals = self.get_intervals(df, target_feature)
-        mean_prob = df_with_intervals.groupby('interval', observed=True)['predicted_prob'].mean().fillna(0)
-        return mean_prob.to_dict()
-
-    async def get_probability_intervals(self, model_id: int, target_feature: str, direction_id: int):
+        self.analysis_repo = analysis_repo
+
+    async def get_probability_intervals(self, model_id: int, target_feature: str, direction_id: int,
+                                        mode: str = "sql"):
+        """
+        Средняя вероятность прогноза по интервалам признака.
+        mode="sql" — агрегация в базе (MIN/MAX/COUNT, затем один GROUP BY по интервалам),
+        mode="memory" — прежний расчёт в pandas по всем студентам направления.
+        """
         model = await self.db_repo.get_by_id(model_id)
         if not model:
             raise ValueError(f"Model with id='{model_id}' not found")
@@ -63,11 +90,44 @@ class ProbabilityAnalysisService:
         if target_feature not in feature_columns:
             raise ValueError(f"Feature '{target_feature}' not in model features")
 
-        students = await self.student_repo.list_by_direction(direction_id=direction_id)
-        predictions = await self.prediction_repo.get_prediction_data_by_model_id(model.id)
-
-        students_df = pd.DataFrame([s.__dict__ for s in students])
-        predictions_df = pd.DataFrame(predictions, columns=["student_id", "predicted_class", "predicted_prob"])
-        merged_df = pd.merge(students_df, predictions_df, left_on="id", right_on="student_id", how="left")
-
-        return self.compute_mean_probabilities(merged_df, target_feature)
+        # Результат не зависит от режима расчёта; сбрасывается при записи прогнозов модели
+        # и при изменении студентов направления
+        cache_key = f"probability_intervals:{model.id}:{direction_id}:{target_feature}"
+        tags = (model_tag(model.id), direction_tag(direction_id))
+        cached = await analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        # Поколение тегов до чтения данных: если их сбросят во время расчёта, результат не кэшируется
+        generation = await analysis_cache.generation(*tags)
+
+        if mode == "sql" and self.analysis_repo is not None:
+            result = await self._aggregate_in_db(model.id, target_feature, direction_id)
+        else:
+            students = await self.student_repo.list_by_direction(direction_id=direction_id)
+            predictions = await self.prediction_repo.get_prediction_data_by_model_id(model.id)
+            result = await blocking_executor.run_cpu(
+                "probability_intervals", merge_and_compute,
+                [student.model_dump() for student in students], [tuple(row) for row in predictions], target_feature,
+            )
+
+        await analysis_cache.set(cache_key, result, tags=tags, generation=generation)
+        return result
+
+    async def _aggregate_in_db(self, model_id: int, target_feature: str, direction_id: int) -> dict:
+        min_value, max_value, count = await self.analysis_repo.get_feature_stats(direction_id, target_feature)
+        if count == 0 or min_value is None:
+            return {}
+
+        if min_value == max_value:
+            # Как и в get_intervals: один фиктивный интервал
+            rows = await self.analysis_repo.get_interval_means(direction_id, model_id, target_feature, None)
+            mean = rows[0][1] if rows else None
+            return {f"{min_value:.1f}-{min_value + 1:.1f}": float(mean) if mean is not None else 0.0}
+
+        intervals, labels = sturges_intervals(min_value, max_value, count)
+        rows = await self.analysis_repo.get_interval_means(direction_id, model_id, target_feature, intervals)
+        return {
+            labels[bucket]: float(mean) if mean is not None else 0.0
+            for bucket, mean, _ in rows
+            if bucket is not None
+        }
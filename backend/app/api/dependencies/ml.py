@@ -1,17 +1,47 @@
-from fastapi import Request, HTTPException
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session_maker import TransactionSessionDep
+from app.db.session_maker import TransactionSessionDep, session_manager
+from app.ml_model.domain.entities import TrainingJob
+from app.ml_model.infrastructure.db_repository import DBRepository
+from app.ml_model.infrastructure.ml_model_repository import MLModelRepository
+from app.ml_model.services.ml_model import MLModelService
+from app.ml_model.services.training_jobs import training_job_manager
+from app.predict.infrastructure.repository import PredictRepository
 from app.student.infrastructure.repository import StudentRepository
 from app.student.services.service import StudentService
 
 
-def get_model_from_state(request: Request, model_id: int):
-    models = getattr(request.app.state, "models", None)
-    if not models or model_id not in models:
-        raise HTTPException(status_code=404, detail=f"Model '{model_id}' not loaded. Call /load/?model_name=... first.")
-    return models[model_id]
-
 def get_student_service(session: AsyncSession = TransactionSessionDep) -> StudentService:
     repo = StudentRepository(session)
-    return StudentService(repo)
\ No newline at end of file
+    return StudentService(repo)
+
+
+def build_ml_model_service(session: AsyncSession) -> MLModelService:
+    student_repo = StudentRepository(session)
+    db_repo = DBRepository(session)
+    predict_repo = PredictRepository(session)
+    ml_repo = MLModelRepository(model_type="logit")
+    return MLModelService(student_repo, db_repo, predict_repo, ml_repo)
+
+
+async def retrain_direction_models(direction_id: int) -> dict:
+    """Дообучение всех моделей направления в собственной сессии; модели без lineage пропускаются."""
+    results = []
+    async with session_manager.create_session() as session:
+        async with session_manager.transaction(session):
+            service = build_ml_model_service(session)
+            for model in await service.get_model_by_direction(direction_id) or []:
+                try:
+                    results.append(await service.retrain_incremental(model.id))
+                except ValueError as e:
+                    results.append({"model_id": model.id, "status": "skipped", "detail": str(e)})
+    return {"direction_id": direction_id, "models": results}
+
+
+async def schedule_direction_retrain(direction_id: int) -> TrainingJob:
+    """Ставит дообучение моделей направления в очередь фоновых задач (после импорта студентов)."""
+    logger.info(f"Дообучение моделей направления {direction_id} после импорта")
+    return training_job_manager.submit(
+        lambda job: retrain_direction_models(direction_id), kind="retrain", direction_id=direction_id
+    )
@@ -4,8 +4,36 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    pass
+    # Сколько загруженных моделей держать в памяти процесса
+    MODEL_REGISTRY_SIZE: int = 8
 
-#settings = Settings()
+    # Фоновое обучение: "local" — пул процессов в приложении, "celery" — воркеры Celery
+    TRAINING_BACKEND: str = "local"
+    TRAINING_MAX_WORKERS: int = 2
+    TRAINING_JOBS_HISTORY: int = 100
+    # Процессов для параллельного перебора моделей (/ml/sweep)
+    SWEEP_MAX_WORKERS: int = 4
+    # Процессов для параллельной кросс-валидации по фолдам
+    CV_MAX_WORKERS: int = 4
+    # Дообучать модели направления после импорта студентов (/students/upload)
+    AUTO_RETRAIN_ON_IMPORT: bool = False
+    # Тип вычислений при прогнозе: "float64" или "float32" (быстрее на больших страницах, точность ~1e-6)
+    SCORING_DTYPE: str = "float64"
+    CELERY_BROKER_URL: str = "redis://localhost:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
+
+    # Пулы для блокирующей и CPU-ёмкой работы вне event loop
+    EXECUTOR_IO_WORKERS: int = 8
+    EXECUTOR_CPU_WORKERS: int = 4
+    EXECUTOR_CPU_KIND: str = "thread"
+
+    # Кэш результатов анализа: "memory" — в процессе, "redis" — общий для воркеров
+    ANALYSIS_CACHE_BACKEND: str = "memory"
+    ANALYSIS_CACHE_SIZE: int = 256
+    ANALYSIS_CACHE_TTL: int = 600
+    ANALYSIS_CACHE_REDIS_URL: str = "redis://localhost:6379/1"
+
+
+settings = Settings()
 
 database_url = "sqlite+aiosqlite:///./test.db"  # f'postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}'
@@ -0,0 +1,129 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+import numpy as np
+
+from app.db.config import settings
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> tuple[Any, float]:
+    """Выполняет fn в воркере и возвращает результат вместе с чистым временем выполнения."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+class CallStats:
+    """Статистика вызовов одного типа: количество, ошибки и последние замеры времени."""
+
+    def __init__(self, sample_size: int):
+        self.calls = 0
+        self.errors = 0
+        self.run_seconds = deque(maxlen=sample_size)
+        self.wait_seconds = deque(maxlen=sample_size)
+
+    def to_dict(self) -> dict:
+        run = np.fromiter(self.run_seconds, dtype=float)
+        wait = np.fromiter(self.wait_seconds, dtype=float)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "run_mean": float(run.mean()) if run.size else None,
+            "run_p50": float(np.percentile(run, 50)) if run.size else None,
+            "run_p99": float(np.percentile(run, 99)) if run.size else None,
+            "run_max": float(run.max()) if run.size else None,
+            "wait_p99": float(np.percentile(wait, 99)) if wait.size else None,
+        }
+
+
+class BlockingExecutor:
+    """
+    Выполнение CPU-ёмкой и блокирующей работы вне event loop.
+    run_io — пул потоков для блокирующего I/O (чтение файлов, joblib, Excel).
+    run_cpu — пул потоков или процессов (EXECUTOR_CPU_KIND) для вычислений;
+    в режиме "process" функция и аргументы должны сериализоваться pickle.
+    Для каждого имени вызова собирается время ожидания в очереди и время выполнения.
+    """
+
+    def __init__(self, io_workers: int, cpu_workers: int, cpu_kind: str = "thread", sample_size: int = 1000):
+        if cpu_kind not in ("thread", "process"):
+            raise ValueError("EXECUTOR_CPU_KIND должен быть 'thread' или 'process'")
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.cpu_kind = cpu_kind
+        self.sample_size = sample_size
+        self._io_pool: Executor | None = None
+        self._cpu_pool: Executor | None = None
+        self._stats: dict[str, CallStats] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def io_pool(self) -> Executor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="io")
+        return self._io_pool
+
+    @property
+    def cpu_pool(self) -> Executor:
+        if self._cpu_pool is None:
+            if self.cpu_kind == "process":
+                self._cpu_pool = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._cpu_pool = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="cpu")
+        return self._cpu_pool
+
+    async def run_io(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        return await self._run(self.io_pool, name, fn, args, kwargs)
+
+    async def run_cpu(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        return await self._run(self.cpu_pool, name, fn, args, kwargs)
+
+    async def _run(self, pool: Executor, name: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        loop = asyncio.get_running_loop()
+        stats = self._get_stats(name)
+        submitted = time.perf_counter()
+        try:
+            result, run_seconds = await loop.run_in_executor(pool, partial(_timed_call, fn, args, kwargs))
+        except Exception:
+            with self._lock:
+                stats.calls += 1
+                stats.errors += 1
+            raise
+        total_seconds = time.perf_counter() - submitted
+        with self._lock:
+            stats.calls += 1
+            stats.run_seconds.append(run_seconds)
+            stats.wait_seconds.append(max(total_seconds - run_seconds, 0.0))
+        return result
+
+    def _get_stats(self, name: str) -> CallStats:
+        with self._lock:
+            if name not in self._stats:
+                self._stats[name] = CallStats(self.sample_size)
+            return self._stats[name]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def shutdown(self) -> None:
+        for pool in (self._io_pool, self._cpu_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool = self._cpu_pool = None
+
+
+blocking_executor = BlockingExecutor(
+    io_workers=settings.EXECUTOR_IO_WORKERS,
+    cpu_workers=settings.EXECUTOR_CPU_WORKERS,
+    cpu_kind=settings.EXECUTOR_CPU_KIND,
+)
@@ -9,12 +9,16 @@ from app.direction.presentation.router import router as direction_router
 from app.ml_model.presentation.routes import router as ml_router
 from app.predict.presentation.router import router as predict_router
 from app.analysis.presentation.router import router as analysis_router
+from app.ml_model.services.training_jobs import training_job_manager
+from app.executor import blocking_executor
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Выполняется при запуске приложения
     await init_db()
     yield
-    # Здесь можно указать код для завершения работы (опционально)
+    # Останавливаем фоновые задачи обучения
+    training_job_manager.shutdown()
+    blocking_executor.shutdown()
 app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
@@ -28,4 +32,9 @@ app.include_router(student_router, prefix="/students", tags=["students"])
 app.include_router(direction_router, prefix="/directions", tags=["directions"])
 app.include_router(ml_router, prefix="/ml", tags=["ml"])
 app.include_router(predict_router, prefix="/predict", tags=["predict"])
-app.include_router(analysis_router, prefix="/analysis", tags=["analysis"])
\ No newline at end of file
+app.include_router(analysis_router, prefix="/analysis", tags=["analysis"])
+
+
+@app.get("/metrics/executor", tags=["metrics"])
+async def get_executor_metrics():
+    return blocking_executor.stats()
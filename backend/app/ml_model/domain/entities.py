@@ -1,3 +1,6 @@
+from datetime import datetime
+from enum import Enum
+
 from pydantic import BaseModel
 
 
@@ -5,4 +8,35 @@ class BaseMLModel(BaseModel):
     id: int | None = None
     name: str
     features: list[str]
-    direction_id: int
+    direction_id: int | None = None
+    active_version: int | None = None
+
+
+class MLModelVersionInfo(BaseModel):
+    version: int
+    features: list[str]
+    created_at: datetime | None = None
+    active: bool = False
+
+
+class TrainingJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+class TrainingJob(BaseModel):
+    id: str
+    kind: str = "train"
+    model_name: str | None = None
+    direction_id: int | None = None
+    status: TrainingJobStatus = TrainingJobStatus.queued
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    queue_seconds: float | None = None
+    run_seconds: float | None = None
+    result: dict | None = None
+    error: str | None = None
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from app.ml_model.domain.entities import BaseMLModel
+from app.ml_model.domain.entities import BaseMLModel, MLModelVersionInfo
 from pydantic import BaseModel
 
 
@@ -31,3 +31,11 @@ class IDBRepository(ABC):
     @abstractmethod
     async def get_by_direction_id(self, direction_id: int) -> BaseMLModel | None:
         pass
+
+    @abstractmethod
+    async def list_versions(self, model_id: int) -> list[MLModelVersionInfo]:
+        pass
+
+    @abstractmethod
+    async def set_active_version(self, model_id: int, version: int) -> BaseMLModel | None:
+        pass
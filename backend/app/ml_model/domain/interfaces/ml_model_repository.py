@@ -31,7 +31,8 @@ class IMLModelRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def save_model(self, model_name: str, direction_id: int):
+    def save_model(self, model_name: str, direction_id: int, target: str | None = None,
+                   lineage: dict | None = None) -> int:
         raise NotImplementedError
 
     @abstractmethod
@@ -41,5 +42,6 @@ class IMLModelRepository(ABC):
             storage_manager: ModelStorageManager = None,
             model_type="logit",
             add_constant=True,
+            version: int | None = None,
     ):
         raise NotImplementedError
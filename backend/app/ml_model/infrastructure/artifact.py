@@ -0,0 +1,191 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from app.ml_model.infrastructure.kernels import link_cdf
+from app.ml_model.infrastructure.scorer import CompiledScorer
+
+ARTIFACT_FORMAT_VERSION = 1
+ARTIFACT_HEADER = "artifact.json"
+PARAMS_FILE = "params.npy"
+COV_FILE = "cov.npy"
+
+SUMMARY_QUANTILES = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)
+RESULT_STATISTICS = ("llf", "llnull", "llr", "llr_pvalue", "prsquared", "aic", "bic", "nobs", "df_model", "df_resid")
+
+
+def summarize_features(X: pd.DataFrame) -> dict[str, dict]:
+    """Сводка по обучающим данным вместо самих данных: среднее, медиана, разброс и квантили."""
+    X = X.drop(columns="const", errors="ignore").astype(float)
+    quantiles = X.quantile(list(SUMMARY_QUANTILES))
+    return {
+        col: {
+            "mean": float(X[col].mean()),
+            "median": float(X[col].median()),
+            "std": float(X[col].std()),
+            "min": float(X[col].min()),
+            "max": float(X[col].max()),
+            "quantiles": {str(q): float(quantiles.at[q, col]) for q in SUMMARY_QUANTILES},
+        }
+        for col in X.columns
+    }
+
+
+class ModelArtifact:
+    """
+    Компактное представление обученной модели: коэффициенты и ковариационная матрица в .npy
+    (загружаются через mmap), имена признаков, функция связи, итоговые статистики и сводка
+    по обучающим данным в JSON-заголовке. Не зависит от версий statsmodels/pandas и
+    повторяет ту часть интерфейса LogitResults, которой пользуется MLModelRepository.
+    """
+
+    def __init__(
+            self,
+            params: np.ndarray,
+            cov: np.ndarray,
+            param_names: list[str],
+            link: str,
+            statistics: dict | None = None,
+            train_summary: dict | None = None,
+    ):
+        self._params = params
+        self._cov = cov
+        self.param_names = list(param_names)
+        self.link = link.lower()
+        self.statistics = statistics or {}
+        self.train_summary = train_summary or {}
+
+    @classmethod
+    def from_result(
+            cls,
+            result,
+            link: str | None = None,
+            X_train: pd.DataFrame | None = None,
+            train_summary: dict | None = None,
+    ) -> "ModelArtifact":
+        if link is None:
+            link = type(result.model).__name__
+        statistics = {}
+        for name in RESULT_STATISTICS:
+            try:
+                statistics[name] = float(getattr(result, name))
+            except (AttributeError, TypeError, ValueError):
+                continue
+        return cls(
+            params=result.params.to_numpy(dtype=np.float64),
+            cov=np.asarray(result.cov_params(), dtype=np.float64),
+            param_names=result.params.index.tolist(),
+            link=link,
+            statistics=statistics,
+            train_summary=summarize_features(X_train) if X_train is not None else train_summary,
+        )
+
+    # --- Сохранение / загрузка ---
+
+    def save(self, model_dir: str) -> None:
+        os.makedirs(model_dir, exist_ok=True)
+        np.save(os.path.join(model_dir, PARAMS_FILE), np.ascontiguousarray(self._params, dtype=np.float64))
+        np.save(os.path.join(model_dir, COV_FILE), np.ascontiguousarray(self._cov, dtype=np.float64))
+        header = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "link": self.link,
+            "param_names": self.param_names,
+            "statistics": self.statistics,
+            "train_summary": self.train_summary,
+        }
+        with open(os.path.join(model_dir, ARTIFACT_HEADER), "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False, indent=4)
+
+    @staticmethod
+    def exists(model_dir: str) -> bool:
+        return os.path.exists(os.path.join(model_dir, ARTIFACT_HEADER))
+
+    @classmethod
+    def load(cls, model_dir: str, mmap: bool = True) -> "ModelArtifact":
+        with open(os.path.join(model_dir, ARTIFACT_HEADER), encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("format_version", 0) > ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата модели: {header.get('format_version')}")
+
+        mmap_mode = "r" if mmap else None
+        return cls(
+            params=np.load(os.path.join(model_dir, PARAMS_FILE), mmap_mode=mmap_mode),
+            cov=np.load(os.path.join(model_dir, COV_FILE), mmap_mode=mmap_mode),
+            param_names=header["param_names"],
+            link=header["link"],
+            statistics=header.get("statistics"),
+            train_summary=header.get("train_summary"),
+        )
+
+    # --- Интерфейс, совместимый с результатами statsmodels ---
+
+    @property
+    def params(self) -> pd.Series:
+        return pd.Series(np.asarray(self._params), index=self.param_names)
+
+    @property
+    def bse(self) -> pd.Series:
+        return pd.Series(np.sqrt(np.diag(self._cov)), index=self.param_names)
+
+    @property
+    def pvalues(self) -> pd.Series:
+        z = np.asarray(self._params) / np.sqrt(np.diag(self._cov))
+        return pd.Series(2 * norm.sf(np.abs(z)), index=self.param_names)
+
+    def cov_params(self) -> pd.DataFrame:
+        return pd.DataFrame(np.asarray(self._cov), index=self.param_names, columns=self.param_names)
+
+    def __getattr__(self, name):
+        # llf, llnull, prsquared и т.д. берутся из сохранённых статистик
+        statistics = self.__dict__.get("statistics", {})
+        if name in statistics:
+            return statistics[name]
+        raise AttributeError(name)
+
+    @property
+    def scorer(self) -> CompiledScorer:
+        return CompiledScorer.from_result(self, self.link)
+
+    def predict(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[self.param_names]
+        z = np.dot(np.asarray(X, dtype=np.float64), np.asarray(self._params))
+        return link_cdf(self.link, z, out=z)
+
+
+def convert_legacy_model(model_dir: str, remove_legacy: bool = False) -> bool:
+    """Переводит каталог модели из joblib (model.pkl + train_data.pkl) в формат ModelArtifact."""
+    import joblib
+
+    model_path = os.path.join(model_dir, "model.pkl")
+    if ModelArtifact.exists(model_dir) or not os.path.exists(model_path):
+        return False
+
+    result = joblib.load(model_path)
+    train_path = os.path.join(model_dir, "train_data.pkl")
+    X_train = joblib.load(train_path) if os.path.exists(train_path) else None
+    ModelArtifact.from_result(result, X_train=X_train).save(model_dir)
+
+    if remove_legacy:
+        for filename in ("model.pkl", "train_data.pkl", "scorer.json"):
+            path = os.path.join(model_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+    return True
+
+
+# Однократная конвертация: python -m app.ml_model.infrastructure.artifact [models_dir] [--remove-legacy]
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    base_dir = args[0] if args else "models"
+    remove = "--remove-legacy" in sys.argv
+
+    for name in sorted(os.listdir(base_dir)):
+        path = os.path.join(base_dir, name)
+        if os.path.isdir(path):
+            converted = convert_legacy_model(path, remove_legacy=remove)
+            print(f"{name}: {'сконвертирована' if converted else 'пропущена'}")
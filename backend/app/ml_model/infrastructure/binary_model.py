@@ -3,12 +3,18 @@ import pandas as pd
 from scipy.optimize import minimize
 from scipy.stats import norm
 
+from app.ml_model.infrastructure.kernels import inverse_mills, link_cdf, link_log_likelihood, link_pdf
+
+FIT_METHODS = ("bfgs", "newton")
+
 class BinaryModel:
     def __init__(self):
         self._named_weights = None
         self._weights = None  # Переменная для хранениня весов (бета)
         self.log_likelihood = None
         self.params = None
+        self.cov_params = None  # Ковариация оценок: обратный гессиан в оптимуме
+        self.fit_info = None  # Диагностика сходимости последнего fit
 
     @staticmethod
     def _model_fun(x) -> float:
@@ -62,26 +68,98 @@ class BinaryModel:
         log_likelihood = np.sum(y * np.log(y_pred) + (1 - y) * np.log(1 - y_pred))
         return log_likelihood
 
-    def fit(self, x, y):
-        """
-        Метод для обучения модели. Вычисляет веса (бета) с использованием минимизации логарифма правдоподобия.
+    def _negative_log_likelihood(self, weights, x, y) -> float:
+        """Минус логарифм правдоподобия (переопределяется в моделях в устойчивой форме)."""
+        return self._log_likelihood(weights, x, y)
+
+    def _gradient(self, weights, x, y) -> np.ndarray:
+        """Градиент минус логарифма правдоподобия по весам (аналитический, в моделях)."""
+        raise NotImplementedError
+
+    def _hessian(self, weights, x, y) -> np.ndarray:
+        """Гессиан минус логарифма правдоподобия по весам (аналитический, в моделях)."""
+        raise NotImplementedError
+
+    def _fit_newton(self, x, y, initial_weights, max_iter=100, tol=1e-8):
+        """
+        Метод Ньютона (для логита совпадает с IRLS) с дроблением шага,
+        если шаг не уменьшает минус логарифм правдоподобия.
+        """
+        weights = initial_weights
+        objective = self._negative_log_likelihood(weights, x, y)
+        converged = False
+        message = "Достигнуто максимальное число итераций"
+        iteration = 0
+        for iteration in range(1, max_iter + 1):
+            gradient = self._gradient(weights, x, y)
+            step = np.linalg.solve(self._hessian(weights, x, y), gradient)
+
+            step_size = 1.0
+            candidate = weights - step
+            candidate_objective = self._negative_log_likelihood(candidate, x, y)
+            while not candidate_objective <= objective and step_size > 1e-10:
+                step_size /= 2
+                candidate = weights - step_size * step
+                candidate_objective = self._negative_log_likelihood(candidate, x, y)
+            if not candidate_objective <= objective:
+                message = "Шаг Ньютона не уменьшает функцию правдоподобия"
+                break
+
+            weights = candidate
+            improvement = objective - candidate_objective
+            objective = candidate_objective
+            if np.max(np.abs(step_size * step)) < tol or abs(improvement) < tol * (abs(objective) + tol):
+                converged = True
+                message = "Сходимость достигнута"
+                break
+
+        return weights, {
+            "converged": converged,
+            "iterations": iteration,
+            "message": message,
+        }
+
+    def fit(self, x, y, method="bfgs", max_iter=100, tol=1e-8):
+        """
+        Метод для обучения модели. Вычисляет веса (бета) минимизацией минус логарифма правдоподобия.
         :param x: Входные данные (факторы)
         :param y: Истинные значения целевой переменной
+        :param method: "bfgs" — BFGS с аналитическим градиентом, "newton" — метод Ньютона (IRLS)
         :return: обученная модель
         """
+        if method not in FIT_METHODS:
+            raise ValueError(f"Недопустимый метод обучения. Используйте {' или '.join(FIT_METHODS)}")
         if isinstance(x, pd.DataFrame):
             feature_names = x.columns.tolist()
             x_values = x.values  # Преобразуем в numpy-массив
         else:
             feature_names = [f"feature_{i}" for i in range(x.shape[1])]
             x_values = x
-        x_values = np.concatenate([x_values, np.ones((x_values.shape[0], 1))], axis=1)
+        x_values = np.concatenate([x_values, np.ones((x_values.shape[0], 1))], axis=1).astype(np.float64)
         feature_names.append("intercept")
+        y = np.asarray(y, dtype=np.float64)
 
         # Оптимизация весов
         initial_weights = np.zeros(x_values.shape[1])
-        result = minimize(self._log_likelihood, initial_weights, args=(x_values, y), method='BFGS')
-        self._weights = result.x
+        if method == "newton":
+            self._weights, info = self._fit_newton(x_values, y, initial_weights, max_iter=max_iter, tol=tol)
+        else:
+            result = minimize(
+                self._negative_log_likelihood, initial_weights, args=(x_values, y),
+                jac=self._gradient, method='BFGS', options={"maxiter": max_iter * x_values.shape[1]},
+            )
+            self._weights = result.x
+            info = {"converged": bool(result.success), "iterations": int(result.nit), "message": result.message}
+
+        hessian = self._hessian(self._weights, x_values, y)
+        self.cov_params = np.linalg.pinv(hessian)
+        self.log_likelihood = -self._negative_log_likelihood(self._weights, x_values, y)
+        self.fit_info = {
+            "method": method,
+            **info,
+            "log_likelihood": float(self.log_likelihood),
+            "gradient_norm": float(np.max(np.abs(self._gradient(self._weights, x_values, y)))),
+        }
         # Сохраняем веса с именами
         self.params = pd.DataFrame(zip(feature_names, self._weights))
 
@@ -163,8 +241,24 @@ class LogitModel(BinaryModel):
         """
         Логистическая функция (сигмоида) для логит-модели.
         """
-        x = np.array(x, dtype=float)
-        return 1 / (1 + np.exp(-x))  # Сигмоида
+        return link_cdf("logit", x)  # Сигмоида
+
+    def _negative_log_likelihood(self, weights, x, y) -> float:
+        # log L = Σ y·z - log(1 + e^z); logaddexp не переполняется при больших |z|
+        z = np.dot(x, weights)
+        return -link_log_likelihood("logit", z, y, out=z)
+
+    def _gradient(self, weights, x, y) -> np.ndarray:
+        # -∂logL/∂β = -Xᵀ(y - p)
+        z = np.dot(x, weights)
+        p = link_cdf("logit", z, out=z)
+        p -= y
+        return np.dot(x.T, p)
+
+    def _hessian(self, weights, x, y) -> np.ndarray:
+        # -∂²logL/∂β² = Xᵀ diag(p(1 - p)) X
+        z = np.dot(x, weights)
+        return np.dot(x.T * link_pdf("logit", z, out=z), x)
 
     def get_margin_effect(self, x):
         """
@@ -202,7 +296,25 @@ class ProbitModel(BinaryModel):
         """
         Кумулятивная функция нормального распределения для пробит-модели.
         """
-        return norm.cdf(z)
+        return link_cdf("probit", z)
+
+    def _negative_log_likelihood(self, weights, x, y) -> float:
+        # log L = Σ log Φ(q·z), q = 2y - 1
+        z = np.dot(x, weights)
+        return -link_log_likelihood("probit", z, y, out=z)
+
+    def _gradient(self, weights, x, y) -> np.ndarray:
+        # -∂logL/∂β = -Xᵀλ
+        z = np.dot(x, weights)
+        return -np.dot(x.T, inverse_mills(z, y, out=z))
+
+    def _hessian(self, weights, x, y) -> np.ndarray:
+        # -∂²logL/∂β² = Xᵀ diag(λ(λ + z)) X
+        z = np.dot(x, weights)
+        lam = inverse_mills(z, y)
+        z += lam
+        z *= lam
+        return np.dot(x.T * z, x)
 
     @staticmethod
     def _density_function(x):
@@ -211,7 +323,7 @@ class ProbitModel(BinaryModel):
         :param x: Значение
         :return: Плотность распределения в точке x
         """
-        return 1 / np.sqrt(2 * np.pi) * np.exp(-x ** 2 / 2)
+        return link_pdf("probit", x)
 
     def get_margin_effect(self, x):
         """
@@ -269,6 +381,77 @@ def get_McFadden_r2(model, x, y):
     return 1 - (model.log_likelihood_long(x, y) / model.log_likelihood_short(y))
 
 
+def confusion_counts(y_true, y_pred, sample_weight=None) -> np.ndarray:
+    """
+    Взвешенные счётчики [tn, fp, fn, tp] за один проход: bincount по коду 2 * y_true + y_pred.
+    :param y_true: Истинные значения целевой переменной (0/1)
+    :param y_pred: Предсказания модели (0/1)
+    :param sample_weight: Веса наблюдений (по умолчанию все равны 1)
+    :return: Массив [tn, fp, fn, tp]
+    """
+    code = 2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64)
+    return np.bincount(code, weights=sample_weight, minlength=4)
+
+
+def threshold_confusion(y_true, y_score, thresholds, sample_weight=None) -> np.ndarray:
+    """
+    Счётчики [tn, fp, fn, tp] сразу для нескольких порогов: прогноз «1» при y_score >= порога.
+    Строка t результата — порог thresholds[t]; все пороги считаются одним bincount.
+    """
+    y = np.asarray(y_true, dtype=np.int64)
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+    y_pred = np.asarray(y_score, dtype=np.float64)[np.newaxis, :] >= thresholds[:, np.newaxis]
+    code = 2 * y + y_pred + 4 * np.arange(thresholds.size)[:, np.newaxis]
+    weights = None if sample_weight is None else np.broadcast_to(sample_weight, code.shape).ravel()
+    counts = np.bincount(code.ravel(), weights=weights, minlength=4 * thresholds.size)
+    return counts.reshape(thresholds.size, 4)
+
+
+def binary_metrics(y_true, y_score, thresholds=0.5, sample_weight=None, epsilon=1e-12) -> dict:
+    """
+    Метрики качества бинарного классификатора для одного или нескольких порогов:
+    матрица ошибок, accuracy, precision, recall, F1 и Rp² (по порогам), лог-лосс (по вероятностям).
+    :param y_true: Истинные значения целевой переменной (0/1)
+    :param y_score: Предсказанные вероятности P(y=1)
+    :param thresholds: Порог или список порогов
+    :param sample_weight: Веса наблюдений
+    :return: Словарь с массивами метрик в порядке порогов
+    """
+    y = np.asarray(y_true, dtype=np.float64)
+    score = np.asarray(y_score, dtype=np.float64)
+    weights = np.ones_like(y) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+
+    counts = threshold_confusion(y, score, thresholds, weights)
+    tn, fp, fn, tp = counts.T
+    total = counts.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accuracy = (tp + tn) / total
+        precision = tp / (tp + fp)
+        recall = tp / (tp + fn)
+        f1 = 2 * tp / (2 * tp + fp + fn)
+
+    # Rp²: доля ошибок модели против доли ошибок тривиального прогноза
+    mean_y = np.sum(weights * y) / np.sum(weights)
+    w_0 = min(mean_y, 1 - mean_y)
+    rp2 = 1 - (1 - accuracy) / w_0 if w_0 > 0 else np.full_like(accuracy, np.nan)
+
+    p = np.clip(score, epsilon, 1 - epsilon)  # Защита от log(0)
+    log_loss = -np.average(y * np.log(p) + (1 - y) * np.log(1 - p), weights=weights)
+
+    return {
+        "thresholds": thresholds,
+        "confusion_matrix": counts.reshape(-1, 2, 2),  # [[tn, fp], [fn, tp]] для каждого порога
+        "accuracy": accuracy,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "rp2": rp2,
+        "log_loss": float(log_loss),
+    }
+
+
 def get_tp_tn_fp_fn(y_true, y_pred):
     """
     Вычисляет количество истинно положительных (TP), истинно отрицательных (TN),
@@ -277,17 +460,8 @@ def get_tp_tn_fp_fn(y_true, y_pred):
     :param y_pred: Предсказания модели
     :return: tp, tn, fp, fn
     """
-    tp = tn = fp = fn = 0
-    for true, pred in zip(y_true, y_pred):
-        if true == 1 and pred == 1:
-            tp += 1
-        elif true == 0 and pred == 0:
-            tn += 1
-        elif true == 0 and pred == 1:
-            fp += 1
-        elif true == 1 and pred == 0:
-            fn += 1
-    return tp, tn, fp, fn
+    tn, fp, fn, tp = confusion_counts(y_true, y_pred)
+    return int(tp), int(tn), int(fp), int(fn)
 
 
 def get_confusion_matrix(y_true, y_pred):
@@ -297,10 +471,7 @@ def get_confusion_matrix(y_true, y_pred):
     :param y_pred: Предсказания модели
     :return: Матрица ошибок
     """
-    tp, tn, fp, fn = get_tp_tn_fp_fn(y_true, y_pred)
-    confusion_matrix = np.array([[tn, fp],
-                                 [fn, tp]])
-    return confusion_matrix
+    return confusion_counts(y_true, y_pred).astype(np.int64).reshape(2, 2)
 
 
 def get_other_metrics(y_true, y_pred):
@@ -310,7 +481,7 @@ def get_other_metrics(y_true, y_pred):
     :param y_pred: Предсказания модели
     :return: accuracy, precision, recall
     """
-    tp, tn, fp, fn = get_tp_tn_fp_fn(y_true, y_pred)
+    tn, fp, fn, tp = confusion_counts(y_true, y_pred)
 
     accuracy = (tp + tn) / (tp + tn + fp + fn)
     precision = tp / (tp + fp)
@@ -0,0 +1,94 @@
+import numpy as np
+from scipy.stats import chi2
+
+from app.ml_model.infrastructure.binary_model import BinaryModel, LogitModel, ProbitModel
+
+
+class WarmStartObjective(BinaryModel):
+    """
+    Минус log L новых данных плюс штраф ½(β − β₀)ᵀ Σ₀⁻¹ (β − β₀): квадратичная (лапласовская)
+    аппроксимация правдоподобия уже учтённой выборки по сохранённым коэффициентам β₀ и ковариации Σ₀.
+    Минимум совпадает с переобучением на всей выборке с точностью до этой аппроксимации.
+    """
+
+    def __init__(self, base: BinaryModel, prior_mean: np.ndarray, prior_cov: np.ndarray):
+        super().__init__()
+        self.base = base
+        self.prior_mean = np.asarray(prior_mean, dtype=np.float64)
+        self.precision = np.linalg.pinv(np.asarray(prior_cov, dtype=np.float64))
+
+    def penalty(self, weights) -> float:
+        delta = weights - self.prior_mean
+        return float(0.5 * delta @ self.precision @ delta)
+
+    def _negative_log_likelihood(self, weights, x, y) -> float:
+        return self.base._negative_log_likelihood(weights, x, y) + self.penalty(weights)
+
+    def _gradient(self, weights, x, y) -> np.ndarray:
+        return self.base._gradient(weights, x, y) + self.precision @ (weights - self.prior_mean)
+
+    def _hessian(self, weights, x, y) -> np.ndarray:
+        return self.base._hessian(weights, x, y) + self.precision
+
+
+def warm_start_update(
+        link: str,
+        prior_mean: np.ndarray,
+        prior_cov: np.ndarray,
+        X: np.ndarray,
+        y: np.ndarray,
+        max_iter: int = 20,
+        tol: float = 1e-8,
+) -> dict:
+    """
+    Дообучение на новых строках X (с константой в порядке параметров) методом Ньютона из β₀.
+    Возвращает коэффициенты, ковариацию (обратный гессиан), минимум целевой функции,
+    log L новых данных в новой точке и диагностику сходимости.
+    """
+    base = LogitModel() if link == "logit" else ProbitModel()
+    objective = WarmStartObjective(base, prior_mean, prior_cov)
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    weights, info = objective._fit_newton(X, y, objective.prior_mean.copy(), max_iter=max_iter, tol=tol)
+    return {
+        "params": weights,
+        "cov": np.linalg.pinv(objective._hessian(weights, X, y)),
+        "objective": objective._negative_log_likelihood(weights, X, y),
+        "llf_delta": -base._negative_log_likelihood(weights, X, y),
+        "info": info,
+    }
+
+
+def null_log_likelihood(y: np.ndarray) -> float:
+    """log L модели только с константой: P(y=1) = доля единиц."""
+    positives = float(np.sum(y))
+    share = positives / len(y)
+    if share in (0.0, 1.0):
+        return 0.0
+    return float(positives * np.log(share) + (len(y) - positives) * np.log(1 - share))
+
+
+def combine_statistics(statistics: dict, objective: float, y_delta: np.ndarray, n_params: int) -> dict:
+    """
+    Итоговые статистики после дообучения. llf — сохранённый log L минус минимум штрафованной функции
+    (та же квадратичная аппроксимация); llnull — сумма по старой и новой выборкам (приближённо).
+    """
+    if "llf" not in statistics or "nobs" not in statistics:
+        raise ValueError("У модели нет сохранённых статистик правдоподобия")
+    llf = statistics["llf"] - objective
+    llnull = statistics.get("llnull", 0.0) + null_log_likelihood(y_delta)
+    nobs = statistics["nobs"] + len(y_delta)
+    llr = 2 * (llf - llnull)
+    return {
+        "llf": llf,
+        "llnull": llnull,
+        "llr": llr,
+        "llr_pvalue": float(chi2.sf(llr, n_params - 1)),
+        "prsquared": 1 - llf / llnull if llnull else float("nan"),
+        "aic": -2 * llf + 2 * n_params,
+        "bic": -2 * llf + np.log(nobs) * n_params,
+        "nobs": float(nobs),
+        "df_model": float(n_params - 1),
+        "df_resid": float(nobs - n_params),
+    }
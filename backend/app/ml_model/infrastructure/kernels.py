@@ -0,0 +1,112 @@
+import numpy as np
+from scipy.special import expit, log_ndtr, ndtr
+
+LINKS = ("logit", "probit")
+DTYPES = ("float64", "float32")
+
+_LOG_SQRT_2PI = 0.5 * np.log(2 * np.pi)
+
+# Ядра функций связи без обёрток scipy.stats: ufunc-и scipy.special и numpy с аргументом out.
+# out=None — результат в новом массиве; out=z — z перезаписывается (буфер не выделяется).
+# Без временных массивов работают link_cdf, link_pdf и link_log_likelihood;
+# link_pdf_derivative и inverse_mills держат один вспомогательный массив размера z.
+# Тип результата — тип z: float32 считается в float32, целые приводятся к float64.
+
+
+def check_link(link: str) -> str:
+    link = link.lower()
+    if link not in LINKS:
+        raise ValueError("Недопустимый тип модели. Используйте 'logit' или 'probit'")
+    return link
+
+
+def check_dtype(dtype: str) -> np.dtype:
+    if dtype not in DTYPES:
+        raise ValueError(f"Тип вычислений должен быть одним из: {', '.join(DTYPES)}")
+    return np.dtype(dtype)
+
+
+def _as_float(z) -> np.ndarray:
+    z = np.asarray(z)
+    return z if z.dtype in (np.float32, np.float64) else z.astype(np.float64)
+
+
+def _buffer(z: np.ndarray, out: np.ndarray | None) -> np.ndarray:
+    return np.empty_like(z) if out is None else out
+
+
+def _signed(z: np.ndarray, y, out: np.ndarray | None) -> np.ndarray:
+    """q·z, q = 2y - 1: знак z меняется там, где y = 0 (без массива q)."""
+    out = _buffer(z, out)
+    if out is not z:
+        np.copyto(out, z)
+    np.negative(out, out=out, where=np.asarray(y) == 0)
+    return out
+
+
+def link_cdf(link: str, z, out: np.ndarray | None = None) -> np.ndarray:
+    """P(y=1) = F(z): сигмоида для логита (expit не переполняется в хвостах), Φ(z) через ndtr для пробита."""
+    z = _as_float(z)
+    if link == "probit":
+        return ndtr(z, out=out)
+    return expit(z, out=out)
+
+
+def link_pdf(link: str, z, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Плотность dF/dz целиком в out. Логит: p(1 - p) = 1 / (4·ch²(z/2)) — без вычитания близких чисел
+    в хвостах; ch² переполняется в inf там, где плотность и так ниже наименьшего нормального числа.
+    Пробит: φ(z) = exp(-z²/2 - log√(2π)).
+    """
+    z = _as_float(z)
+    out = _buffer(z, out)
+    if link == "probit":
+        np.square(z, out=out)
+        out *= -0.5
+        out -= _LOG_SQRT_2PI
+        return np.exp(out, out=out)
+    np.multiply(z, 0.5, out=out)
+    with np.errstate(over="ignore"):
+        np.cosh(out, out=out)
+        np.square(out, out=out)
+    np.reciprocal(out, out=out)
+    out *= 0.25
+    return out
+
+
+def link_pdf_derivative(link: str, z, out: np.ndarray | None = None) -> np.ndarray:
+    """Вторая производная F: -g·tanh(z/2) для логита (то же, что g(1 - 2p)), -zφ(z) для пробита."""
+    z = _as_float(z)
+    # Множитель считается до записи в out: out может совпадать с z
+    factor = np.tanh(z / 2) if link == "logit" else np.array(z, copy=True)
+    out = link_pdf(link, z, out)
+    out *= factor
+    return np.negative(out, out=out)
+
+
+def link_log_likelihood(link: str, z, y, out: np.ndarray | None = None) -> float:
+    """
+    log L = Σ y·z - log(1 + e^z) для логита, Σ log Φ(q·z) через log_ndtr для пробита.
+    out — рабочий буфер размера z (можно передать сам z).
+    """
+    z = _as_float(z)
+    if link == "probit":
+        out = _signed(z, y, out)
+        return float(np.sum(log_ndtr(out, out=out)))
+    yz = float(np.dot(y, z))
+    out = _buffer(z, out)
+    return yz - float(np.sum(np.logaddexp(0, z, out=out)))
+
+
+def inverse_mills(z, y, out: np.ndarray | None = None) -> np.ndarray:
+    """λ = q·φ(qz) / Φ(qz), q = 2y - 1, в логарифмах: не делит ноль на ноль в хвостах пробита."""
+    z = _as_float(z)
+    out = _signed(z, y, out)
+    log_cdf = log_ndtr(out)
+    np.square(out, out=out)
+    out *= -0.5
+    out -= _LOG_SQRT_2PI
+    out -= log_cdf
+    np.exp(out, out=out)
+    np.negative(out, out=out, where=np.asarray(y) == 0)
+    return out
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.base import BaseDAO
 from app.ml_model.infrastructure.models.ml_model import MLModel
+from app.ml_model.infrastructure.models.ml_model_version import MLModelVersion
 
 
 class MLModelDAO(BaseDAO[MLModel]):
@@ -19,7 +20,11 @@ class MLModelDAO(BaseDAO[MLModel]):
         result = await session.execute(select(MLModel).filter_by(name=model_name, direction_id=model_direction))
         model = result.scalar_one_or_none()
 
+        legacy_features = None
         if model:
+            # Модель сохранена до появления версий: хранилище переносит её файлы в версию 1
+            if model.active_version is None:
+                legacy_features = model.features
             # Если модель уже существует, обновляем ее
             model.features = model_data.get("features", model.features)
             # Можно обновить другие поля модели, если нужно
@@ -27,9 +32,44 @@ class MLModelDAO(BaseDAO[MLModel]):
             # Если модели нет, создаем новую запись
             model = MLModel(**model_data)
             session.add(model)
+
+        # Новая опубликованная версия файлов становится активной и попадает в историю версий
+        version = model_data.get("active_version")
+        if version is not None:
+            await session.flush()
+            model.active_version = version
+            await cls._add_version(session, model.id, version, model.features)
+            if legacy_features is not None and version > 1:
+                await cls._add_version(session, model.id, 1, legacy_features)
         await session.commit()
         return model
 
+    @classmethod
+    async def _add_version(cls, session: AsyncSession, model_id: int, version: int, features: list[str]) -> None:
+        existing = await session.execute(select(MLModelVersion).filter_by(model_id=model_id, version=version))
+        if existing.scalar_one_or_none() is None:
+            session.add(MLModelVersion(model_id=model_id, version=version, features=features))
+
+    @classmethod
+    async def get_versions(cls, session: AsyncSession, model_id: int) -> list[MLModelVersion]:
+        result = await session.execute(
+            select(MLModelVersion).filter_by(model_id=model_id).order_by(MLModelVersion.version.desc())
+        )
+        return list(result.scalars().all())
+
+    @classmethod
+    async def set_active_version(cls, session: AsyncSession, model_id: int, version: int) -> MLModel | None:
+        """Переключает активную версию, признаки модели — признаки этой версии; None — модель или версия не найдена"""
+        model = await session.get(MLModel, model_id)
+        result = await session.execute(select(MLModelVersion).filter_by(model_id=model_id, version=version))
+        model_version = result.scalar_one_or_none()
+        if model is None or model_version is None:
+            return None
+        model.active_version = version
+        model.features = model_version.features
+        await session.flush()
+        return model
+
 
     @classmethod
     async def add_model(cls, session: AsyncSession, name: str, features: dict):
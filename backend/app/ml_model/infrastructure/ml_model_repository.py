@@ -1,10 +1,14 @@
 import numpy as np
 import pandas as pd
-from scipy.stats import norm, chi2
+from scipy.stats import chi2
 from sklearn.metrics import accuracy_score, classification_report, roc_auc_score, log_loss
 import statsmodels.api as sm
 
 from app.ml_model.domain.interfaces.ml_model_repository import IMLModelRepository
+from app.ml_model.infrastructure.artifact import ModelArtifact, summarize_features
+from app.ml_model.infrastructure.incremental import combine_statistics, warm_start_update
+from app.ml_model.infrastructure.kernels import link_pdf, link_pdf_derivative
+from app.ml_model.infrastructure.scorer import CompiledScorer
 from app.ml_model.services.storage_manager import ModelStorageManager
 
 
@@ -19,6 +23,11 @@ class MLModelRepository(IMLModelRepository):
         self.X_train = None
         self.metrics = None
         self.feature_columns = None
+        self.scorer = None
+        self.train_summary = None
+        self.target = None
+        self.lineage = None
+        self.version = None
 
         if self.model_type not in ['logit', 'probit']:
             raise ValueError("Недопустимый тип модели. Используйте 'logit' или 'probit'")
@@ -33,6 +42,9 @@ class MLModelRepository(IMLModelRepository):
             self.model = sm.Probit(y_train, self.X_train)
 
         self.result = self.model.fit(method="bfgs", disp=False)
+        self.scorer = CompiledScorer.from_result(self.result, self.model_type)
+        # Статистики признаков считаются один раз и сохраняются вместе с моделью
+        self.train_summary = summarize_features(self.X_train)
         return self.result
 
     def predict(self, X_test):
@@ -120,27 +132,43 @@ class MLModelRepository(IMLModelRepository):
         if self.add_constant and 'const' not in X_proc.columns:
             X_proc = sm.add_constant(X_proc, has_constant='add')
 
-        lin_pred = np.dot(X_proc, self.result.params)
-
-        if self.model_type == "logit":
-            probs = 1 / (1 + np.exp(-lin_pred))
-            grad = probs * (1 - probs)
-        elif self.model_type == "probit":
-            probs = norm.cdf(lin_pred)
-            grad = norm.pdf(lin_pred)
-        else:
+        if self.model_type not in ("logit", "probit"):
             raise ValueError("Неподдерживаемый тип модели")
+        lin_pred = np.dot(X_proc.to_numpy(dtype=np.float64), np.asarray(self.result.params, dtype=np.float64))
+        grad = link_pdf(self.model_type, lin_pred, out=lin_pred)
 
         effects = {}
         for col in X_proc.columns:
             if col in self.result.params:
                 effects[col] = grad * self.result.params[col]
-                print(f"Debug: col: {col}, effects: {effects}, result: {self.result.params[col]}")
             else:
                 effects[col] = np.zeros(len(X_proc))
 
         return pd.DataFrame(effects)
 
+    def get_baseline(self, fix_method: str = "median", custom: dict[str, float] | None = None) -> np.ndarray:
+        """
+        Опорная точка в порядке параметров: среднее или медиана каждого признака, константа = 1.
+        Для fix_method="custom" значения из custom заменяют медианы.
+        """
+        if not self.train_summary:
+            raise ValueError("Для модели нет сводки по обучающим данным")
+        names = self.result.params.index
+        custom = custom or {}
+        unknown = set(custom) - set(names)
+        if unknown:
+            raise ValueError(f"Признаки {', '.join(sorted(unknown))} отсутствуют в модели")
+
+        stat = "mean" if fix_method == "mean" else "median"
+        baseline = np.array([
+            1.0 if name == "const" else self.train_summary[name][stat]
+            for name in names
+        ], dtype=np.float64)
+        if fix_method == "custom":
+            for name, value in custom.items():
+                baseline[names.get_loc(name)] = value
+        return baseline
+
     def get_margin_effect(
             self,
             target_name: str,
@@ -158,58 +186,150 @@ class MLModelRepository(IMLModelRepository):
         if target_name not in params.index:
             raise ValueError(f"Признак {target_name} отсутствует в модели")
 
-        # 1) Средние (или медианные) значения всех признаков, кроме целевого
-        feats = [f for f in params.index if f not in ("const", target_name)]
-        df = self.X_train.copy()
-        if fix_method == "mean":
-            fixed = df[feats].mean().to_dict()
-        else:
-            fixed = df[feats].median().to_dict()
-
-        # 2) Собираем X_custom по одной колонке
-        rows = []
-        for x in x_values:
-            row = {**fixed, target_name: x}
-            rows.append(row)
-        X_custom = pd.DataFrame(rows)
-
-        # 3) Добавляем константу, если нужно
-        if self.add_constant:
-            X_custom = sm.add_constant(X_custom, has_constant="add")
+        beta = params.to_numpy(dtype=np.float64)
+        k = params.index.get_loc(target_name)
+        baseline = self.get_baseline(fix_method)
+
+        # Линейный предиктор на сетке: вклад зафиксированных признаков + β_k·x
+        x = np.asarray(x_values, dtype=np.float64)
+        lin = (baseline @ beta - baseline[k] * beta[k]) + x * beta[k]
 
-        # 4) Вычисляем линейный предикт и градиент
-        lin = np.dot(X_custom, params)
-        if self.model_type == "logit":
-            p = 1 / (1 + np.exp(-lin))
-            grad = p * (1 - p)
-        else:  # probit
-            p = norm.cdf(lin)
-            grad = norm.pdf(lin)
+        # Маржинальный эффект только для target_name
+        me = link_pdf(self.model_type, lin, out=lin)
+        me *= beta[k]
 
-        # 5) Маржинальный эффект только для target_name
-        beta_k = params[target_name]
-        me = (grad * beta_k).tolist()
+        return {"effects": me.tolist()}
 
-        return {"effects": me}
+    def get_margin_effects(
+            self,
+            specs: list[tuple[str, list[float]]],
+            fix_method: str = "median",
+            baseline: dict[str, float] | None = None,
+            with_se: bool = False,
+    ) -> list[dict]:
+        """
+        Предельные эффекты для нескольких признаков за один проход.
+        specs — пары (признак, сетка x). Все точки всех сеток собираются в одну матрицу;
+        при with_se добавляются стандартные ошибки дельта-методом по ковариации параметров.
+        """
+        if not self.result:
+            raise ValueError("Модель не обучена. Сначала вызовите fit()")
+        if not specs:
+            return []
 
-    def save_model(self, model_name: str, direction_id: int):
-        """Сохраняет модель, метрики и препроцессор через ModelStorageManager"""
+        params = self.result.params
+        for target_name, _ in specs:
+            if target_name not in params.index:
+                raise ValueError(f"Признак {target_name} отсутствует в модели")
+
+        beta = params.to_numpy(dtype=np.float64)
+        point = self.get_baseline(fix_method, baseline)
+        sizes = [len(x_values) for _, x_values in specs]
+        k = np.repeat([params.index.get_loc(name) for name, _ in specs], sizes)
+        rows = np.arange(k.size)
+
+        # Матрица плана: опорная точка, в которой целевой признак заменён значением сетки
+        X = np.tile(point, (k.size, 1))
+        X[rows, k] = np.concatenate([np.asarray(x, dtype=np.float64) for _, x in specs])
+
+        lin = X @ beta
+        g = link_pdf(self.model_type, lin)
+        effects = g * beta[k]
+
+        se = None
+        if with_se:
+            # ∂(g(xβ)·β_k)/∂β = g'(xβ)·β_k·x + g(xβ)·e_k
+            grad = (link_pdf_derivative(self.model_type, lin) * beta[k])[:, np.newaxis] * X
+            grad[rows, k] += g
+            cov = np.asarray(self.result.cov_params(), dtype=np.float64)
+            se = np.sqrt(np.einsum("ij,jk,ik->i", grad, cov, grad))
+
+        results = []
+        offsets = np.cumsum([0] + sizes)
+        for (target_name, x_values), start, end in zip(specs, offsets[:-1], offsets[1:]):
+            item = {"feature": target_name, "x_values": list(x_values), "effects": effects[start:end].tolist()}
+            if se is not None:
+                item["se"] = se[start:end].tolist()
+            results.append(item)
+        return results
+
+    def update_incremental(self, X_new: pd.DataFrame, y_new, max_iter: int = 20) -> dict:
+        """
+        Дообучение на новых студентах без повторного прохода по старым: метод Ньютона стартует
+        с сохранённых коэффициентов, а прежняя выборка учитывается через сохранённую ковариацию
+        (априорное распределение N(β₀, Σ₀)). Обновляет модель, статистики и model_statistics в метриках.
+        Возвращает сводку: число строк, итерации и качество на новых строках до и после.
+        """
+        if not self.result:
+            raise ValueError("Модель не обучена. Сначала вызовите метод fit()")
+        artifact = self.result if isinstance(self.result, ModelArtifact) else ModelArtifact.from_result(
+            self.result, self.model_type, train_summary=self.train_summary
+        )
+        names = artifact.param_names
+        X = sm.add_constant(X_new, has_constant="add")[names].to_numpy(dtype=np.float64) \
+            if self.add_constant else X_new[names].to_numpy(dtype=np.float64)
+        y = np.asarray(y_new, dtype=np.float64)
+
+        before = artifact.predict(X)
+        update = warm_start_update(
+            self.model_type, artifact.params.to_numpy(), artifact.cov_params().to_numpy(), X, y, max_iter=max_iter
+        )
+        self.result = ModelArtifact(
+            params=update["params"],
+            cov=update["cov"],
+            param_names=names,
+            link=self.model_type,
+            statistics=combine_statistics(artifact.statistics, update["objective"], y, len(names)),
+            train_summary=self.train_summary,
+        )
+        self.scorer = self.result.scorer
+        after = self.result.predict(X)
+
+        self.metrics = dict(self.metrics or {})
+        self.metrics["model_statistics"] = pd.DataFrame({
+            "Feature": names,
+            "Coefficient": self.result.params.values.astype(float),
+            "P-value": self.result.pvalues.values.astype(float),
+            "Std Error": self.result.bse.values.astype(float),
+        }).to_dict(orient="records")
+
+        both_classes = np.unique(y).size == 2
+        summary = {
+            "rows": int(len(y)),
+            **update["info"],
+            "log_loss_before": float(log_loss(y, before, labels=[0, 1])),
+            "log_loss_after": float(log_loss(y, after, labels=[0, 1])),
+            "roc_auc_before": float(roc_auc_score(y, before)) if both_classes else None,
+            "roc_auc_after": float(roc_auc_score(y, after)) if both_classes else None,
+        }
+        self.metrics["incremental_updates"] = [*self.metrics.get("incremental_updates", []), summary]
+        return summary
+
+    def save_model(self, model_name: str, direction_id: int, target: str | None = None,
+                   lineage: dict | None = None) -> int:
+        """Сохраняет модель, метрики и препроцессор новой активной версией через ModelStorageManager"""
         if not self.result:
             raise ValueError("Модель не обучена. Сначала вызовите метод fit()")
 
         feature_columns = [
             col for col in self.X_train.columns.tolist()
             if col != "const"
-        ] if self.X_train is not None else []
+        ] if self.X_train is not None else list(self.feature_columns or [])
+        self.target = target or self.target
+        self.lineage = lineage or self.lineage
 
-        self.storage_manager.save(
+        self.version = self.storage_manager.save(
             direction_id=direction_id,
             model_name=model_name,
-            model=self.result,
-            train_data=self.X_train,
+            artifact=self.result if isinstance(self.result, ModelArtifact) else ModelArtifact.from_result(
+                self.result, self.model_type, train_summary=self.train_summary
+            ),
             feature_columns=feature_columns,
             metrics=self.metrics,
+            target=self.target,
+            lineage=self.lineage,
         )
+        return self.version
 
     @classmethod
     def load_model(
@@ -218,24 +338,31 @@ class MLModelRepository(IMLModelRepository):
             storage_manager: ModelStorageManager = None,
             model_type="logit",
             add_constant=True,
+            version: int | None = None,
     ) -> "MLModelRepository":
-        """Загружает модель и восстанавливает состояние репозитория"""
+        """Загружает модель (по умолчанию активную версию) и восстанавливает состояние репозитория"""
         storage_manager = storage_manager or ModelStorageManager()
-        loaded_data = storage_manager.load(model_name)
+        loaded_data = storage_manager.load(model_name, version)
+
+        artifact = loaded_data["model"]
 
         # Создаем экземпляр репозитория
         repo = cls(
-            model_type=model_type,
+            model_type=artifact.link,
             add_constant=add_constant,
             storage_manager=storage_manager,
         )
 
-        # Восстанавливаем состояние
-        repo.result = loaded_data["model"]
-        repo.X_train = pd.DataFrame(columns=loaded_data["feature_columns"])
+        # Восстанавливаем состояние: обучающие данные не загружаются, вместо них — сводка
+        repo.result = artifact
+        repo.scorer = artifact.scorer
+        repo.feature_columns = loaded_data["feature_columns"] or artifact.scorer.feature_columns
+        repo.train_summary = loaded_data["train_summary"]
         repo.metrics = loaded_data["metrics"]
         repo.processor = loaded_data["processor"]
-        repo.X_train = loaded_data["X_train"]
+        repo.target = loaded_data.get("target")
+        repo.lineage = loaded_data.get("lineage")
+        repo.version = loaded_data.get("version")
 
         return repo
 
@@ -2,7 +2,7 @@ from sqlalchemy import Column, Integer, JSON, String, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
-
+from app.ml_model.infrastructure.models.ml_model_version import MLModelVersion
 
 
 class MLModel(Base):
@@ -11,7 +11,10 @@ class MLModel(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False, unique=True)  # название модели
     features = Column(JSON, nullable=False)  # Хранение признаков в JSON
+    active_version = Column(Integer, nullable=True)  # Версия из models/<name>/versions, которую используют прогнозы
 
     prediction = relationship("Prediction", back_populates="ml_models", uselist=False)
     direction_id = Column(Integer, ForeignKey("directions.id", ondelete='SET NULL'), nullable=True)
-    direction = relationship("Direction", back_populates="ml_models")
\ No newline at end of file
+    direction = relationship("Direction", back_populates="ml_models")
+    versions = relationship("MLModelVersion", back_populates="ml_model", cascade="all, delete-orphan",
+                            passive_deletes=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+
+class MLModelVersion(Base):
+    __tablename__ = 'ml_model_version'
+    __table_args__ = (
+        UniqueConstraint("model_id", "version", name="uq_ml_model_version"),
+    )
+
+    model_id = Column(Integer, ForeignKey("ml_model.id", ondelete='CASCADE'), nullable=False, index=True)
+    version = Column(Integer, nullable=False)  # номер каталога models/<name>/versions/<version>
+    features = Column(JSON, nullable=False)  # признаки этой версии: при откате возвращаются в ml_model
+
+    ml_model = relationship("MLModel", back_populates="versions")
@@ -0,0 +1,111 @@
+import numpy as np
+
+from app.ml_model.infrastructure.kernels import check_dtype, check_link, link_cdf
+
+
+class CompiledScorer:
+    """
+    Скомпилированная модель для инференса: вектор коэффициентов, порядок признаков и функция связи.
+    Извлекается из результата statsmodels один раз при сохранении модели и считает
+    вероятности без DataFrame и statsmodels: скалярное произведение + сигмоида / Ф(z).
+    dtype="float32" — матрица плана и вероятности в float32 (вдвое меньше памяти, точность ~1e-6).
+    """
+
+    def __init__(self, coefficients, feature_columns: list[str], link: str = "logit", add_constant: bool = True,
+                 dtype: str = "float64"):
+        self.dtype = check_dtype(dtype)
+        self.coefficients = np.ascontiguousarray(coefficients, dtype=self.dtype)
+        self.feature_columns = list(feature_columns)
+        self.link = check_link(link)
+        self.add_constant = add_constant
+
+        expected = len(self.feature_columns) + int(add_constant)
+        if self.coefficients.shape != (expected,):
+            raise ValueError(f"Ожидалось {expected} коэффициентов, получено {self.coefficients.shape}")
+
+    @classmethod
+    def from_result(cls, result, link: str | None = None) -> "CompiledScorer":
+        """Собирает скорер из LogitResults/ProbitResults. Константа, если есть, ставится первой."""
+        params = result.params
+        if link is None:
+            link = type(result.model).__name__
+        add_constant = "const" in params.index
+        feature_columns = [col for col in params.index if col != "const"]
+        order = (["const"] if add_constant else []) + feature_columns
+        return cls(params[order].to_numpy(dtype=np.float64), feature_columns, link, add_constant)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompiledScorer":
+        return cls(
+            coefficients=data["coefficients"],
+            feature_columns=data["feature_columns"],
+            link=data["link"],
+            add_constant=data.get("add_constant", True),
+        )
+
+    def astype(self, dtype: str) -> "CompiledScorer":
+        """Скорер с тем же вектором коэффициентов в другом типе вычислений."""
+        if np.dtype(dtype) == self.dtype:
+            return self
+        return CompiledScorer(self.coefficients, self.feature_columns, self.link, self.add_constant, dtype)
+
+    def to_dict(self) -> dict:
+        return {
+            "coefficients": self.coefficients.astype(np.float64).tolist(),
+            "feature_columns": self.feature_columns,
+            "link": self.link,
+            "add_constant": self.add_constant,
+        }
+
+    def design_matrix(self, X) -> np.ndarray:
+        """Матрица плана из матрицы признаков (в порядке feature_columns)."""
+        X = np.asarray(X)
+        offset = int(self.add_constant)
+        design = np.empty((X.shape[0], X.shape[1] + offset), dtype=self.dtype)
+        if offset:
+            design[:, 0] = 1.0
+        design[:, offset:] = X
+        return design
+
+    def build_matrix(self, rows: list) -> np.ndarray:
+        """Матрица плана напрямую из объектов студентов (атрибуты с именами признаков)."""
+        offset = int(self.add_constant)
+        design = np.empty((len(rows), len(self.feature_columns) + offset), dtype=self.dtype)
+        if offset:
+            design[:, 0] = 1.0
+        for j, col in enumerate(self.feature_columns, start=offset):
+            design[:, j] = [getattr(row, col) for row in rows]
+        return design
+
+    def predict_proba(self, design: np.ndarray) -> np.ndarray:
+        z = np.dot(np.asarray(design, dtype=self.dtype), self.coefficients)
+        return link_cdf(self.link, z, out=z)
+
+    def predict(self, design: np.ndarray, threshold: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+        y_prob = self.predict_proba(design)
+        y_class = (y_prob >= threshold).astype(int)
+        return y_prob, y_class
+
+
+# Проверка совпадения со statsmodels
+if __name__ == "__main__":
+    import pandas as pd
+    import statsmodels.api as sm
+
+    rng = np.random.default_rng(12)
+    X = pd.DataFrame({
+        "math_score": rng.integers(40, 100, 500),
+        "russian_score": rng.integers(40, 100, 500),
+        "session_1_passed": rng.integers(0, 2, 500),
+    })
+    z = 0.05 * X["math_score"] + 0.03 * X["russian_score"] + 0.8 * X["session_1_passed"] - 6
+    y = (rng.random(500) < 1 / (1 + np.exp(-z))).astype(int)
+    X_const = sm.add_constant(X, has_constant="add")
+
+    for model_cls in (sm.Logit, sm.Probit):
+        result = model_cls(y, X_const).fit(method="bfgs", disp=False)
+        scorer = CompiledScorer.from_dict(CompiledScorer.from_result(result).to_dict())
+        expected = np.asarray(result.predict(X_const))
+        actual = scorer.predict_proba(scorer.design_matrix(X[scorer.feature_columns].to_numpy()))
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=0)
+        print(f"{model_cls.__name__}: OK, max |diff| = {np.abs(actual - expected).max():.3e}")
@@ -0,0 +1,325 @@
+import numpy as np
+from scipy.stats import chi2, norm
+
+from app.ml_model.infrastructure.artifact import SUMMARY_QUANTILES
+from app.ml_model.infrastructure.binary_model import LogitModel, ProbitModel, confusion_counts
+
+# Мультипликативный хеш Кнута: принадлежность к отложенной выборке зависит только от id студента
+HOLDOUT_HASH = np.uint64(2654435761)
+HOLDOUT_MODULUS = np.uint64(2 ** 32)
+
+# Размер случайной подвыборки для медианы и квантилей в сводке признаков
+SUMMARY_SAMPLE_SIZE = 10_000
+# Число интервалов гистограммы вероятностей для ROC AUC
+AUC_BINS = 1000
+
+
+def holdout_mask(ids: np.ndarray, test_size: float) -> np.ndarray:
+    """Детерминированное разбиение по хешу id: одинаковое при каждом проходе и при повторном обучении."""
+    hashed = (np.asarray(ids, dtype=np.uint64) * HOLDOUT_HASH) % HOLDOUT_MODULUS
+    return hashed < np.uint64(test_size * 2 ** 32)
+
+
+def split_chunk(ids: np.ndarray, data: np.ndarray, test_size: float) -> tuple[np.ndarray, ...]:
+    """
+    Фрагмент (признаки..., цель) в матрицы плана с константой первой колонкой, как sm.add_constant:
+    (X_train, y_train, X_test, y_test). Строки с пропусками отбрасываются.
+    """
+    complete = ~np.isnan(data).any(axis=1)
+    ids, data = ids[complete], data[complete]
+    y = data[:, -1]
+    if not np.isin(y, (0.0, 1.0)).all():
+        raise ValueError("Целевая переменная должна принимать значения 0 и 1")
+
+    design = np.empty_like(data)
+    design[:, 0] = 1.0
+    design[:, 1:] = data[:, :-1]
+    test = holdout_mask(ids, test_size)
+    return design[~test], y[~test], design[test], y[test]
+
+
+class FeatureSummaryAccumulator:
+    """
+    Сводка по признакам (как summarize_features) по фрагментам: среднее, разброс, минимум и максимум
+    точно, медиана и квантили — по равномерной случайной подвыборке фиксированного размера.
+    """
+
+    def __init__(self, columns: list[str], sample_size: int = SUMMARY_SAMPLE_SIZE, seed: int = 12):
+        self.columns = list(columns)
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.n = 0
+        self.total = np.zeros(len(columns))
+        self.total_sq = np.zeros(len(columns))
+        self.min = np.full(len(columns), np.inf)
+        self.max = np.full(len(columns), -np.inf)
+        self.sample = np.empty((0, len(columns)))
+        self._keys = np.empty(0)
+
+    def add_chunk(self, X: np.ndarray) -> None:
+        if not len(X):
+            return
+        self.n += len(X)
+        self.total += X.sum(axis=0)
+        self.total_sq += np.square(X).sum(axis=0)
+        np.minimum(self.min, X.min(axis=0), out=self.min)
+        np.maximum(self.max, X.max(axis=0), out=self.max)
+        # Резервуар: оставляем строки с наименьшими случайными ключами
+        keys = np.r_[self._keys, self.rng.random(len(X))]
+        sample = np.vstack([self.sample, X])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            keys, sample = keys[keep], sample[keep]
+        self._keys, self.sample = keys, sample
+
+    def summary(self) -> dict[str, dict]:
+        mean = self.total / max(self.n, 1)
+        ddof = max(self.n - 1, 1)
+        std = np.sqrt(np.maximum(self.total_sq - self.n * mean ** 2, 0) / ddof)
+        quantiles = np.quantile(self.sample, [0.5, *SUMMARY_QUANTILES], axis=0) if len(self.sample) else None
+        return {
+            col: {
+                "mean": float(mean[j]),
+                "median": float(quantiles[0, j]) if quantiles is not None else float("nan"),
+                "std": float(std[j]),
+                "min": float(self.min[j]),
+                "max": float(self.max[j]),
+                "quantiles": {
+                    str(q): float(quantiles[i + 1, j]) if quantiles is not None else float("nan")
+                    for i, q in enumerate(SUMMARY_QUANTILES)
+                },
+            }
+            for j, col in enumerate(self.columns)
+        }
+
+
+class StreamingNewtonTrainer:
+    """
+    Метод Ньютона для логит/пробит-модели по данным, которые читаются фрагментами.
+    За один проход накапливаются точные минус log L, градиент и гессиан в текущей точке —
+    суммы по фрагментам тех же формул, что в LogitModel/ProbitModel. В памяти только фрагмент и матрица k×k.
+    Если шаг не уменьшил функцию, следующий проход считается в точке с вдвое меньшим шагом.
+
+    Использование: start_pass(); add_chunk(X, y) (или add_terms(chunk_terms(X, y))) для каждого фрагмента; finish_pass() — True, когда обучение закончено.
+    """
+
+    def __init__(self, link: str, n_params: int, max_iter: int = 50, tol: float = 1e-8):
+        if link not in ("logit", "probit"):
+            raise ValueError("Недопустимый тип модели. Используйте 'logit' или 'probit'")
+        self.link = link
+        self.model = LogitModel() if link == "logit" else ProbitModel()
+        self.max_iter = max_iter
+        self.tol = tol
+
+        self.weights = np.zeros(n_params)
+        self.passes = 0
+        self.converged = False
+        self.message = "Достигнуто максимальное число итераций"
+        self._best = None  # (weights, objective, gradient, hessian) лучшей точки
+        self._step = None
+        self._step_size = 1.0
+        self.start_pass()
+
+    def start_pass(self) -> None:
+        k = self.weights.size
+        self._objective = 0.0
+        self._gradient = np.zeros(k)
+        self._hessian = np.zeros((k, k))
+        self.nobs = 0
+        self.positives = 0.0
+
+    def chunk_terms(self, X: np.ndarray, y: np.ndarray) -> tuple:
+        """Вклад фрагмента в текущей точке. Не меняет состояние — можно считать в пуле процессов."""
+        return (
+            self.model._negative_log_likelihood(self.weights, X, y),
+            self.model._gradient(self.weights, X, y),
+            self.model._hessian(self.weights, X, y),
+            len(y),
+            float(np.sum(y)),
+        )
+
+    def add_terms(self, terms: tuple) -> None:
+        objective, gradient, hessian, nobs, positives = terms
+        self._objective += objective
+        self._gradient += gradient
+        self._hessian += hessian
+        self.nobs += nobs
+        self.positives += positives
+
+    def add_chunk(self, X: np.ndarray, y: np.ndarray) -> None:
+        self.add_terms(self.chunk_terms(X, y))
+
+    def finish_pass(self) -> bool:
+        if self.nobs == 0:
+            raise ValueError("Нет данных для обучения")
+        self.passes += 1
+        objective = self._objective
+
+        if self._best is None or objective <= self._best[1]:
+            improvement = np.inf if self._best is None else self._best[1] - objective
+            self._best = (self.weights, objective, self._gradient, self._hessian)
+            step = np.linalg.lstsq(self._hessian, self._gradient, rcond=None)[0]
+            if np.max(np.abs(step)) < self.tol or improvement < self.tol * (abs(objective) + self.tol):
+                self.converged = True
+                self.message = "Сходимость достигнута"
+                return True
+            self._step, self._step_size = step, 1.0
+        else:
+            self._step_size /= 2
+            if self._step_size < 1e-10:
+                self.message = "Шаг Ньютона не уменьшает функцию правдоподобия"
+                return True
+
+        if self.passes >= self.max_iter:
+            return True
+        self.weights = self._best[0] - self._step_size * self._step
+        return False
+
+    @property
+    def params(self) -> np.ndarray:
+        return self._best[0]
+
+    @property
+    def cov_params(self) -> np.ndarray:
+        return np.linalg.pinv(self._best[3])
+
+    @property
+    def llf(self) -> float:
+        return -self._best[1]
+
+    @property
+    def llnull(self) -> float:
+        # Модель только с константой: P(y=1) = доля единиц при любой функции связи
+        share = self.positives / self.nobs
+        if share in (0.0, 1.0):
+            return 0.0
+        return float(self.positives * np.log(share) + (self.nobs - self.positives) * np.log(1 - share))
+
+    def statistics(self) -> dict:
+        """Итоговые статистики в том же виде, что ModelArtifact берёт из LogitResults."""
+        df_model = self.weights.size - 1
+        llr = 2 * (self.llf - self.llnull)
+        return {
+            "llf": self.llf,
+            "llnull": self.llnull,
+            "llr": llr,
+            "llr_pvalue": float(chi2.sf(llr, df_model)),
+            "prsquared": 1 - self.llf / self.llnull if self.llnull else float("nan"),
+            "aic": -2 * self.llf + 2 * self.weights.size,
+            "bic": -2 * self.llf + np.log(self.nobs) * self.weights.size,
+            "nobs": float(self.nobs),
+            "df_model": float(df_model),
+            "df_resid": float(self.nobs - self.weights.size),
+        }
+
+    def fit_info(self) -> dict:
+        return {
+            "method": "newton",
+            "converged": self.converged,
+            "iterations": self.passes,
+            "message": self.message,
+            "log_likelihood": self.llf,
+            "gradient_norm": float(np.max(np.abs(self._best[2]))),
+        }
+
+
+class StreamingEvaluator:
+    """
+    Метрики отложенной выборки по фрагментам: матрица ошибок, лог-лосс и ROC AUC
+    по гистограммам вероятностей положительного и отрицательного классов (AUC_BINS интервалов).
+    """
+
+    def __init__(self, threshold: float = 0.5, bins: int = AUC_BINS, epsilon: float = 1e-15):
+        self.threshold = threshold
+        self.bins = bins
+        self.epsilon = epsilon
+        self.counts = np.zeros(4)  # [tn, fp, fn, tp]
+        self.log_loss_sum = 0.0
+        self.hist = np.zeros((2, bins))
+
+    def add_chunk(self, y: np.ndarray, p: np.ndarray) -> None:
+        y = np.asarray(y, dtype=np.int64)
+        self.counts += confusion_counts(y, p >= self.threshold)
+        clipped = np.clip(p, self.epsilon, 1 - self.epsilon)
+        self.log_loss_sum -= float(np.sum(np.where(y == 1, np.log(clipped), np.log1p(-clipped))))
+        index = np.minimum((p * self.bins).astype(np.int64), self.bins - 1)
+        self.hist += np.bincount(y * self.bins + index, minlength=2 * self.bins).reshape(2, self.bins)
+
+    def roc_auc(self) -> float:
+        negatives, positives = self.hist
+        if not positives.sum() or not negatives.sum():
+            return float("nan")
+        # Доля пар (1, 0), где у единицы вероятность выше; пары внутри одного интервала — наполовину
+        positives_below = np.cumsum(positives) - positives
+        pairs = np.sum(negatives * (positives.sum() - positives_below - positives)) + 0.5 * np.sum(negatives * positives)
+        return float(pairs / (positives.sum() * negatives.sum()))
+
+    def metrics(self, trainer: StreamingNewtonTrainer, param_names: list[str]) -> dict:
+        """Метрики в структуре MLModelRepository.evaluate."""
+        tn, fp, fn, tp = self.counts
+        n = self.counts.sum()
+        if not n:
+            raise ValueError("Отложенная выборка пуста")
+        accuracy = (tp + tn) / n
+        p0 = (tp + fn) / n
+        lnL, lnL0 = trainer.llf, trainer.llnull
+        wr0 = min(p0, 1 - p0)
+
+        performance = {
+            "Model Type": trainer.link.upper(),
+            "Accuracy": float(accuracy),
+            "ROC AUC": self.roc_auc(),
+            "Log Loss": self.log_loss_sum / n,
+            "Pseudo R² (McFadden)": trainer.statistics()["prsquared"],
+            "LR0": lnL0,
+            "LRF": lnL,
+            "Likelihood Ratio (LR)": 2 * (lnL - lnL0),
+            "Pseudo R²": 1 - 1 / (1 + 2 * (lnL - lnL0) / n),
+            "Rp² (Prediction Quality)": float(1 - (1 - accuracy) / wr0) if wr0 else float("nan"),
+            "Correct Predictions (%)": float(accuracy * 100),
+            "chi2": float(chi2.ppf(0.95, len(param_names) - 1)),
+        }
+
+        cov = trainer.cov_params
+        bse = np.sqrt(np.diag(cov))
+        pvalues = 2 * norm.sf(np.abs(trainer.params / bse))
+        model_statistics = [
+            {"Feature": name, "Coefficient": float(coef), "P-value": float(pvalue), "Std Error": float(se)}
+            for name, coef, pvalue, se in zip(param_names, trainer.params, pvalues, bse)
+        ]
+
+        return {
+            "performance_metrics": performance,
+            "classification_report": self.classification_report(),
+            "confusion_matrix": {
+                0: {0: int(tn), 1: int(fn)},
+                1: {0: int(fp), 1: int(tp)},
+            },
+            "model_statistics": model_statistics,
+            "fit_info": trainer.fit_info(),
+        }
+
+    def classification_report(self) -> dict:
+        """Тот же словарь, что sklearn classification_report(output_dict=True) для классов 0 и 1."""
+        tn, fp, fn, tp = self.counts
+        n = self.counts.sum()
+        report = {}
+        for label, (correct, predicted, support) in (("0", (tn, tn + fn, tn + fp)), ("1", (tp, tp + fp, tp + fn))):
+            precision = correct / predicted if predicted else 0.0
+            recall = correct / support if support else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            report[label] = {
+                "precision": float(precision),
+                "recall": float(recall),
+                "f1-score": float(f1),
+                "support": float(support),
+            }
+        report["accuracy"] = float((tp + tn) / n)
+        per_class = [report["0"], report["1"]]
+        for name, weights in (("macro avg", (1, 1)), ("weighted avg", (tn + fp, tp + fn))):
+            report[name] = {
+                key: float(np.average([item[key] for item in per_class], weights=weights))
+                for key in ("precision", "recall", "f1-score")
+            }
+            report[name]["support"] = float(n)
+        return report
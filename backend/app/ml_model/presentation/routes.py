@@ -1,27 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import Request
+from starlette.responses import StreamingResponse
 
-from app.api.dependencies.ml import get_student_service
-from app.db.session_maker import TransactionSessionDep
-from app.ml_model.infrastructure.ml_model_repository import MLModelRepository
-from app.ml_model.presentation.schemas import MLModelOut, PredictRequest, ModelTrainRequest, ModelMarginEffect
+from app.api.dependencies.ml import build_ml_model_service, get_student_service
+from app.db.session_maker import TransactionSessionDep, session_manager
+from app.ml_model.domain.entities import BaseMLModel, MLModelVersionInfo, TrainingJob
+from app.ml_model.presentation.schemas import MLModelOut, PredictRequest, ModelTrainRequest, ModelMarginEffect, \
+    BatchMarginEffectRequest, StreamingTrainRequest, SweepRequest
 from app.ml_model.services.ml_model import MLModelService
-from app.ml_model.infrastructure.db_repository import DBRepository
-from app.predict.infrastructure.repository import PredictRepository
+from app.ml_model.services.model_registry import model_registry
+from app.ml_model.services.training_jobs import training_job_manager
 
-from app.student.infrastructure.repository import StudentRepository
 from app.student.services.service import StudentService
 
 router = APIRouter()
 
 
 def get_ml_model_service(session: AsyncSession = TransactionSessionDep):
-    student_repo = StudentRepository(session)
-    db_repo = DBRepository(session)
-    predict_repo = PredictRepository(session)
-    ml_repo = MLModelRepository(model_type="logit")
-    return MLModelService(student_repo, db_repo, predict_repo, ml_repo)
+    return build_ml_model_service(session)
 
 
 @router.get("/id/{model_id}", response_model=MLModelOut)
@@ -62,17 +60,134 @@ async def delete_model(
     return {"status": "deleted"}
 
 
+async def register_trained_model(model: BaseMLModel) -> BaseMLModel:
+    """Запись обученной модели в БД из фоновой задачи — в собственной сессии."""
+    async with session_manager.create_session() as session:
+        async with session_manager.transaction(session):
+            return await build_ml_model_service(session).add_or_update(model)
+
+
 @router.post("/train/")
 async def train_model(
         request: ModelTrainRequest,
         service: MLModelService = Depends(get_ml_model_service),
 ):
-    df = await service.prepare_data(request.direction_id, request.fields, request.target)
-    await service.train_model(df, request.target, request.model_name, request.direction_id, model_type=request.model_type.value)
+    try:
+        df = await service.prepare_data(request.direction_id, request.fields, request.target)
+        job = service.submit_training(
+            df, request.target, request.model_name, request.direction_id,
+            model_type=request.model_type.value,
+            register_model=register_trained_model,
+            cv=request.cv.model_dump() if request.cv else None,
+            lineage=await service.get_training_lineage(request.direction_id),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "status": job.status,
+        "job_id": job.id,
+    }
+
+
+async def train_streaming_in_session(request: StreamingTrainRequest) -> dict:
+    """Потоковое обучение из фоновой задачи: данные читаются и модель регистрируется в собственной сессии."""
+    async with session_manager.create_session() as session:
+        async with session_manager.transaction(session):
+            return await build_ml_model_service(session).train_streaming(
+                request.direction_id, request.fields, request.target, request.model_name,
+                request.model_type.value, request.test_size, request.chunk_size, request.max_iter,
+            )
+
+
+@router.post("/train/streaming")
+async def train_model_streaming(request: StreamingTrainRequest):
+    """
+    Обучение на выборке любого размера: студенты читаются фрагментами по chunk_size строк,
+    итерации Ньютона накапливают точные градиент и гессиан по фрагментам. Выполняется фоновой задачей.
+    """
+    try:
+        MLModelService.check_training_fields(request.fields, request.target)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job = training_job_manager.submit(
+        lambda job: train_streaming_in_session(request),
+        kind="train_streaming",
+        model_name=request.model_name,
+        direction_id=request.direction_id,
+    )
+    return {
+        "status": job.status,
+        "job_id": job.id,
+    }
+
+
+@router.post("/sweep")
+async def sweep_models(
+        request: SweepRequest,
+        service: MLModelService = Depends(get_ml_model_service),
+):
+    """Перебор наборов признаков и функций связи фоновой задачей; результат задачи — рейтинг моделей."""
+    try:
+        candidates = service.build_sweep_candidates(
+            request.feature_sets, request.candidate_features, request.max_subset_size,
+            [model_type.value for model_type in request.model_types],
+        )
+        fields = list(dict.fromkeys(feature for features, _ in candidates for feature in features))
+        if request.target in fields:
+            raise ValueError("Целевая переменная не может быть признаком")
+        df = await service.prepare_data(request.direction_id, fields, request.target)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job = service.submit_sweep(
+        df, request.target, request.direction_id, candidates,
+        register_model=register_trained_model,
+        rank_by=request.rank_by,
+        top_n=request.top_n,
+        name_prefix=request.name_prefix,
+        lineage=await service.get_training_lineage(request.direction_id),
+    )
     return {
-        "status": "trained",
+        "status": job.status,
+        "job_id": job.id,
+        "candidates": len(candidates),
     }
 
+
+@router.post("/retrain/{model_id}")
+async def retrain_model_incremental(
+        model_id: int,
+        max_iter: int = Query(20, ge=1, le=100),
+        service: MLModelService = Depends(get_ml_model_service),
+):
+    """Дообучение модели на студентах, добавленных после её последнего обучения (старт с сохранённых коэффициентов)."""
+    try:
+        return await service.retrain_incremental(model_id, max_iter)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/jobs", response_model=list[TrainingJob])
+async def list_jobs():
+    return training_job_manager.list_jobs()
+
+
+@router.get("/jobs/{job_id}", response_model=TrainingJob)
+async def get_job(job_id: str):
+    job = training_job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if not training_job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not training_job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Задача уже завершена")
+    return {"status": "cancelling"}
+
+
 @router.post("/predict/by_ids")
 async def predict_by_ids(
         request: PredictRequest,
@@ -91,23 +206,55 @@ async def predict_by_ids(
     return predictions
 
 
+@router.post("/predict/direction/{direction_id}")
+async def predict_by_direction(
+        direction_id: int,
+        model_id: int,
+        only_new: bool = False,
+        page_size: int = Query(1000, ge=1, le=10000),
+        service: MLModelService = Depends(get_ml_model_service),
+):
+    """
+    Прогноз для всего направления. Ответ — NDJSON: по строке прогресса на каждую страницу
+    и итоговая строка со status=done. Каждая страница коммитится отдельно.
+    """
+    if not await service.get_model_by_id(model_id):
+        raise HTTPException(status_code=404, detail="Model not found")
+
+    async def progress():
+        # Сессия зависимости закрывается до отправки тела ответа, поэтому открываем свою
+        async with session_manager.create_session() as session:
+            stream_service = build_ml_model_service(session)
+            last = {"scored": 0, "skipped": 0, "new": 0, "updated": 0}
+            try:
+                async for step in stream_service.predict_for_direction(
+                        model_id, direction_id, only_new=only_new, page_size=page_size
+                ):
+                    await session.commit()
+                    last = step
+                    yield json.dumps(step) + "\n"
+            except Exception as e:
+                await session.rollback()
+                yield json.dumps({"status": "error", "detail": str(e), **last}) + "\n"
+                return
+        yield json.dumps({"status": "done", **last}) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
 @router.get("/load")
 async def load_model(
         model_id: int,
-        request: Request,
         service: MLModelService = Depends(get_ml_model_service),
 ):
     try:
         model_data = await service.get_model_by_id(model_id)
-        loaded_model = await service.load(model_data.name)
-        if not hasattr(request.app.state, "models"):
-            request.app.state.models = {}
-
-        request.app.state.models[model_data.id] = loaded_model
+        loaded_model = await service.load(model_data)
 
         return {
             "status": "loaded",
-            "feature_columns": loaded_model.X_train.columns.tolist(),
+            "version": loaded_model.version,
+            "feature_columns": loaded_model.result.param_names,
             "metrics": loaded_model.metrics,
         }
     except FileNotFoundError as e:
@@ -115,6 +262,11 @@ async def load_model(
     except Exception as e:
         raise HTTPException(status_code=500, detail="Ошибка при загрузке модели")
 
+
+@router.get("/registry/stats")
+async def get_registry_stats():
+    return model_registry.stats()
+
 @router.get("/{model_id}/metrics")
 async def get_model_metrics(
     model_id: int,
@@ -122,10 +274,10 @@ async def get_model_metrics(
 ):
     try:
         model_data = await service.get_model_by_id(model_id)
-        model = await service.load(model_data.name)
+        model = await service.load(model_data)
         return {
             "metrics": model.metrics,
-            "feature_columns": model.X_train.columns.tolist(),
+            "feature_columns": model.result.param_names,
             "direction_id": model_data.direction_id,
         }
     except FileNotFoundError:
@@ -134,6 +286,30 @@ async def get_model_metrics(
         raise HTTPException(status_code=500, detail=f"Ошибка при получении метрик: {str(e)}")
 
 
+@router.get("/{model_id}/versions", response_model=list[MLModelVersionInfo])
+async def list_model_versions(
+        model_id: int,
+        service: MLModelService = Depends(get_ml_model_service),
+):
+    try:
+        return await service.list_versions(model_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/{model_id}/versions/{version}/activate", response_model=MLModelOut)
+async def activate_model_version(
+        model_id: int,
+        version: int,
+        service: MLModelService = Depends(get_ml_model_service),
+):
+    """Откат к сохранённой версии модели; прогнозы переходят на неё без перезапуска."""
+    try:
+        return await service.activate_version(model_id, version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/margin_effect")
 async def get_margin_effect(
         request: ModelMarginEffect,
@@ -143,4 +319,25 @@ async def get_margin_effect(
         margin_effects = await service.get_list_of_margin_effect(request.target_name, request.x_values, request.model_id)
         return margin_effects
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ошибка при получении предельных эффектов: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Ошибка при получении предельных эффектов: {str(e)}")
+
+
+@router.post("/margin_effect/batch")
+async def get_margin_effects_batch(
+        request: BatchMarginEffectRequest,
+        service: MLModelService = Depends(get_ml_model_service),
+):
+    try:
+        results = await service.get_margin_effects_batch(
+            specs=[spec.model_dump() for spec in request.specs],
+            fix_method=request.fix_method,
+            baseline=request.baseline,
+            with_se=request.with_se,
+        )
+        return {"results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка при получении предельных эффектов: {str(e)}")
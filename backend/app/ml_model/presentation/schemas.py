@@ -1,7 +1,7 @@
 from enum import Enum
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 
 class MLModelBase(BaseModel):
     name: str
@@ -15,6 +15,7 @@ class MLModelUpdate(MLModelBase):
 
 class MLModelOut(MLModelBase):
     id: int
+    active_version: int | None = None
 
     class Config:
         orm_mode = True
@@ -27,14 +28,58 @@ class ModelType(str, Enum):
     logit = "logit"
     probit = "probit"
 
+class CrossValidationOptions(BaseModel):
+    mode: Literal["stratified", "repeated"] = "stratified"
+    n_splits: int = Field(5, ge=2, le=20)
+    # Только для mode="repeated"
+    n_repeats: int = Field(3, ge=1, le=20)
+
 class ModelTrainRequest(BaseModel):
     direction_id: int
     fields: list[str]
     target: str
     model_name: str
     model_type: ModelType = ModelType.logit
+    # Кросс-валидация перед обучением; итоги — в metrics["cross_validation"]
+    cv: CrossValidationOptions | None = None
+
+class StreamingTrainRequest(BaseModel):
+    # None — студенты всех направлений
+    direction_id: int | None = None
+    fields: list[str] = Field(min_length=1)
+    target: str
+    model_name: str
+    model_type: ModelType = ModelType.logit
+    test_size: float = Field(0.3, gt=0, lt=1)
+    chunk_size: int = Field(10000, ge=100, le=1_000_000)
+    max_iter: int = Field(50, ge=1, le=500)
+
+class SweepRequest(BaseModel):
+    direction_id: int
+    target: str
+    # Явные наборы признаков; если не заданы — все подмножества candidate_features до max_subset_size
+    feature_sets: list[list[str]] | None = None
+    candidate_features: list[str] | None = None
+    max_subset_size: int = Field(2, ge=1, le=10)
+    model_types: list[ModelType] = Field(default=[ModelType.logit, ModelType.probit], min_length=1)
+    rank_by: Literal["aic", "bic", "lr", "auc"] = "aic"
+    # Сколько лучших моделей сохранить (0 — только рейтинг)
+    top_n: int = Field(0, ge=0, le=20)
+    name_prefix: str = ""
 
 class ModelMarginEffect(BaseModel):
     target_name: str
     x_values: list[int]
-    model_id: int
\ No newline at end of file
+    model_id: int
+
+class MarginEffectSpec(BaseModel):
+    model_id: int
+    feature: str
+    x_values: list[float]
+
+class BatchMarginEffectRequest(BaseModel):
+    specs: list[MarginEffectSpec]
+    fix_method: Literal["mean", "median", "custom"] = "median"
+    # Значения признаков для fix_method="custom"; остальные признаки фиксируются на медиане
+    baseline: dict[str, float] | None = None
+    with_se: bool = False
@@ -0,0 +1,22 @@
+from celery import Celery
+
+from app.db.config import settings
+from app.ml_model.services.tasks import TASKS
+
+# Запуск воркера: celery -A app.ml_model.services.celery_app worker --concurrency=<TRAINING_MAX_WORKERS>
+celery_app = Celery(
+    "student_performance",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+)
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    worker_concurrency=settings.TRAINING_MAX_WORKERS,
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+)
+
+for task_name, task_fn in TASKS.items():
+    celery_app.task(name=task_name)(task_fn)
@@ -0,0 +1,158 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import RepeatedStratifiedKFold, StratifiedKFold
+
+from app.ml_model.infrastructure.ml_model_repository import MLModelRepository
+from app.ml_model.services.data_processor import DataProcessor
+
+CV_MODES = ("stratified", "repeated")
+
+# Матрица плана в процессе-воркере: представление numpy над общей памятью, без копии
+_cv_data: dict | None = None
+
+
+class SharedArray:
+    """numpy-массив в именованной общей памяти: создаётся в родителе, в воркерах подключается по имени."""
+
+    def __init__(self, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        self.shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.spec = (self.shm.name, array.shape, array.dtype.str)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf)[...] = array
+
+    @staticmethod
+    def attach(spec: tuple) -> tuple[SharedMemory, np.ndarray]:
+        name, shape, dtype = spec
+        shm = SharedMemory(name=name)
+        return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+    def release(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+def check_cv(y, mode: str, n_splits: int) -> None:
+    if mode not in CV_MODES:
+        raise ValueError(f"Режим кросс-валидации должен быть одним из: {', '.join(CV_MODES)}")
+    counts = np.bincount(np.asarray(y, dtype=np.int64), minlength=2)
+    if counts.min() < n_splits:
+        raise ValueError(f"Для {n_splits} фолдов в каждом классе нужно не меньше {n_splits} студентов")
+
+
+def cv_folds(y: np.ndarray, mode: str, n_splits: int, n_repeats: int = 1) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Индексы (train, test) стратифицированных фолдов; для mode="repeated" — n_repeats перемешиваний."""
+    check_cv(y, mode, n_splits)
+    if mode == "stratified":
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=12)
+    else:
+        splitter = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=12)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+
+def _init_cv_worker(x_spec: tuple, y_spec: tuple, columns: list[str]) -> None:
+    global _cv_data
+    x_shm, X = SharedArray.attach(x_spec)
+    y_shm, y = SharedArray.attach(y_spec)
+    # Ссылки на SharedMemory держим, пока жив воркер: иначе буфер закроется под представлениями
+    _cv_data = {"shm": (x_shm, y_shm), "X": pd.DataFrame(X, columns=columns, copy=False), "y": pd.Series(y)}
+
+
+def evaluate_fold(train_index: np.ndarray, test_index: np.ndarray, model_type: str) -> dict:
+    return _fit_fold(_cv_data["X"], _cv_data["y"], train_index, test_index, model_type)
+
+
+def _fit_fold(X: pd.DataFrame, y: pd.Series, train_index: np.ndarray, test_index: np.ndarray, model_type: str) -> dict:
+    repository = MLModelRepository(model_type=model_type)
+    repository.fit(X.iloc[train_index], y.iloc[train_index])
+    return repository.evaluate(X.iloc[test_index], y.iloc[test_index])
+
+
+def _aggregate(values: list):
+    """Числа — в {"mean", "std"}, словари — поэлементно, прочее (тип модели) — первое значение."""
+    present = [value for value in values if value is not None]
+    if not present:
+        return None
+    if isinstance(present[0], dict):
+        keys = dict.fromkeys(key for value in present for key in value)
+        return {key: _aggregate([value.get(key) for value in present]) for key in keys}
+    if all(isinstance(value, (int, float, np.number)) and not isinstance(value, bool) for value in present):
+        array = np.asarray(present, dtype=np.float64)
+        return {"mean": float(np.nanmean(array)), "std": float(np.nanstd(array))}
+    return present[0]
+
+
+def aggregate_metrics(fold_metrics: list[dict]) -> dict:
+    """
+    Та же структура, что у MLModelRepository.evaluate, где каждая числовая метрика — среднее и
+    стандартное отклонение по фолдам. model_statistics сводится по имени признака.
+    """
+    statistics = [
+        {row["Feature"]: {key: value for key, value in row.items() if key != "Feature"} for row in item["model_statistics"]}
+        for item in fold_metrics
+    ]
+    aggregated = _aggregate([
+        {key: value for key, value in item.items() if key != "model_statistics"}
+        for item in fold_metrics
+    ])
+    aggregated["model_statistics"] = [
+        {"Feature": feature, **values}
+        for feature, values in _aggregate(statistics).items()
+    ]
+    return aggregated
+
+
+def prepare_cv(data: dict[str, list], target_column: str, mode: str, n_splits: int, n_repeats: int) -> tuple:
+    """Та же подготовка признаков, что в fit_and_save_model (X float64, y int64), и индексы фолдов."""
+    X, y, _ = DataProcessor().fit_transform(df=pd.DataFrame(data), target_col=target_column, fio_col="full_name")
+    y = y.to_numpy(dtype=np.int64)
+    return X.to_numpy(dtype=np.float64), y, list(X.columns), cv_folds(y, mode, n_splits, n_repeats)
+
+
+def cross_validate(
+        data: dict[str, list],
+        target_column: str,
+        model_type: str,
+        mode: str = "stratified",
+        n_splits: int = 5,
+        n_repeats: int = 3,
+        max_workers: int = 4,
+) -> dict:
+    """
+    Кросс-валидация с фолдами параллельно в пуле процессов. Матрица плана кладётся в общую память
+    один раз; воркеры подключаются к ней по имени и получают в задаче только индексы фолда.
+    Выполняется внутри задачи обучения (процесс задачи или воркер Celery). Процессу-демону
+    (воркер Celery prefork) дочерние процессы запрещены — там фолды считаются по очереди.
+    """
+    X, y, columns, folds = prepare_cv(data, target_column, mode, n_splits, n_repeats)
+
+    if max_workers <= 1 or multiprocessing.current_process().daemon:
+        X, y = pd.DataFrame(X, columns=columns, copy=False), pd.Series(y)
+        fold_metrics = [_fit_fold(X, y, train_index, test_index, model_type) for train_index, test_index in folds]
+    else:
+        shared_x, shared_y = SharedArray(X), SharedArray(y)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(max_workers, len(folds)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_cv_worker,
+                initargs=(shared_x.spec, shared_y.spec, columns),
+            ) as pool:
+                train_indexes, test_indexes = zip(*folds)
+                fold_metrics = list(pool.map(
+                    evaluate_fold, train_indexes, test_indexes, [model_type] * len(folds)
+                ))
+        finally:
+            shared_x.release()
+            shared_y.release()
+
+    return {
+        "mode": mode,
+        "n_splits": n_splits,
+        "n_repeats": n_repeats if mode == "repeated" else 1,
+        "folds": len(folds),
+        "metrics": aggregate_metrics(fold_metrics),
+    }
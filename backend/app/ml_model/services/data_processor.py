@@ -15,7 +15,9 @@ class DataProcessor:
         X = df.drop(columns=[target_col, fio_col])
         # Обучаем scaler
         self.scaler.fit(X)
-        X = X.applymap(lambda x: int(x) if isinstance(x, bool) else x)
+        # Выборка из prepare_data уже содержит 0/1; приводим только логические колонки, если они есть
+        bool_columns = X.select_dtypes(include="bool").columns
+        X = X.astype({col: int for col in bool_columns})
         X_scaled = X
 
         return pd.DataFrame(X_scaled, columns=X.columns), self.y, self.fio
@@ -1,19 +1,30 @@
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable
+
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 from pydantic import BaseModel
-from sklearn.model_selection import train_test_split
-import statsmodels.api as sm
 from sqlalchemy.dialects.mssql.information_schema import columns
 
-from app.direction.infrastructure.filters.direction import DirectionFilterByDirectionId
-from app.ml_model.domain.entities import BaseMLModel
+from app.db.config import settings
+from app.executor import blocking_executor
+from app.ml_model.domain.entities import BaseMLModel, MLModelVersionInfo, TrainingJob
 from app.ml_model.domain.interfaces.db_repository import IDBRepository
 from app.ml_model.domain.interfaces.ml_model_repository import IMLModelRepository
+from app.ml_model.infrastructure.artifact import ModelArtifact
+from app.ml_model.infrastructure.streaming import FeatureSummaryAccumulator, StreamingEvaluator, \
+    StreamingNewtonTrainer, split_chunk
+from app.ml_model.services.cross_validation import check_cv
+from app.ml_model.services.model_registry import model_registry
 from app.ml_model.services.prediction_data import PredictionDataService
 from app.ml_model.services.storage_manager import ModelStorageManager
+from app.ml_model.services.sweep import MAX_SWEEP_CANDIDATES, feature_subsets
+from app.ml_model.services.training_jobs import training_job_manager
 from app.ml_model.services.data_processor import DataProcessor
 from app.predict.domain.entities import PredictionEntity
 from app.predict.domain.interfaces.repository import IPredictionRepository
+from app.student.domain.entities import BaseStudent
 from app.student.domain.interfaces.repository import IStudentRepository
 
 
@@ -47,43 +58,278 @@ class MLModelService:
     async def delete_model(self, model_id: int) -> None:
         model = await self.get_model_by_id(model_id)
         self.storage.delete(model.name)
+        model_registry.invalidate(model_id)
         return await self.db_repository.delete(model_id)
 
     async def prepare_data(self, direction_id: int, fields: list[str], target: str) -> DataFrame:
-        students = await self.student_repository.list_all(
-            filters=DirectionFilterByDirectionId(direction_id=direction_id))
-        dicts = [s.__dict__ for s in students]
-
-        df = pd.DataFrame(dicts)
-        required = set(fields + [target, "full_name"])
+        columns = list(dict.fromkeys(fields + [target, "full_name"]))
+        missing = set(columns) - set(BaseStudent.model_fields)
+        if missing:
+            raise ValueError(f"Отсутствуют поля: {missing}")
 
-        if not required.issubset(df.columns):
-            raise ValueError(f"Отсутствуют поля: {required - set(df.columns)}")
+        df = await self.prediction_data_service.load_training_frame(direction_id, columns)
+        if df.empty:
+            raise ValueError("В направлении нет студентов для обучения")
 
         return df[fields + [target] + ["full_name"]]
 
-    async def train_model(self, data: pd.DataFrame, target_column: str, model_name: str, direction_id: int,
-                          model_type: str) -> None:
-        self.ml_model_repository.model_type = model_type
-        X_scaled, y, fio = self.processor.fit_transform(
-            df=data,
-            target_col=target_column,
-            fio_col="full_name"
-        ) # перенести в prepare_data
-        feature_columns = list(X_scaled.columns)
-
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_scaled, y, test_size=0.3, random_state=12
-        ) # перенести в prepare_data
-
-        self.model = self.ml_model_repository.fit(X_train=X_train, y_train=y_train)
-        self.ml_model_repository.evaluate(X_test=X_test, y_test=y_test)
-        self.ml_model_repository.save_model(model_name, direction_id)
+    async def get_training_lineage(self, direction_id: int | None) -> dict:
+        """Происхождение выборки для полного обучения: студенты направления на текущий момент."""
+        return lineage_snapshot("full", **await self.prediction_data_service.get_lineage(direction_id))
+
+    def submit_training(
+            self,
+            data: pd.DataFrame,
+            target_column: str,
+            model_name: str,
+            direction_id: int,
+            model_type: str,
+            register_model: Callable[[BaseMLModel], Awaitable[BaseMLModel]],
+            cv: dict | None = None,
+            lineage: dict | None = None,
+    ) -> TrainingJob:
+        """
+        Ставит обучение в очередь фоновых задач. Обучение идёт вне event loop,
+        после него register_model записывает модель в БД (в своей сессии — сессия запроса к тому времени закрыта).
+        При cv сначала выполняется кросс-валидация — той же задачей бэкенда, что и обучение
+        (на воркере Celery при TRAINING_BACKEND=celery); её итоги сохраняются в метриках модели.
+        """
+        if cv is not None:
+            check_cv(data[target_column], cv["mode"], cv["n_splits"])
+        payload = data.to_dict(orient="list")
+
+        async def runner(job: TrainingJob) -> dict:
+            # При cv None аргумент cross_validation у fit_and_save_model тоже None
+            task_name = "fit_and_save_model" if cv is None else "cross_validate_and_fit"
+            result = await training_job_manager.backend.run(
+                job, task_name, payload, target_column, model_name, direction_id, model_type, cv, lineage,
+            )
+            await register_model(
+                BaseMLModel(name=model_name, features=result["feature_columns"], direction_id=direction_id,
+                            active_version=result["version"]))
+            return result
+
+        return training_job_manager.submit(runner, kind="train", model_name=model_name, direction_id=direction_id)
+
+    @staticmethod
+    def build_sweep_candidates(
+            feature_sets: list[list[str]] | None,
+            candidate_features: list[str] | None,
+            max_subset_size: int,
+            model_types: list[str],
+    ) -> list[tuple[list[str], str]]:
+        """Кандидаты перебора: явные наборы признаков или все подмножества до max_subset_size, для каждой связи."""
+        if feature_sets:
+            subsets = [list(dict.fromkeys(features)) for features in feature_sets if features]
+        elif candidate_features:
+            subsets = feature_subsets(list(dict.fromkeys(candidate_features)), max_subset_size)
+        else:
+            raise ValueError("Нужно передать feature_sets или candidate_features")
+        candidates = [(features, link) for link in dict.fromkeys(model_types) for features in subsets]
+        if not candidates:
+            raise ValueError("Нет кандидатов для перебора")
+        if len(candidates) > MAX_SWEEP_CANDIDATES:
+            raise ValueError(f"Слишком много кандидатов: {len(candidates)} (не больше {MAX_SWEEP_CANDIDATES})")
+        return candidates
+
+    def submit_sweep(
+            self,
+            data: pd.DataFrame,
+            target_column: str,
+            direction_id: int,
+            candidates: list[tuple[list[str], str]],
+            register_model: Callable[[BaseMLModel], Awaitable[BaseMLModel]],
+            rank_by: str = "aic",
+            top_n: int = 0,
+            name_prefix: str = "",
+            lineage: dict | None = None,
+    ) -> TrainingJob:
+        """
+        Ставит перебор моделей в очередь фоновых задач. Перебор и сохранение top_n лучших по rank_by
+        выполняются одной задачей бэкенда обучения (sweep_and_save): выборка разбивается так же,
+        как при обычном обучении, и передаётся каждому процессу пула один раз; кандидаты обучаются параллельно.
+        Результат — рейтинг по AIC, BIC, LR и AUC на отложенной выборке; сохранённые модели записываются в БД.
+        """
+        payload = data.to_dict(orient="list")
+
+        async def runner(job: TrainingJob) -> dict:
+            result = await training_job_manager.backend.run(
+                job, "sweep_and_save", payload, target_column, direction_id, candidates, rank_by, top_n,
+                name_prefix, lineage,
+            )
+            for saved in result["saved"]:
+                await register_model(
+                    BaseMLModel(name=saved["model_name"], features=saved["feature_columns"],
+                                direction_id=direction_id, active_version=saved["version"]))
+
+            return {
+                "rank_by": rank_by,
+                "candidates": len(candidates),
+                "leaderboard": result["leaderboard"],
+            }
+
+        return training_job_manager.submit(runner, kind="sweep", direction_id=direction_id)
+
+    @staticmethod
+    def check_training_fields(fields: list[str], target: str) -> None:
+        missing = set(fields + [target]) - set(BaseStudent.model_fields)
+        if missing:
+            raise ValueError(f"Отсутствуют поля: {missing}")
+        if target in fields:
+            raise ValueError("Целевая переменная не может быть признаком")
+
+    async def train_streaming(
+            self,
+            direction_id: int | None,
+            fields: list[str],
+            target: str,
+            model_name: str,
+            model_type: str,
+            test_size: float = 0.3,
+            chunk_size: int = 10000,
+            max_iter: int = 50,
+    ) -> dict:
+        """
+        Обучение без загрузки выборки в память: каждая итерация Ньютона — проход по серверному курсору,
+        в памяти только фрагмент и матрицы k×k. direction_id=None — студенты всех направлений.
+        Отложенная выборка выбирается по хешу id, её метрики считаются последним проходом.
+        Модель сохраняется в том же формате и с той же структурой метрик, что и при обычном обучении.
+        """
+        fields = list(dict.fromkeys(fields))
+        self.check_training_fields(fields, target)
+        columns = fields + [target]
+        param_names = ["const", *fields]
+
+        trainer = StreamingNewtonTrainer(model_type, len(param_names), max_iter=max_iter)
+        summary = FeatureSummaryAccumulator(fields)
+        first_pass = True
+        rows, min_id, max_id = 0, None, None
+        while True:
+            trainer.start_pass()
+            async for ids, data in self.prediction_data_service.iter_training_chunks(direction_id, columns, chunk_size):
+                if first_pass and len(ids):
+                    # Строки идут по возрастанию id
+                    rows, min_id, max_id = rows + len(ids), min_id or int(ids[0]), int(ids[-1])
+                X, y, _, _ = await blocking_executor.run_cpu("streaming_split", split_chunk, ids, data, test_size)
+                if not len(y):
+                    continue
+                trainer.add_terms(await blocking_executor.run_cpu("streaming_train", trainer.chunk_terms, X, y))
+                if first_pass:
+                    await blocking_executor.run_io("streaming_summary", summary.add_chunk, X[:, 1:])
+            if trainer.nobs == 0:
+                raise ValueError("Нет студентов для обучения")
+            first_pass = False
+            if trainer.finish_pass():
+                break
+
+        artifact = ModelArtifact(
+            params=trainer.params,
+            cov=trainer.cov_params,
+            param_names=param_names,
+            link=model_type,
+            statistics=trainer.statistics(),
+            train_summary=summary.summary(),
+        )
+
+        evaluator = StreamingEvaluator()
+        async for ids, data in self.prediction_data_service.iter_training_chunks(direction_id, columns, chunk_size):
+            _, _, X, y = await blocking_executor.run_cpu("streaming_split", split_chunk, ids, data, test_size)
+            if len(y):
+                y_prob = await blocking_executor.run_cpu("streaming_score", artifact.predict, X)
+                await blocking_executor.run_io("streaming_evaluate", evaluator.add_chunk, y, y_prob)
+        metrics = evaluator.metrics(trainer, param_names)
+
+        version = await blocking_executor.run_io(
+            "model_save", self.storage.save, direction_id, model_name, artifact, fields, None, metrics,
+            target, lineage_snapshot("full", rows, min_id, max_id),
+        )
         await self.db_repository.add_or_update(
-            BaseMLModel(name=model_name, features=feature_columns, direction_id=direction_id))
+            BaseMLModel(name=model_name, features=fields, direction_id=direction_id, active_version=version))
+        return {
+            "feature_columns": fields,
+            "metrics": metrics,
+            "version": version,
+        }
+
+    async def retrain_incremental(self, model_id: int, max_iter: int = 20) -> dict:
+        """
+        Дообучение модели на студентах, добавленных после последнего снимка выборки (id > lineage.max_id).
+        Оптимизация стартует с сохранённых коэффициентов, старая выборка не перечитывается;
+        новый снимок добавляется в lineage. Модели без lineage нужно один раз обучить полностью.
+        """
+        model_data = await self.get_model_by_id(model_id)
+        if not model_data:
+            raise ValueError(f"Модель с id='{model_id}' не найдена")
+        # Своя копия, а не экземпляр из реестра: его могут использовать параллельные запросы
+        repo = await blocking_executor.run_io(
+            "model_load", self.ml_model_repository.load_model, model_data.name, version=model_data.active_version
+        )
+        if not repo.lineage or not repo.target:
+            raise ValueError(f"Модель '{model_data.name}' обучена без данных о выборке — нужно полное обучение")
+
+        features = list(repo.feature_columns)
+        columns = ["id", *features, repo.target]
+        df = await self.prediction_data_service.load_training_frame(
+            model_data.direction_id, columns, after_id=repo.lineage["max_id"] or 0
+        )
+        df = df.dropna()
+        if df.empty:
+            return {"model_id": model_id, "status": "up_to_date", "rows": 0}
+
+        ids = df["id"].to_numpy()
+        lineage = lineage_snapshot("incremental", len(df), int(ids.min()), int(ids.max()), repo.lineage)
+        update = await blocking_executor.run_cpu(
+            "incremental_retrain", _update_and_save,
+            repo, df[features], df[repo.target], max_iter, model_data.name, model_data.direction_id, lineage,
+        )
+        await self.db_repository.add_or_update(BaseMLModel(
+            name=model_data.name, features=features, direction_id=model_data.direction_id,
+            active_version=update["version"],
+        ))
+        return {"model_id": model_id, "status": "updated", **update, "lineage": lineage}
+
+    async def load(self, model: BaseMLModel):
+        """
+        Активная версия модели из реестра. Версия берётся из строки ml_model, поэтому после переобучения
+        или отката каждый процесс один раз загружает новую неизменяемую версию и подменяет запись в реестре;
+        до конца загрузки запросы обслуживает прежняя версия.
+        """
+        version = model.active_version
+        if version is None:
+            # Модель сохранена до появления версий в БД: указатель ACTIVE или файлы старого формата
+            version = await blocking_executor.run_io("model_version", self.storage.get_active_version, model.name)
+        loaded = model_registry.get(model.id, version)
+        if loaded is not None:
+            return loaded
+        # Распаковка joblib — блокирующая операция, выполняем вне event loop
+        loaded = await blocking_executor.run_io(
+            "model_load", self.ml_model_repository.load_model, model.name, version=version
+        )
+        loaded.scorer = loaded.scorer.astype(settings.SCORING_DTYPE)
+        model_registry.put(model.id, version, loaded)
+        return loaded
 
-    async def load(self, model_name: str):
-        return self.ml_model_repository.load_model(model_name)
+    async def list_versions(self, model_id: int) -> list[MLModelVersionInfo]:
+        if not await self.get_model_by_id(model_id):
+            raise ValueError(f"Модель с id='{model_id}' не найдена")
+        return await self.db_repository.list_versions(model_id)
+
+    async def activate_version(self, model_id: int, version: int) -> BaseMLModel:
+        """
+        Откат (или возврат) к сохранённой версии: переключаются указатель в БД и файл ACTIVE.
+        Файлы версий неизменяемы, поэтому прогнозы переходят на неё без переобучения.
+        """
+        model_data = await self.get_model_by_id(model_id)
+        if not model_data:
+            raise ValueError(f"Модель с id='{model_id}' не найдена")
+        model = await self.db_repository.set_active_version(model_id, version)
+        if model is None:
+            raise ValueError(f"Версия {version} модели '{model_data.name}' не найдена")
+        try:
+            await blocking_executor.run_io("model_activate", self.storage.set_active_version, model.name, version)
+        except FileNotFoundError as e:
+            raise ValueError(str(e))
+        return model
 
     async def list_all_models(self) -> list[BaseMLModel]:
         return await self.db_repository.list_all()
@@ -98,52 +344,160 @@ class MLModelService:
 
         model_data = await self.get_model_by_id(model_id)
         model_name = model_data.name
-        loaded_repo = await self.load(model_name)
+        loaded_repo = await self.load(model_data)
         if not loaded_repo.result:
             raise ValueError(f"Модель '{model_name}' не загружена")
 
-        feature_columns = loaded_repo.X_train.drop(columns='const').columns.tolist()
-
-        model_entity = await self.get_model_by_name(model_name)
-        if not model_entity:
-            raise ValueError(f"Модель '{model_name}' не найдена в БД")
-
-
-        df = pd.DataFrame([
-            {**{col: getattr(s, col) for col in feature_columns}, "student_id": s.id}
-            for s in students
-        ])
-
-        if df.empty:
-            return []
-
-        X = df[feature_columns]
-        X = X.applymap(lambda x: int(x) if isinstance(x, bool) else x)
-        X = sm.add_constant(X, has_constant='add')
-        y_prob = loaded_repo.result.predict(X)
-        y_class = (y_prob >= 0.5).astype(int)
+        scorer = loaded_repo.scorer
+        y_prob, y_class = scorer.predict(scorer.build_matrix(students))
 
         predictions = [
             PredictionEntity(
-                student_id=int(df.iloc[i]["student_id"]),
+                student_id=student.id,
                 predicted_class=int(y_class[i]),
                 predicted_prob=float(y_prob[i]),
-                model_id=model_entity.id
+                model_id=model_data.id
             )
-            for i in range(len(df))
+            for i, student in enumerate(students)
         ]
 
         await self.predict_repository.add_many_predictions(predictions)
         return predictions
 
+    async def predict_for_direction(
+            self,
+            model_id: int,
+            direction_id: int,
+            only_new: bool = False,
+            page_size: int = 1000,
+    ) -> AsyncIterator[dict]:
+        """
+        Прогноз для всех студентов направления. Студенты читаются страницами,
+        каждая страница считается одним матричным произведением и сразу записывается в БД.
+        После каждой страницы отдаётся словарь с прогрессом.
+        """
+        model_data = await self.get_model_by_id(model_id)
+        if not model_data:
+            raise ValueError(f"Модель с id='{model_id}' не найдена")
+        loaded_repo = await self.load(model_data)
+        if not loaded_repo.result:
+            raise ValueError(f"Модель '{model_data.name}' не загружена")
+
+        scorer = loaded_repo.scorer
+
+        total = await self.prediction_data_service.count_students_for_prediction(direction_id, model_id, only_new)
+        scored = skipped = new = updated = 0
+        pages = self.prediction_data_service.iter_students_for_prediction(
+            direction_id, scorer.feature_columns, model_id, only_new=only_new, page_size=page_size
+        )
+        page_number = 0
+        async for ids, X in pages:
+            page_number += 1
+            complete = ~np.isnan(X).any(axis=1)
+            skipped += int((~complete).sum())
+            ids, X = ids[complete], X[complete]
+
+            y_prob, y_class = scorer.predict(scorer.design_matrix(X))
+
+            predictions = [
+                PredictionEntity(
+                    student_id=int(student_id),
+                    predicted_class=int(cls),
+                    predicted_prob=float(prob),
+                    model_id=model_id,
+                )
+                for student_id, cls, prob in zip(ids, y_class, y_prob)
+            ]
+            page_new, page_updated = await self.predict_repository.upsert_predictions(predictions)
+            scored += len(predictions)
+            new += page_new
+            updated += page_updated
+
+            yield {
+                "page": page_number,
+                "scored": scored,
+                "skipped": skipped,
+                "total": total,
+                "new": new,
+                "updated": updated,
+            }
+
     async def get_list_of_margin_effect(self, target_name: str, x_values: list[int], model_id: int) -> dict:
         model_data = await self.get_model_by_id(model_id)
-        model_name = model_data.name
-        loaded_repo = await self.load(model_name)
+        loaded_repo = await self.load(model_data)
 
-        margin_effects = loaded_repo.get_margin_effect(
+        margin_effects = await blocking_executor.run_cpu(
+            "margin_effect", loaded_repo.get_margin_effect,
             target_name=target_name,
             x_values=x_values
         )
 
         return margin_effects
+
+    async def get_margin_effects_batch(
+            self,
+            specs: list[dict],
+            fix_method: str = "median",
+            baseline: dict[str, float] | None = None,
+            with_se: bool = False,
+    ) -> list[dict]:
+        """
+        Предельные эффекты по списку (model_id, feature, x_values).
+        Каждая модель загружается один раз (из реестра), её спецификации считаются одним проходом.
+        Результаты возвращаются в порядке запроса.
+        """
+        if fix_method == "custom" and not baseline:
+            raise ValueError("Для fix_method='custom' нужно передать baseline")
+
+        groups: dict[int, list[int]] = {}
+        for index, spec in enumerate(specs):
+            groups.setdefault(spec["model_id"], []).append(index)
+
+        tasks = []
+        for model_id, indexes in groups.items():
+            model_data = await self.get_model_by_id(model_id)
+            if not model_data:
+                raise ValueError(f"Модель с id='{model_id}' не найдена")
+            loaded_repo = await self.load(model_data)
+            tasks.append((loaded_repo, [(specs[i]["feature"], specs[i]["x_values"]) for i in indexes]))
+
+        evaluated = await blocking_executor.run_cpu(
+            "margin_effect_batch", _evaluate_margin_effects, tasks, fix_method, baseline, with_se
+        )
+
+        results: list[dict | None] = [None] * len(specs)
+        for (model_id, indexes), model_results in zip(groups.items(), evaluated):
+            for index, item in zip(indexes, model_results):
+                results[index] = {"model_id": model_id, **item}
+        return results
+
+
+def lineage_snapshot(kind: str, rows: int, min_id: int | None, max_id: int | None,
+                     previous: dict | None = None) -> dict:
+    """
+    Происхождение выборки модели: всего строк, диапазон id и история снимков
+    ("full" — полное обучение, "incremental" — дообучение на новых строках).
+    """
+    snapshot = {"kind": kind, "rows": rows, "min_id": min_id, "max_id": max_id, "at": datetime.now().isoformat()}
+    if previous is None:
+        return {"rows": rows, "min_id": min_id, "max_id": max_id, "snapshots": [snapshot]}
+    return {
+        "rows": previous["rows"] + rows,
+        "min_id": min((i for i in (previous["min_id"], min_id) if i is not None), default=None),
+        "max_id": max((i for i in (previous["max_id"], max_id) if i is not None), default=None),
+        "snapshots": [*previous.get("snapshots", []), snapshot],
+    }
+
+
+def _update_and_save(repo, X: pd.DataFrame, y: pd.Series, max_iter: int, model_name: str,
+                     direction_id: int | None, lineage: dict) -> dict:
+    # Обновление и сохранение в одном вызове: в пуле процессов изменения repo в родителя не возвращаются
+    update = repo.update_incremental(X, y, max_iter)
+    return {**update, "version": repo.save_model(model_name, direction_id, repo.target, lineage)}
+
+
+def _evaluate_margin_effects(tasks: list, fix_method: str, baseline: dict | None, with_se: bool) -> list[list[dict]]:
+    return [
+        repo.get_margin_effects(model_specs, fix_method=fix_method, baseline=baseline, with_se=with_se)
+        for repo, model_specs in tasks
+    ]
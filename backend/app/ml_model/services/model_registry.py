@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.db.config import settings
+
+
+class ModelRegistry:
+    """
+    Процессный кэш загруженных моделей с вытеснением давно не использованных (LRU).
+    Запись хранится по id модели вместе с версией файлов: если версия изменилась
+    (модель переобучили), запись считается устаревшей и загружается заново.
+    """
+
+    def __init__(self, max_size: int = 8):
+        if max_size < 1:
+            raise ValueError("Размер реестра моделей должен быть положительным")
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[Any, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model_id: Hashable, version: Any = None) -> Any | None:
+        """Возвращает модель из реестра или None. При version=None версия не проверяется."""
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is None or (version is not None and entry[0] != version):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(model_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, model_id: Hashable, version: Any, model: Any) -> None:
+        with self._lock:
+            self._entries[model_id] = (version, model)
+            self._entries.move_to_end(model_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_id: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(model_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "loaded": list(self._entries.keys()),
+            }
+
+
+model_registry = ModelRegistry(max_size=settings.MODEL_REGISTRY_SIZE)
@@ -1,23 +1,97 @@
+from typing import AsyncIterator
+
+import numpy as np
 import pandas as pd
 
-from app.direction.infrastructure.filters.direction import DirectionFilterByDirectionId
+from app.executor import blocking_executor
+from app.student.domain.entities import BaseStudent
 from app.student.domain.interfaces.repository import IStudentRepository
 
+BOOL_COLUMNS = {name for name, field in BaseStudent.model_fields.items() if field.annotation is bool}
+
+
+def rows_to_frame(rows: list, columns: list[str]) -> pd.DataFrame:
+    """DataFrame по колонкам из строк результата SELECT; логические колонки сразу переводятся в 0/1."""
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    data = {}
+    for column, column_values in zip(columns, values):
+        array = np.asarray(column_values)
+        # NULL в логической колонке (значение по умолчанию False) считается нулём
+        data[column] = array.astype(bool).astype(np.int64) if column in BOOL_COLUMNS else array
+    return pd.DataFrame(data, columns=columns)
+
+
+def rows_to_matrix(rows: list, columns: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Строки (id, *columns) в массив id и матрицу float64: NULL — NaN, в логических колонках — 0."""
+    data = np.array([tuple(row) for row in rows], dtype=np.float64).reshape(-1, len(columns) + 1)
+    X = np.ascontiguousarray(data[:, 1:])
+    for j, column in enumerate(columns):
+        if column in BOOL_COLUMNS:
+            X[np.isnan(X[:, j]), j] = 0.0
+    return data[:, 0].astype(np.int64), X
+
 
 class PredictionDataService:
     def __init__(self, student_repository: IStudentRepository):
         self.student_repository = student_repository
 
-    async def get_students_for_prediction(self, direction_id: int, feature_columns: list[str], only_new: bool = False) -> pd.DataFrame:
-        students = await self.student_repository.list_all(filters=DirectionFilterByDirectionId(direction_id=direction_id))
+    async def load_training_frame(self, direction_id: int | None, columns: list[str], after_id: int = 0) -> pd.DataFrame:
+        """Обучающая выборка направления: один SELECT только по нужным колонкам (при after_id — только id > after_id)."""
+        rows = await self.student_repository.get_columns(direction_id, columns, after_id)
+        return await blocking_executor.run_cpu("training_frame", rows_to_frame, rows, columns)
+
+    async def get_lineage(self, direction_id: int | None) -> dict:
+        """Происхождение выборки направления на текущий момент: число студентов и диапазон id."""
+        rows, min_id, max_id = await self.student_repository.get_id_range(direction_id)
+        return {"rows": rows, "min_id": min_id, "max_id": max_id}
+
+    async def iter_training_chunks(
+            self,
+            direction_id: int | None,
+            columns: list[str],
+            chunk_size: int = 10000,
+    ) -> AsyncIterator[tuple[np.ndarray, np.ndarray]]:
+        """
+        Обучающая выборка фрагментами (ids, X) из серверного курсора; direction_id=None — все направления.
+        Каждый вызов — новый проход по данным, в памяти только текущий фрагмент.
+        """
+        async for rows in self.student_repository.iter_columns(direction_id, columns, chunk_size):
+            yield await blocking_executor.run_cpu("training_chunk", rows_to_matrix, rows, columns)
+
+    async def count_students_for_prediction(self, direction_id: int, model_id: int, only_new: bool = False) -> int:
+        return await self.student_repository.count_for_prediction(
+            direction_id, without_prediction_for_model=model_id if only_new else None
+        )
 
-        if only_new:
-            predicted_ids = await self.student_repository.get_students_without_prediction(direction_id)
-            students = [s for s in students if s.id not in predicted_ids]
+    async def iter_students_for_prediction(
+            self,
+            direction_id: int,
+            feature_columns: list[str],
+            model_id: int,
+            only_new: bool = False,
+            page_size: int = 1000,
+    ) -> AsyncIterator[tuple[np.ndarray, np.ndarray]]:
+        """
+        Постранично отдаёт студентов направления в виде (ids, X), где X — матрица признаков float64.
+        NULL переводится так же, как при обучении (rows_to_matrix): логические — 0, прочие — NaN.
+        В памяти одновременно находится только одна страница.
+        При only_new берутся только студенты без прогноза этой модели.
+        """
+        after_id = 0
+        while True:
+            rows = await self.student_repository.get_feature_page(
+                direction_id,
+                feature_columns,
+                after_id=after_id,
+                limit=page_size,
+                without_prediction_for_model=model_id if only_new else None,
+            )
+            if not rows:
+                return
 
-        if not students:
-            return pd.DataFrame()
+            ids, X = rows_to_matrix(rows, feature_columns)
+            yield ids, X
 
-        df = pd.DataFrame([{col: getattr(s, col) for col in feature_columns} for s in students])
-        df["student_id"] = [s.id for s in students]
-        return df
+            after_id = int(ids[-1])
+            if len(rows) < page_size:
+                return
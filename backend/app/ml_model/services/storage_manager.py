@@ -1,13 +1,35 @@
+import errno
 import os
 import json
+import tempfile
+import uuid
 from datetime import datetime
 from typing import Any
 import shutil
 import joblib
 import pandas as pd
 
+from app.ml_model.infrastructure.artifact import (
+    ARTIFACT_HEADER, COV_FILE, PARAMS_FILE, ModelArtifact, convert_legacy_model,
+)
+
+LEGACY_FILES = ("model.pkl", "train_data.pkl", "scorer.json")
+ARTIFACT_FILES = (ARTIFACT_HEADER, PARAMS_FILE, COV_FILE)
+VERSIONS_DIR = "versions"
+ACTIVE_FILE = "ACTIVE"
+# Номер, под которым сохраняется модель старого формата (без версий)
+LEGACY_VERSION = 1
+
 
 class ModelStorageManager:
+    """
+    Файловое хранилище моделей. Каждое сохранение — новая неизменяемая версия models/<имя>/versions/<N>/:
+    файлы пишутся во временный каталог рядом и публикуются атомарным переименованием, после чего
+    атомарно (os.replace) переключается указатель ACTIVE. Читатель всегда видит либо старую,
+    либо новую версию целиком. Модели старого формата (файлы прямо в models/<имя>/) читаются как раньше,
+    а перед первой новой версией переносятся в versions/1 — к ним можно откатиться.
+    """
+
     def __init__(self, base_dir: str = "models"):
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
@@ -18,56 +40,159 @@ class ModelStorageManager:
     def _get_path(self, model_name: str, filename: str) -> str:
         return os.path.join(self._get_model_dir(model_name), filename)
 
+    def _get_version_dir(self, model_name: str, version: int) -> str:
+        return os.path.join(self._get_model_dir(model_name), VERSIONS_DIR, str(version))
+
     def save(
         self,
         direction_id: int,
         model_name: str,
-        model: Any,
-        train_data,
+        artifact: ModelArtifact,
         feature_columns: list[str],
         processor: Any  = None,
-        metrics: dict | None = None
-    ):
+        metrics: dict | None = None,
+        target: str | None = None,
+        lineage: dict | None = None,
+        activate: bool = True,
+    ) -> int:
+        """Сохраняет новую версию модели и (при activate) делает её активной. Возвращает номер версии."""
         model_dir = self._get_model_dir(model_name)
-        os.makedirs(model_dir, exist_ok=True)
-
-        # Сохраняем модель
-        joblib.dump(model, self._get_path(model_name, "model.pkl"))
-
-        # Сохраняем препроцессор (если есть)
-        if processor:
-            joblib.dump(processor, self._get_path(model_name, "processor.pkl"))
-
-        if train_data is not None:
-            joblib.dump(train_data, self._get_path(model_name, "train_data.pkl"))
-
-        meta = {
-            "feature_columns": feature_columns or [],
-            "metrics": metrics or {},
-            "saved_at": datetime.now().isoformat(),
-            "direction_id": direction_id,
-        }
-        with open(self._get_path(model_name, "meta.json"), "w", encoding="utf-8") as f:
-            json.dump(meta, f, ensure_ascii=False, indent=4)
-
-    def load(self, model_name: str):
-        """Загружает модель, препроцессор и метаинформацию"""
+        os.makedirs(os.path.join(model_dir, VERSIONS_DIR), exist_ok=True)
+        self._adopt_legacy(model_name)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=model_dir)
+        try:
+            # Сохраняем модель: коэффициенты, ковариации и сводку по обучающим данным
+            artifact.save(tmp_dir)
+
+            # Сохраняем препроцессор (если есть)
+            if processor:
+                joblib.dump(processor, os.path.join(tmp_dir, "processor.pkl"))
+
+            meta = {
+                "feature_columns": feature_columns or [],
+                "metrics": metrics or {},
+                "saved_at": datetime.now().isoformat(),
+                "direction_id": direction_id,
+                # Целевая переменная и происхождение выборки (число строк, диапазон id) — для дообучения
+                "target": target,
+                "lineage": lineage,
+            }
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=4)
+
+            version = self._publish(model_name, tmp_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.set_active_version(model_name, version)
+        return version
+
+    def _adopt_legacy(self, model_name: str) -> None:
+        """
+        Публикует модель старого формата как versions/1 (pickle переводится в артефакт) и делает её активной.
+        Исходные файлы не удаляются: их может читать запрос, получивший версию None до записи ACTIVE.
+        """
+        model_dir = self._get_model_dir(model_name)
+        if os.path.exists(self._get_path(model_name, ACTIVE_FILE)) or self.list_versions(model_name):
+            return
+        if ModelArtifact.exists(model_dir):
+            files = ARTIFACT_FILES
+        elif os.path.exists(self._get_path(model_name, "model.pkl")):
+            files = LEGACY_FILES
+        else:
+            return
+
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=model_dir)
+        try:
+            for filename in (*files, "processor.pkl", "meta.json"):
+                path = self._get_path(model_name, filename)
+                if os.path.exists(path):
+                    shutil.copy2(path, tmp_dir)
+            convert_legacy_model(tmp_dir, remove_legacy=True)
+            os.rename(tmp_dir, self._get_version_dir(model_name, LEGACY_VERSION))
+        except OSError as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            # versions/1 уже опубликовал параллельный save
+            if e.errno in (errno.EEXIST, errno.ENOTEMPTY):
+                return
+            raise
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.set_active_version(model_name, LEGACY_VERSION)
+
+    def _publish(self, model_name: str, tmp_dir: str) -> int:
+        """Переименовывает готовый каталог в следующую свободную версию (при гонке — в следующую за ней)."""
+        version = max(self.list_versions(model_name), default=0) + 1
+        while True:
+            try:
+                os.rename(tmp_dir, self._get_version_dir(model_name, version))
+                return version
+            except OSError as e:
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+                version += 1
+
+    def list_versions(self, model_name: str) -> list[int]:
+        versions_dir = os.path.join(self._get_model_dir(model_name), VERSIONS_DIR)
+        if not os.path.isdir(versions_dir):
+            return []
+        return sorted(int(name) for name in os.listdir(versions_dir) if name.isdigit())
+
+    def get_active_version(self, model_name: str) -> int | None:
+        """Активная версия из указателя ACTIVE; None — модель старого формата без версий"""
         model_dir = self._get_model_dir(model_name)
         if not os.path.exists(model_dir):
             raise FileNotFoundError(f"Модель '{model_name}' не найдена в {model_dir}")
-
         try:
-            train_data = joblib.load(self._get_path(model_name, "train_data.pkl"))
+            with open(self._get_path(model_name, ACTIVE_FILE), encoding="utf-8") as f:
+                return int(f.read().strip())
         except FileNotFoundError:
-            train_data = None
+            return None
+
+    def set_active_version(self, model_name: str, version: int) -> None:
+        """Атомарно переключает указатель ACTIVE на опубликованную версию"""
+        if not os.path.isdir(self._get_version_dir(model_name, version)):
+            raise FileNotFoundError(f"Версия {version} модели '{model_name}' не найдена")
+        pointer = self._get_path(model_name, ACTIVE_FILE)
+        tmp_pointer = f"{pointer}.{uuid.uuid4().hex}"
+        with open(tmp_pointer, "w", encoding="utf-8") as f:
+            f.write(str(version))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, pointer)
+
+    def load(self, model_name: str, version: int | None = None):
+        """Загружает модель, препроцессор и метаинформацию. version=None — активная версия"""
+        model_dir = self._get_model_dir(model_name)
+        if not os.path.exists(model_dir):
+            raise FileNotFoundError(f"Модель '{model_name}' не найдена в {model_dir}")
+        if version is None:
+            version = self.get_active_version(model_name)
+        if version is not None:
+            model_dir = self._get_version_dir(model_name, version)
+            if not os.path.isdir(model_dir):
+                raise FileNotFoundError(f"Версия {version} модели '{model_name}' не найдена")
+
+        if ModelArtifact.exists(model_dir):
+            artifact = ModelArtifact.load(model_dir)
+        else:
+            # Старый формат: распаковываем pickle и переводим в артефакт в памяти
+            try:
+                train_data = joblib.load(os.path.join(model_dir, "train_data.pkl"))
+            except FileNotFoundError:
+                train_data = None
+            artifact = ModelArtifact.from_result(
+                joblib.load(os.path.join(model_dir, "model.pkl")), X_train=train_data
+            )
 
-        # Загрузка модели и препроцессора
-        model = joblib.load(self._get_path(model_name, "model.pkl"))
-        processor_path = self._get_path(model_name, "processor.pkl")
+        processor_path = os.path.join(model_dir, "processor.pkl")
         processor = joblib.load(processor_path) if os.path.exists(processor_path) else None
 
         # Загрузка и преобразование метаданных
-        with open(self._get_path(model_name, "meta.json"), encoding="utf-8") as f:
+        with open(os.path.join(model_dir, "meta.json"), encoding="utf-8") as f:
             meta = json.load(f)
 
         # Восстановление DataFrame для метрик (при необходимости)
@@ -92,12 +217,15 @@ class ModelStorageManager:
         }
 
         return {
-            "model": model,
+            "model": artifact,
             "processor": processor,
-            "X_train": train_data,
+            "train_summary": artifact.train_summary,
             "feature_columns": meta.get("feature_columns", []),
             "metrics": {**metrics},
             "direction_id": meta.get("direction_id"),
+            "target": meta.get("target"),
+            "lineage": meta.get("lineage"),
+            "version": version,
         }
 
     def delete(self, model_name: str):
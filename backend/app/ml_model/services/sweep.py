@@ -0,0 +1,142 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from app.db.config import settings
+from app.ml_model.infrastructure.ml_model_repository import MLModelRepository
+from app.ml_model.services.training import fit_and_save_model
+
+LINK_NAMES = {"logit": "Логит", "probit": "Пробит"}
+# Критерии рейтинга: True — чем больше, тем лучше
+RANK_CRITERIA = {"aic": False, "bic": False, "lr": True, "auc": True}
+MAX_SWEEP_CANDIDATES = 500
+
+# Данные перебора в процессе-воркере: передаются один раз при запуске воркера, а не с каждой задачей
+_sweep_data: dict | None = None
+
+
+def feature_subsets(candidates: list[str], max_size: int) -> list[list[str]]:
+    """Все непустые подмножества признаков размером не больше max_size в порядке candidates."""
+    return [
+        list(subset)
+        for size in range(1, min(max_size, len(candidates)) + 1)
+        for subset in combinations(candidates, size)
+    ]
+
+
+def sweep_model_name(link: str, features: list[str], prefix: str = "") -> str:
+    """Имя в стиле каталогов models/: Логит_ЕГЭ+Русский."""
+    return f"{prefix}{LINK_NAMES[link]}_{'+'.join(features)}"
+
+
+def split_sweep_data(data: pd.DataFrame, target: str) -> dict:
+    """То же разбиение, что в fit_and_save_model: одна и та же выборка для всех кандидатов и для сохранения."""
+    X = data.drop(columns=[target, "full_name"], errors="ignore")
+    X = X.astype({col: int for col in X.select_dtypes(include="bool").columns})
+    X_train, X_test, y_train, y_test = train_test_split(X, data[target], test_size=0.3, random_state=12)
+    return {"X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
+
+
+def _init_sweep_worker(data: dict) -> None:
+    global _sweep_data
+    _sweep_data = data
+
+
+def fit_candidate(features: list[str], link: str) -> dict:
+    """Обучение одного кандидата на общих данных воркера; ошибка оптимизации не прерывает перебор."""
+    item = {"features": features, "model_type": link}
+    try:
+        repository = MLModelRepository(model_type=link)
+        result = repository.fit(_sweep_data["X_train"][features], _sweep_data["y_train"])
+        y_prob, _ = repository.predict(_sweep_data["X_test"][features])
+        y_test = _sweep_data["y_test"]
+        item.update({
+            "aic": float(result.aic),
+            "bic": float(result.bic),
+            "llf": float(result.llf),
+            "lr": float(result.llr),
+            "lr_pvalue": float(result.llr_pvalue),
+            "pseudo_r2": float(result.prsquared),
+            "auc": float(roc_auc_score(y_test, y_prob)) if y_test.nunique() == 2 else None,
+            "converged": bool(result.mle_retvals.get("converged", True)),
+        })
+    except Exception as e:
+        item["error"] = str(e)
+    return item
+
+
+def rank_leaderboard(items: list[dict], rank_by: str = "aic") -> list[dict]:
+    """
+    Места по каждому критерию (aic, bic, lr, auc) и сортировка по rank_by.
+    Кандидаты с ошибкой или без значения критерия — в конце.
+    """
+    fitted = [item for item in items if "error" not in item]
+    for criterion, higher_is_better in RANK_CRITERIA.items():
+        values = np.array([item[criterion] if item[criterion] is not None else np.nan for item in fitted], dtype=float)
+        order = np.argsort(-values if higher_is_better else values, kind="stable")
+        for place, index in enumerate(order, start=1):
+            ranks = fitted[index].setdefault("ranks", {})
+            ranks[criterion] = place if not np.isnan(values[index]) else None
+
+    worst = len(fitted) + 1
+    fitted.sort(key=lambda item: item["ranks"][rank_by] or worst)
+    return fitted + [item for item in items if "error" in item]
+
+
+def run_sweep(data: dict, candidates: list[tuple[list[str], str]], max_workers: int) -> list[dict]:
+    """
+    Параллельное обучение кандидатов (признаки, функция связи) в пуле процессов.
+    Данные передаются каждому воркеру один раз через initializer. В процессе-демоне
+    (воркер Celery prefork) пул запустить нельзя — кандидаты обучаются по очереди.
+    """
+    if max_workers <= 1 or multiprocessing.current_process().daemon:
+        _init_sweep_worker(data)
+        return [fit_candidate(features, link) for features, link in candidates]
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(candidates)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_sweep_worker,
+        initargs=(data,),
+    ) as pool:
+        features, links = zip(*candidates)
+        return list(pool.map(fit_candidate, features, links))
+
+
+def sweep_and_save(
+        data: dict[str, list],
+        target_column: str,
+        direction_id: int,
+        candidates: list[tuple[list[str], str]],
+        rank_by: str = "aic",
+        top_n: int = 0,
+        name_prefix: str = "",
+        lineage: dict | None = None,
+) -> dict:
+    """
+    Перебор и сохранение лучших моделей одной задачей бэкенда обучения (процесс задачи или воркер Celery).
+    top_n лучших по rank_by обучаются fit_and_save_model на той же выборке; в БД их записывает вызывающий —
+    по списку saved (имя, признаки, версия).
+    """
+    frame = pd.DataFrame(data)
+    leaderboard = rank_leaderboard(
+        run_sweep(split_sweep_data(frame, target_column), candidates, settings.SWEEP_MAX_WORKERS), rank_by
+    )
+
+    saved = []
+    for item in leaderboard[:top_n]:
+        if "error" in item:
+            break
+        model_name = sweep_model_name(item["model_type"], item["features"], name_prefix)
+        payload = {column: data[column] for column in item["features"] + [target_column, "full_name"]}
+        result = fit_and_save_model(
+            payload, target_column, model_name, direction_id, item["model_type"], None, lineage
+        )
+        item["model_name"] = model_name
+        saved.append({"model_name": model_name, "feature_columns": result["feature_columns"],
+                      "version": result["version"]})
+    return {"leaderboard": leaderboard, "saved": saved}
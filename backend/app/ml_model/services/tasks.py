@@ -0,0 +1,10 @@
+from app.ml_model.services.sweep import sweep_and_save
+from app.ml_model.services.training import cross_validate_and_fit, fit_and_save_model
+
+# Задачи, которые можно выполнить в фоне: имя задачи -> функция.
+# Функции должны быть импортируемыми на верхнем уровне модуля (для пула процессов и Celery).
+TASKS = {
+    "fit_and_save_model": fit_and_save_model,
+    "cross_validate_and_fit": cross_validate_and_fit,
+    "sweep_and_save": sweep_and_save,
+}
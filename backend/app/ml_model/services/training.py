@@ -0,0 +1,71 @@
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from app.db.config import settings
+from app.ml_model.infrastructure.ml_model_repository import MLModelRepository
+from app.ml_model.services.cross_validation import cross_validate
+from app.ml_model.services.data_processor import DataProcessor
+
+
+def fit_and_save_model(
+        data: dict[str, list],
+        target_column: str,
+        model_name: str,
+        direction_id: int,
+        model_type: str,
+        cross_validation: dict | None = None,
+        lineage: dict | None = None,
+) -> dict:
+    """
+    Обучает, оценивает и сохраняет модель. Чистая функция без обращения к БД —
+    выполняется в пуле процессов или в воркере Celery, поэтому принимает и возвращает
+    только сериализуемые данные.
+    """
+    processor = DataProcessor()
+    X_scaled, y, fio = processor.fit_transform(
+        df=pd.DataFrame(data),
+        target_col=target_column,
+        fio_col="full_name"
+    )
+    feature_columns = list(X_scaled.columns)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, y, test_size=0.3, random_state=12
+    )
+
+    repository = MLModelRepository(model_type=model_type)
+    repository.fit(X_train=X_train, y_train=y_train)
+    metrics = repository.evaluate(X_test=X_test, y_test=y_test)
+    # Итоги кросс-валидации (если она была) сохраняются вместе с метриками модели
+    if cross_validation is not None:
+        metrics["cross_validation"] = cross_validation
+    version = repository.save_model(model_name, direction_id, target=target_column, lineage=lineage)
+
+    return {
+        "feature_columns": feature_columns,
+        "metrics": metrics,
+        "version": version,
+    }
+
+
+def cross_validate_and_fit(
+        data: dict[str, list],
+        target_column: str,
+        model_name: str,
+        direction_id: int,
+        model_type: str,
+        cv: dict,
+        lineage: dict | None = None,
+) -> dict:
+    """
+    Кросс-валидация и обучение одной задачей: фолды считаются там же, где обучается модель
+    (процесс задачи или воркер Celery), и отменяются вместе с ней. cv — {"mode", "n_splits", "n_repeats"}.
+    """
+    cross_validation = cross_validate(
+        data, target_column, model_type,
+        mode=cv["mode"],
+        n_splits=cv["n_splits"],
+        n_repeats=cv.get("n_repeats", 1),
+        max_workers=settings.CV_MAX_WORKERS,
+    )
+    return fit_and_save_model(data, target_column, model_name, direction_id, model_type, cross_validation, lineage)
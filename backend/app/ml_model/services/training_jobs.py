@@ -0,0 +1,235 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from app.db.config import settings
+from app.ml_model.domain.entities import TrainingJob, TrainingJobStatus
+from app.ml_model.services.tasks import TASKS
+
+
+def _run_task(conn, task_name: str, args: tuple) -> None:
+    """Точка входа процесса задачи: результат или исключение отправляются родителю через pipe."""
+    if hasattr(os, "setpgid"):
+        # Своя группа процессов: при отмене завершаются и пулы, запущенные задачей (фолды кросс-валидации)
+        os.setpgid(0, 0)
+    try:
+        conn.send((True, TASKS[task_name](*args)))
+    except Exception as e:
+        try:
+            conn.send((False, e))
+        except Exception:
+            # Исключение не сериализуется — передаём текст
+            conn.send((False, RuntimeError(repr(e))))
+    finally:
+        conn.close()
+
+
+def _terminate(process: multiprocessing.Process) -> None:
+    """Завершает процесс задачи вместе с его дочерними процессами."""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            return
+        except (ProcessLookupError, PermissionError):
+            # Процесс ещё не создал свою группу или уже завершился
+            pass
+    process.terminate()
+
+
+def _receive(conn) -> tuple[bool, object]:
+    try:
+        return conn.recv()
+    except EOFError:
+        # Процесс завершился, не отправив результат (отмена, падение интерпретатора, нехватка памяти)
+        return False, RuntimeError("Процесс задачи завершился без результата")
+
+
+class LocalTrainingBackend:
+    """
+    Выполняет каждую задачу в отдельном процессе внутри приложения, чтобы выполняющуюся задачу
+    можно было отменить (terminate). Число одновременных задач ограничивает TrainingJobManager.
+    """
+
+    def __init__(self):
+        # spawn: дочерние процессы не наследуют event loop и потоки uvicorn
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: dict[str, multiprocessing.Process] = {}
+
+    async def run(self, job: TrainingJob, task_name: str, *args) -> dict:
+        loop = asyncio.get_running_loop()
+        receiver, sender = self._context.Pipe(duplex=False)
+        # Не демон: процессу-демону нельзя запускать свой пул; при остановке приложения процессы завершает shutdown
+        process = self._context.Process(target=_run_task, args=(sender, task_name, args))
+        process.start()
+        # Копия конца для записи остаётся только у дочернего процесса: после его смерти recv получит EOF
+        sender.close()
+        self._processes[job.id] = process
+        try:
+            ok, payload = await loop.run_in_executor(None, _receive, receiver)
+        except asyncio.CancelledError:
+            # Задачу отменили не через cancel_running (например, при остановке приложения)
+            _terminate(process)
+            raise
+        finally:
+            self._processes.pop(job.id, None)
+            await loop.run_in_executor(None, process.join)
+            receiver.close()
+        if not ok:
+            raise payload
+        return payload
+
+    def cancel_running(self, job: TrainingJob) -> bool:
+        process = self._processes.get(job.id)
+        if process is None or not process.is_alive():
+            return False
+        _terminate(process)
+        return True
+
+    def shutdown(self) -> None:
+        for process in list(self._processes.values()):
+            _terminate(process)
+        self._processes.clear()
+
+
+class CeleryTrainingBackend:
+    """Отправляет задачи воркерам Celery и ждёт результат, не блокируя event loop."""
+
+    poll_interval = 0.5
+
+    def __init__(self):
+        from app.ml_model.services.celery_app import celery_app
+        self.celery_app = celery_app
+        self._results = {}
+
+    async def run(self, job: TrainingJob, task_name: str, *args) -> dict:
+        async_result = self.celery_app.send_task(task_name, args=list(args), task_id=job.id)
+        self._results[job.id] = async_result
+        try:
+            while not async_result.ready():
+                await asyncio.sleep(self.poll_interval)
+            return async_result.get(propagate=True)
+        finally:
+            self._results.pop(job.id, None)
+
+    def cancel_running(self, job: TrainingJob) -> bool:
+        async_result = self._results.get(job.id)
+        if async_result is None:
+            return False
+        async_result.revoke(terminate=True)
+        return True
+
+    def shutdown(self) -> None:
+        pass
+
+
+class TrainingJobManager:
+    """
+    Очередь фоновых задач обучения. Хранит состояние задач в памяти процесса и
+    ограничивает число одновременно выполняемых задач.
+    """
+
+    def __init__(self, backend, max_concurrent: int, history_size: int = 100):
+        self.backend = backend
+        self.max_concurrent = max_concurrent
+        self.history_size = history_size
+        self.jobs: dict[str, TrainingJob] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def submit(
+            self,
+            runner: Callable[[TrainingJob], Awaitable[dict]],
+            kind: str = "train",
+            model_name: str | None = None,
+            direction_id: int | None = None,
+    ) -> TrainingJob:
+        """Ставит задачу в очередь. runner получает задачу и возвращает словарь с результатом."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        job = TrainingJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            model_name=model_name,
+            direction_id=direction_id,
+            created_at=datetime.now(),
+        )
+        self.jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, runner))
+        self._prune()
+        return job
+
+    async def _run(self, job: TrainingJob, runner: Callable[[TrainingJob], Awaitable[dict]]) -> None:
+        try:
+            async with self._semaphore:
+                job.status = TrainingJobStatus.running
+                job.started_at = datetime.now()
+                job.queue_seconds = (job.started_at - job.created_at).total_seconds()
+                job.result = await runner(job)
+                job.status = TrainingJobStatus.succeeded
+        except asyncio.CancelledError:
+            job.status = TrainingJobStatus.cancelled
+        except Exception as e:
+            logger.exception(f"Ошибка фоновой задачи {job.id}: {e}")
+            job.status = TrainingJobStatus.failed
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now()
+            if job.started_at:
+                job.run_seconds = (job.finished_at - job.started_at).total_seconds()
+            self._tasks.pop(job.id, None)
+
+    def get(self, job_id: str) -> TrainingJob | None:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> list[TrainingJob]:
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Отменяет задачу в очереди или выполняющуюся. Процесс обучения бэкенда (локальный процесс вместе
+        с его пулом фолдов или задача Celery) прерывается; этапы вне бэкенда (перебор, потоковое обучение,
+        дообучение) останавливаются
+        на ближайшем await, а уже запущенное в пуле вычисление доработает, но его результат отбрасывается.
+        """
+        job = self.jobs.get(job_id)
+        task = self._tasks.get(job_id)
+        if job is None or task is None:
+            return False
+        if job.status == TrainingJobStatus.running:
+            self.backend.cancel_running(job)
+        task.cancel()
+        return True
+
+    def _prune(self) -> None:
+        finished = [
+            job for job in self.jobs.values()
+            if job.status not in (TrainingJobStatus.queued, TrainingJobStatus.running)
+        ]
+        excess = len(self.jobs) - self.history_size
+        for job in sorted(finished, key=lambda job: job.created_at)[:max(excess, 0)]:
+            self.jobs.pop(job.id, None)
+
+    def shutdown(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self.backend.shutdown()
+
+
+def _create_backend():
+    if settings.TRAINING_BACKEND == "celery":
+        return CeleryTrainingBackend()
+    return LocalTrainingBackend()
+
+
+training_job_manager = TrainingJobManager(
+    backend=_create_backend(),
+    max_concurrent=settings.TRAINING_MAX_WORKERS,
+    history_size=settings.TRAINING_JOBS_HISTORY,
+)
@@ -19,6 +19,10 @@ class IPredictionRepository(ABC):
     async def add_many_predictions(self, predictions: list[PredictionEntity]) -> int:
         pass
 
+    @abstractmethod
+    async def upsert_predictions(self, predictions: list[PredictionEntity]) -> tuple[int, int]:
+        pass
+
     @abstractmethod
     async def get_prediction_data_by_model_id(self, model_id: int):
         pass
\ No newline at end of file
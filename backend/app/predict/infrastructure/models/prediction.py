@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from app.ml_model.infrastructure.models.ml_model import MLModel
@@ -6,11 +6,14 @@ from app.ml_model.infrastructure.models.ml_model import MLModel
 
 class Prediction(Base):
     __tablename__ = 'prediction'
+    __table_args__ = (
+        UniqueConstraint("student_id", "model_id", name="uq_prediction_student_model"),
+    )
 
     student_id = Column(Integer, ForeignKey("student.id"), nullable=False)
     predicted_class = Column(Integer, nullable=False)
     predicted_prob = Column(Float, nullable=False)
-    model_id = Column(Integer, ForeignKey("ml_model.id"), nullable=False)  # Связь с моделью
+    model_id = Column(Integer, ForeignKey("ml_model.id"), nullable=False, index=True)  # Связь с моделью
 
     student = relationship("Student", back_populates="prediction")
     ml_models = relationship(MLModel, back_populates="prediction")
\ No newline at end of file
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select, func, or_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,6 +9,10 @@ from app.predict.infrastructure.models.prediction import Prediction
 
 from app.db.base import BaseDAO
 
+# 500 строк * 4 колонки укладываются в лимит параметров SQLite
+UPSERT_CHUNK_SIZE = 500
+
+
 class PredictionDAO(BaseDAO):
     model = Prediction
 
@@ -40,34 +45,67 @@ class PredictionDAO(BaseDAO):
             session: AsyncSession,
             values: list[BaseModel],
     ) -> tuple[int, int]:
-        values_list = [v.model_dump(exclude_unset=True) for v in values]
-        new_count, updated_count = 0, 0
-
-        for value in values_list:
-            stmt = select(cls.model).where(
-                cls.model.student_id == value["student_id"],
-                cls.model.model_id == value["model_id"]
-            )
-            result = await session.execute(stmt)
-            existing = result.scalars().first()
-
-            if existing:
-                if (
-                        existing.predicted_class != value["predicted_class"] or
-                        existing.predicted_prob != value["predicted_prob"]
-                ):
-                    existing.predicted_class = value["predicted_class"]
-                    existing.predicted_prob = value["predicted_prob"]
-                    updated_count += 1
-                # Иначе пропускаем (не меняем)
-            else:
-                session.add(cls.model(**value))
-                new_count += 1
+        """
+        Вставляет или обновляет прогнозы пачками: на каждую пачку один SELECT для подсчёта
+        новых/изменённых строк и один INSERT ... ON CONFLICT (student_id, model_id) DO UPDATE.
+        """
+        # При повторе ключа внутри одной пачки оставляем последнее значение,
+        # иначе ON CONFLICT попытается обновить одну строку дважды
+        by_key = {}
+        for value in values:
+            item = value.model_dump(exclude_unset=True)
+            by_key[(item["student_id"], item["model_id"])] = item
+        values_list = list(by_key.values())
 
+        new_count, updated_count = 0, 0
         try:
+            for start in range(0, len(values_list), UPSERT_CHUNK_SIZE):
+                chunk = values_list[start:start + UPSERT_CHUNK_SIZE]
+                new, updated = await cls._upsert_chunk(session, chunk)
+                new_count += new
+                updated_count += updated
             await session.flush()
         except SQLAlchemyError as e:
             await session.rollback()
             raise e
 
-        return new_count, updated_count
\ No newline at end of file
+        return new_count, updated_count
+
+    @classmethod
+    async def _upsert_chunk(cls, session: AsyncSession, chunk: list[dict]) -> tuple[int, int]:
+        model_ids = {item["model_id"] for item in chunk}
+        student_ids = {item["student_id"] for item in chunk}
+        result = await session.execute(
+            select(cls.model.student_id, cls.model.model_id, cls.model.predicted_class, cls.model.predicted_prob)
+            .where(cls.model.model_id.in_(model_ids), cls.model.student_id.in_(student_ids))
+        )
+        existing = {(row.student_id, row.model_id): (row.predicted_class, row.predicted_prob) for row in result}
+
+        new_count, updated_count = 0, 0
+        for item in chunk:
+            current = existing.get((item["student_id"], item["model_id"]))
+            if current is None:
+                new_count += 1
+            elif current != (item["predicted_class"], item["predicted_prob"]):
+                updated_count += 1
+
+        if new_count == 0 and updated_count == 0:
+            return 0, 0
+
+        insert = postgresql_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(cls.model).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.model.student_id, cls.model.model_id],
+            set_={
+                "predicted_class": stmt.excluded.predicted_class,
+                "predicted_prob": stmt.excluded.predicted_prob,
+                "updated_at": func.now(),
+            },
+            # Неизменившиеся прогнозы не трогаем, чтобы не сдвигать updated_at
+            where=or_(
+                cls.model.predicted_class != stmt.excluded.predicted_class,
+                cls.model.predicted_prob != stmt.excluded.predicted_prob,
+            ),
+        )
+        await session.execute(stmt)
+        return new_count, updated_count
@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.analysis.services.cache import invalidate_on_commit, model_tag
 from app.predict.domain.entities import PredictionEntity
 from app.predict.domain.interfaces.repository import IPredictionRepository
 from app.predict.infrastructure.filters.filter import PredictionFilter
@@ -42,9 +43,16 @@ class PredictRepository(IPredictionRepository):
         ]
 
     async def add_many_predictions(self, predictions: list[PredictionEntity]) -> int:
-        new_count, updated_count = await PredictionDAO.add_or_update_predictions(self.session, predictions)
+        new_count, updated_count = await self.upsert_predictions(predictions)
         return new_count + updated_count # потом поправить нормально
 
+    async def upsert_predictions(self, predictions: list[PredictionEntity]) -> tuple[int, int]:
+        new_count, updated_count = await PredictionDAO.add_or_update_predictions(self.session, predictions)
+        if new_count or updated_count:
+            # Сбрасываем кэш анализа по моделям, для которых записаны прогнозы
+            invalidate_on_commit(self.session, *{model_tag(p.model_id) for p in predictions})
+        return new_count, updated_count
+
     async def get_prediction_data_by_model_id(self, model_id: int):
         result = await self.session.execute(
             select(Prediction.student_id, Prediction.predicted_class, Prediction.predicted_prob)
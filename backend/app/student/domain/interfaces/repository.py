@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
 from pydantic import BaseModel
 
@@ -31,10 +32,23 @@ class IStudentRepository(ABC):
     async def list_all(self, filters: BaseModel | None = None) -> list[BaseStudent]:
         pass
 
+    @abstractmethod
+    async def list_page(self, filters: BaseModel | None, fields: list[str], sort: str = "id",
+                        descending: bool = False, after: tuple | None = None, limit: int = 100) -> list[dict]:
+        pass
+
+    @abstractmethod
+    async def count(self, filters: BaseModel | None = None) -> int:
+        pass
+
     @abstractmethod
     async def bulk_add(self, students: list[BaseStudent]) -> None:
         pass
 
+    @abstractmethod
+    async def insert_rows(self, rows: list[dict]) -> int:
+        pass
+
     @abstractmethod
     async def get_students_with_relation(self, direction_id: int | None = None):
         pass
@@ -45,4 +59,26 @@ class IStudentRepository(ABC):
 
     @abstractmethod
     async def get_by_ids(self, student_ids: list[int]) -> list[BaseStudent]:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def get_columns(self, direction_id: int | None, columns: list[str], after_id: int = 0) -> list[tuple]:
+        pass
+
+    @abstractmethod
+    async def get_id_range(self, direction_id: int | None) -> tuple[int, int | None, int | None]:
+        pass
+
+    @abstractmethod
+    def iter_columns(self, direction_id: int | None, columns: list[str],
+                     chunk_size: int = 10000) -> AsyncIterator[list[tuple]]:
+        pass
+
+    @abstractmethod
+    async def get_feature_page(self, direction_id: int, columns: list[str], after_id: int = 0, limit: int = 1000,
+                               without_prediction_for_model: int | None = None) -> list[tuple]:
+        pass
+
+    @abstractmethod
+    async def count_for_prediction(self, direction_id: int, without_prediction_for_model: int | None = None) -> int:
+        pass
@@ -1,7 +1,10 @@
+from typing import AsyncIterator
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
+from app.analysis.services.cache import direction_tag, invalidate_on_commit
 from app.student.domain.entities import BaseStudent
 from app.student.domain.interfaces.repository import IStudentRepository
 from app.student.infrastructure.filters.student import StudentFilterByDirection, StudentFilterById, \
@@ -40,26 +43,51 @@ class StudentRepository(IStudentRepository):
         orm_students = await StudentDAO.get_all(self.session, filters)
         return [self._map_to_domain(s) for s in orm_students]
 
+    def _invalidate_directions(self, direction_ids) -> None:
+        """Сбрасывает кэш анализа по направлениям, в которых изменились студенты (после коммита)"""
+        invalidate_on_commit(self.session, *[direction_tag(d) for d in set(direction_ids) if d is not None])
+
     async def create(self, data: BaseModel) -> BaseStudent:
         orm_student = await StudentDAO.add(self.session, data)
+        self._invalidate_directions([orm_student.direction_id])
         return self._map_to_domain(orm_student)
 
     async def update(self, student_id: int, values: BaseModel) -> bool:
         filters = StudentFilterById(id=student_id)
+        student = await StudentDAO.find_one_or_none_by_id(student_id, self.session)
         rowcount = await StudentDAO.update(self.session, filters, values)
+        if student:
+            self._invalidate_directions([student.direction_id, getattr(values, "direction_id", None)])
         return rowcount > 0
 
     async def delete_by_id(self, student_id: int) -> bool:
         filters = StudentFilterById(id=student_id)
+        student = await StudentDAO.find_one_or_none_by_id(student_id, self.session)
         rowcount = await StudentDAO.delete(self.session, filters)
+        if student:
+            self._invalidate_directions([student.direction_id])
         return rowcount > 0
 
     async def list_all(self, filters: BaseModel | None = None) -> list[BaseStudent]:
         orm_students = await StudentDAO.get_all(self.session, filters)
         return [self._map_to_domain(s) for s in orm_students]
 
+    async def list_page(self, filters: BaseModel | None, fields: list[str], sort: str = "id",
+                        descending: bool = False, after: tuple | None = None, limit: int = 100) -> list[dict]:
+        rows = await StudentDAO.get_page(self.session, filters, fields, sort, descending, after, limit)
+        return [dict(row) for row in rows]
+
+    async def count(self, filters: BaseModel | None = None) -> int:
+        return await StudentDAO.count(self.session, filters)
+
     async def bulk_add(self, students: list[BaseStudent]) -> None:
         await StudentDAO.add_many(self.session, students)
+        self._invalidate_directions([student.direction_id for student in students])
+
+    async def insert_rows(self, rows: list[dict]) -> int:
+        count = await StudentDAO.insert_rows(self.session, rows)
+        self._invalidate_directions([row["direction_id"] for row in rows])
+        return count
 
     async def get_students_with_relation(self, direction_id: int | None = None, model_id: int | None = None):
         filters = None if direction_id is None else StudentFilterByDirection(direction_id=direction_id)
@@ -78,3 +106,22 @@ class StudentRepository(IStudentRepository):
         result = await self.session.execute(stmt)
         students = result.scalars().all()
         return [self._map_to_domain(student) for student in students]
+
+    async def get_columns(self, direction_id: int | None, columns: list[str], after_id: int = 0) -> list[tuple]:
+        return await StudentDAO.get_columns(self.session, direction_id, columns, after_id)
+
+    async def get_id_range(self, direction_id: int | None) -> tuple[int, int | None, int | None]:
+        return await StudentDAO.get_id_range(self.session, direction_id)
+
+    def iter_columns(self, direction_id: int | None, columns: list[str],
+                     chunk_size: int = 10000) -> AsyncIterator[list[tuple]]:
+        return StudentDAO.stream_columns(self.session, direction_id, columns, chunk_size)
+
+    async def get_feature_page(self, direction_id: int, columns: list[str], after_id: int = 0, limit: int = 1000,
+                               without_prediction_for_model: int | None = None) -> list[tuple]:
+        return await StudentDAO.get_feature_page(
+            self.session, direction_id, columns, after_id, limit, without_prediction_for_model
+        )
+
+    async def count_for_prediction(self, direction_id: int, without_prediction_for_model: int | None = None) -> int:
+        return await StudentDAO.count_for_prediction(self.session, direction_id, without_prediction_for_model)
@@ -1,5 +1,7 @@
+from typing import AsyncIterator
+
 from pydantic import BaseModel
-from sqlalchemy import select, outerjoin
+from sqlalchemy import select, outerjoin, func, insert, tuple_
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
@@ -8,10 +10,178 @@ from app.db.base import BaseDAO
 from app.predict.infrastructure.models.prediction import Prediction
 from app.student.infrastructure.models.student import Student
 
+# 500 строк * 9 колонок укладываются в лимит параметров SQLite
+INSERT_CHUNK_SIZE = 500
+
 
 class StudentDAO(BaseDAO):
     model = Student
 
+    @classmethod
+    async def insert_rows(cls, session: AsyncSession, rows: list[dict]) -> int:
+        """Вставка готовых строк пачками INSERT ... VALUES (...), (...) без создания ORM-объектов"""
+        try:
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                await session.execute(insert(cls.model).values(rows[start:start + INSERT_CHUNK_SIZE]))
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+        return len(rows)
+
+    @classmethod
+    def _filter_conditions(cls, filters: BaseModel | None) -> list:
+        filter_dict = filters.model_dump(exclude_unset=True, exclude_none=True) if filters else {}
+        return [getattr(cls.model, k) == v for k, v in filter_dict.items()]
+
+    @classmethod
+    async def get_page(
+            cls,
+            session: AsyncSession,
+            filters: BaseModel | None,
+            fields: list[str],
+            sort: str = "id",
+            descending: bool = False,
+            after: tuple | None = None,
+            limit: int = 100,
+    ):
+        """
+        Страница студентов: выбираются только колонки fields, порядок (sort, id),
+        after — значения (sort, id) последней строки предыдущей страницы (keyset-пагинация).
+        """
+        try:
+            sort_column = getattr(cls.model, sort)
+            stmt = select(*[getattr(cls.model, field) for field in fields]).where(*cls._filter_conditions(filters))
+            if after is not None:
+                if sort == "id":
+                    key, last = cls.model.id, after[1]
+                else:
+                    key, last = tuple_(sort_column, cls.model.id), tuple_(*after)
+                stmt = stmt.where(key < last if descending else key > last)
+            if descending:
+                stmt = stmt.order_by(sort_column.desc(), cls.model.id.desc())
+            else:
+                stmt = stmt.order_by(sort_column, cls.model.id)
+            result = await session.execute(stmt.limit(limit))
+            return result.mappings().all()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+
+    @classmethod
+    async def count(cls, session: AsyncSession, filters: BaseModel | None) -> int:
+        try:
+            stmt = select(func.count(cls.model.id)).where(*cls._filter_conditions(filters))
+            result = await session.execute(stmt)
+            return result.scalar_one()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+
+    @classmethod
+    def _prediction_candidates(cls, stmt, direction_id: int, without_prediction_for_model: int | None):
+        stmt = stmt.where(cls.model.direction_id == direction_id)
+        if without_prediction_for_model is not None:
+            stmt = stmt.outerjoin(
+                Prediction,
+                (Prediction.student_id == cls.model.id) & (Prediction.model_id == without_prediction_for_model)
+            ).where(Prediction.id.is_(None))
+        return stmt
+
+    @classmethod
+    async def get_columns(cls, session: AsyncSession, direction_id: int | None, columns: list[str], after_id: int = 0):
+        """
+        Значения колонок columns для студентов направления (None — всех направлений) с id > after_id
+        одним SELECT, без ORM-объектов.
+        """
+        try:
+            stmt = select(*[getattr(cls.model, col) for col in columns]).order_by(cls.model.id)
+            if direction_id is not None:
+                stmt = stmt.where(cls.model.direction_id == direction_id)
+            if after_id:
+                stmt = stmt.where(cls.model.id > after_id)
+            result = await session.execute(stmt)
+            return result.all()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+
+    @classmethod
+    async def stream_columns(
+            cls,
+            session: AsyncSession,
+            direction_id: int | None,
+            columns: list[str],
+            chunk_size: int = 10000,
+    ) -> AsyncIterator[list]:
+        """
+        (id, *columns) студентов направления (при direction_id=None — всех направлений)
+        фрагментами по chunk_size строк через серверный курсор: вся выборка в память не загружается.
+        """
+        stmt = select(cls.model.id, *[getattr(cls.model, col) for col in columns]).order_by(cls.model.id)
+        if direction_id is not None:
+            stmt = stmt.where(cls.model.direction_id == direction_id)
+        try:
+            result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+            try:
+                async for partition in result.partitions(chunk_size):
+                    yield partition
+            finally:
+                await result.close()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+
+    @classmethod
+    async def get_id_range(cls, session: AsyncSession, direction_id: int | None) -> tuple[int, int | None, int | None]:
+        """Число студентов направления (None — всех) и диапазон их id: (count, min_id, max_id)."""
+        try:
+            stmt = select(func.count(cls.model.id), func.min(cls.model.id), func.max(cls.model.id))
+            if direction_id is not None:
+                stmt = stmt.where(cls.model.direction_id == direction_id)
+            result = await session.execute(stmt)
+            return tuple(result.one())
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+
+    @classmethod
+    async def get_feature_page(
+            cls,
+            session: AsyncSession,
+            direction_id: int,
+            columns: list[str],
+            after_id: int = 0,
+            limit: int = 1000,
+            without_prediction_for_model: int | None = None,
+    ):
+        """Страница (id, *columns) студентов направления с id > after_id (keyset-пагинация)."""
+        try:
+            stmt = select(cls.model.id, *[getattr(cls.model, col) for col in columns])
+            stmt = cls._prediction_candidates(stmt, direction_id, without_prediction_for_model)
+            stmt = stmt.where(cls.model.id > after_id).order_by(cls.model.id).limit(limit)
+            result = await session.execute(stmt)
+            return result.all()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+
+    @classmethod
+    async def count_for_prediction(
+            cls,
+            session: AsyncSession,
+            direction_id: int,
+            without_prediction_for_model: int | None = None,
+    ) -> int:
+        try:
+            stmt = cls._prediction_candidates(
+                select(func.count(cls.model.id)), direction_id, without_prediction_for_model
+            )
+            result = await session.execute(stmt)
+            return result.scalar_one()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+
     @classmethod
     async def get_students_without_predictions(cls, session: AsyncSession, direction_id: int | None = None):
         try:
@@ -1,14 +1,20 @@
 import io
+import json
+import os
+from typing import Literal
 
 import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
 
-from app.db.session_maker import TransactionSessionDep
+from app.api.dependencies.ml import schedule_direction_retrain
+from app.db.config import settings
+from app.db.session_maker import TransactionSessionDep, session_manager
 from app.direction.infrastructure.repository import DirectionRepository
 from app.student.infrastructure.filters.student import StudentFilterForRelation
-from app.student.services.import_service import StudentImportService
+from app.student.services.import_service import StudentImportService, IMPORT_FORMATS, STREAM_IMPORT_FORMATS, \
+    spool_upload
 from app.student.services.service import StudentService
 from app.student.infrastructure.repository import StudentRepository
 from app.student.presentation.student_schemas import StudentCreate, StudentFilter, StudentUpdate, \
@@ -63,6 +69,23 @@ async def get_student_by_filters(filters: StudentFilterByDirection = Query(),
     return await service.get_filtered_students(filters)
 
 
+@router.get("/page")
+async def get_students_page(
+        filters: StudentFilter = Depends(),
+        fields: list[str] | None = Query(None),
+        sort: str = "id",
+        order: Literal["asc", "desc"] = "asc",
+        cursor: str | None = None,
+        limit: int = Query(100, ge=1, le=1000),
+        with_total: bool = False,
+        service: StudentService = Depends(get_student_service),
+):
+    try:
+        return await service.get_students_page(filters, fields, sort, order, cursor, limit, with_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{student_id}")
 async def get_student(student_id: int, service: StudentService = Depends(get_student_service)):
     student = await service.get_student_by_id(student_id)
@@ -91,14 +114,20 @@ async def delete_student(student_id: int, service: StudentService = Depends(get_
 @router.post("/upload")
 async def upload_student(
         sheet_name: str,
+        background_tasks: BackgroundTasks,
         file: UploadFile = File(...),
         service: StudentImportService = Depends(get_student_import_service)):
-    if not file.filename.endswith(".xlsx"):
-        raise HTTPException(status_code=400, detail="Файл должен быть Excel (.xlsx)")
+    file_format = file.filename.rsplit(".", 1)[-1].lower()
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Файл должен быть Excel (.xlsx), CSV или Parquet")
 
-    file_bytes = await file.read()
     try:
-        count = await service.import_from_excel(file_bytes, sheet_name=sheet_name)
+        # UploadFile уже лежит во временном файле — читаем его потоком, не загружая в память целиком
+        count = await service.import_file(file.file, file_format, sheet_name)
+        if settings.AUTO_RETRAIN_ON_IMPORT and count:
+            # Фоновая задача запускается после ответа, когда транзакция импорта уже закоммичена
+            direction = await service.direction_repo.get_or_create(sheet_name)
+            background_tasks.add_task(schedule_direction_retrain, direction.id)
         return {f"{count} студентов загружено"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -106,6 +135,57 @@ async def upload_student(
         raise HTTPException(status_code=500, detail="Ошибка при загрузке файла")
 
 
+@router.post("/upload/stream")
+async def upload_student_stream(
+        file: UploadFile = File(...),
+        sheet_name: str | None = None,
+        batch_size: int = Query(1000, ge=1, le=50000),
+):
+    """
+    Потоковый импорт больших файлов. Загрузка копируется во временный файл кусками,
+    xlsx читается построчно (все листы, если sheet_name не указан), csv — пакетами.
+    Ответ — NDJSON: строка прогресса с ошибками по строкам на каждый пакет и итоговая строка
+    со status=done. Каждый пакет коммитится отдельно.
+    """
+    file_format = file.filename.rsplit(".", 1)[-1].lower()
+    if file_format not in STREAM_IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Файл должен быть Excel (.xlsx) или CSV")
+    if file_format == "csv" and not sheet_name:
+        raise HTTPException(status_code=400, detail="Для CSV нужно указать направление (sheet_name)")
+
+    path = await spool_upload(file.read, suffix=f".{file_format}")
+
+    async def progress():
+        try:
+            # Сессия зависимости закрывается до отправки тела ответа, поэтому открываем свою
+            async with session_manager.create_session() as session:
+                service = StudentImportService(StudentRepository(session), DirectionRepository(session))
+                sheet_inserted = {}
+                imported_directions = set()
+                try:
+                    async for step in service.import_stream(path, file_format, sheet_name, batch_size):
+                        await session.commit()
+                        if "batch" in step:
+                            sheet_inserted[step["sheet"]] = (step["inserted"], step["invalid"])
+                            if step["inserted"]:
+                                imported_directions.add(step["direction_id"])
+                        yield json.dumps(step, ensure_ascii=False, default=str) + "\n"
+                except Exception as e:
+                    await session.rollback()
+                    yield json.dumps({"status": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+                    return
+                inserted = sum(value[0] for value in sheet_inserted.values())
+                invalid = sum(value[1] for value in sheet_inserted.values())
+            if settings.AUTO_RETRAIN_ON_IMPORT:
+                for direction_id in sorted(imported_directions):
+                    await schedule_direction_retrain(direction_id)
+            yield json.dumps({"status": "done", "inserted": inserted, "invalid": invalid}) + "\n"
+        finally:
+            os.remove(path)
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
 @router.get("/template/")
 async def download_student_template():
     df = pd.DataFrame(columns=[
@@ -1,11 +1,184 @@
+import io
+import os
+import tempfile
+from functools import partial
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Iterator
 
-
+import numpy as np
 import pandas as pd
 
+from app.executor import blocking_executor
 from app.direction.domain.interfaces.repository import IDirectionRepository
-from app.student.domain.entities import BaseStudent
 from app.student.domain.interfaces.repository import IStudentRepository
 
+# Сколько строк файла читается и преобразуется за раз
+IMPORT_CHUNK_SIZE = 5000
+
+SCORE_COLUMNS = {
+    "балл по Математике": "math_score",
+    "балл по Русскому": "russian_score",
+    "сумма баллов ЕГЭ": "ege_score",
+}
+SESSION_COLUMNS = {
+    "1 сессия": "session_1_passed",
+    "2 сессия": "session_2_passed",
+    "3 сессия": "session_3_passed",
+    "4 сессия": "session_4_passed",
+}
+REQUIRED_COLUMNS = ["ФИО", *SCORE_COLUMNS, *SESSION_COLUMNS]
+IMPORT_FORMATS = ("xlsx", "csv", "parquet")
+STREAM_IMPORT_FORMATS = ("xlsx", "csv")
+
+# Размер куска при копировании загрузки во временный файл
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# Сколько ошибок по строкам возвращать на один пакет
+MAX_ROW_ERRORS = 100
+
+
+def check_columns(columns) -> None:
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"Не хватает колонок: {', '.join(missing)}")
+
+
+def session_maxima(chunk: pd.DataFrame) -> np.ndarray:
+    """Максимальный балл по каждой сессии во фрагменте (NaN, если значений нет)."""
+    sessions = chunk[list(SESSION_COLUMNS)].apply(pd.to_numeric, errors="coerce")
+    return sessions.max().to_numpy(dtype=np.float64)
+
+
+def find_invalid_cells(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Маска некорректных значений: пустое ФИО, пустой или нецелый балл."""
+    scores = chunk[list(SCORE_COLUMNS)].apply(pd.to_numeric, errors="coerce")
+    invalid = (scores.isna() | (scores % 1 != 0))
+    invalid.insert(0, "ФИО", chunk["ФИО"].isna())
+    return invalid
+
+
+def to_student_rows(chunk: pd.DataFrame, max_session: np.ndarray, direction_id: int, first_row: int) -> list[dict]:
+    """
+    Колоночное преобразование фрагмента в строки для INSERT.
+    Сессия считается сданной, если её балл положителен и равен максимальному по всему файлу.
+    first_row — номер первой строки фрагмента в файле (для сообщений об ошибках).
+    """
+    invalid = find_invalid_cells(chunk).any(axis=1)
+    if invalid.any():
+        # +2: строка заголовка и нумерация строк с единицы, как в Excel
+        rows = np.flatnonzero(invalid.to_numpy())[:10] + first_row + 2
+        raise ValueError(f"Некорректные значения в строках: {', '.join(map(str, rows))}")
+
+    scores = chunk[list(SCORE_COLUMNS)].apply(pd.to_numeric, errors="coerce")
+    sessions = chunk[list(SESSION_COLUMNS)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    passed = (max_session > 0) & (sessions == max_session)
+
+    frame = pd.DataFrame({"full_name": chunk["ФИО"].astype(str).to_numpy()})
+    for column, field in SCORE_COLUMNS.items():
+        frame[field] = scores[column].to_numpy(dtype=np.int64)
+    for j, field in enumerate(SESSION_COLUMNS.values()):
+        frame[field] = passed[:, j]
+    frame["direction_id"] = direction_id
+    return frame.to_dict(orient="records")
+
+
+def convert_batch(batch: pd.DataFrame, max_session: np.ndarray, direction_id: int) -> tuple[list[dict], list[dict]]:
+    """
+    Как to_student_rows, но некорректные строки пропускаются и возвращаются списком ошибок.
+    Индекс пакета — номер строки данных в файле, начиная с нуля.
+    """
+    invalid_cells = find_invalid_cells(batch)
+    invalid = invalid_cells.any(axis=1).to_numpy()
+    errors = [
+        {
+            "row": int(index) + 2,
+            "error": f"Некорректные значения: {', '.join(invalid_cells.columns[cells.to_numpy()])}",
+        }
+        for index, cells in invalid_cells[invalid].iterrows()
+    ]
+    rows = to_student_rows(batch[~invalid], max_session, direction_id, first_row=0) if not invalid.all() else []
+    return rows, errors
+
+
+def iter_frame_chunks(df: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    # Хотя бы один фрагмент, чтобы проверить колонки и у пустого листа
+    for start in range(0, max(len(df), 1), IMPORT_CHUNK_SIZE):
+        yield df.iloc[start:start + IMPORT_CHUNK_SIZE]
+
+
+def iter_file_chunks(source: BinaryIO, file_format: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Потоковое чтение CSV/Parquet фрагментами по chunk_size строк."""
+    source.seek(0)
+    if file_format == "csv":
+        yield from pd.read_csv(source, chunksize=chunk_size)
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Для импорта Parquet нужен пакет pyarrow")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Неподдерживаемый формат файла: {file_format}")
+
+
+def list_xlsx_sheets(path: str) -> list[str]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def iter_xlsx_batches(path: str, sheet_name: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Построчное чтение листа через openpyxl в режиме read_only: в памяти только текущий пакет.
+    Индекс пакета — номер строки данных на листе (без заголовка), пустые строки пропускаются.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            raise ValueError(f"Лист '{sheet_name}' не найден")
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = ["" if value is None else value for value in header]
+
+        buffer, index, yielded = [], [], False
+        for number, row in enumerate(rows):
+            if all(value is None for value in row):
+                continue
+            buffer.append(row[:len(columns)])
+            index.append(number)
+            if len(buffer) == batch_size:
+                yield pd.DataFrame(buffer, columns=columns, index=index)
+                buffer, index, yielded = [], [], True
+        if buffer or not yielded:
+            yield pd.DataFrame(buffer, columns=columns, index=index)
+    finally:
+        workbook.close()
+
+
+def iter_csv_batches(path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    with open(path, "rb") as source:
+        yield from iter_file_chunks(source, "csv", chunk_size=batch_size)
+
+
+async def spool_upload(read: Callable[[int], Awaitable[bytes]], suffix: str = "") -> str:
+    """Копирует загружаемый файл во временный файл кусками по SPOOL_CHUNK_SIZE и возвращает путь."""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := await read(SPOOL_CHUNK_SIZE):
+                await blocking_executor.run_io("spool_upload", f.write, chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
 
 class StudentImportService:
     def __init__(
@@ -17,32 +190,113 @@ class StudentImportService:
         self.direction_repo = direction_repo
 
     async def import_from_excel(self, file_bytes: bytes, sheet_name: str) -> int:
-        df = pd.read_excel(file_bytes, sheet_name=sheet_name)
-
-        required_columns = ["ФИО", "балл по Математике", "балл по Русскому", "сумма баллов ЕГЭ",
-        "1 сессия", "2 сессия", "3 сессия", "4 сессия"]
-
-        if not all(col in df.columns for col in required_columns):
-            missing = [col for col in required_columns if col not in df.columns]
-            raise ValueError(f"Не хватает колонок: {', '.join(missing)}")
-
-        direction = await self.direction_repo.get_or_create(sheet_name)
-
-        max_session = [df[col].max() for col in required_columns[-4:]]
-        students = []
-        for _, row in df.iterrows():
-            student = BaseStudent(
-                full_name=str(row["ФИО"]),
-                math_score=row["балл по Математике"],
-                russian_score=row["балл по Русскому"],
-                ege_score=row["сумма баллов ЕГЭ"],
-                session_1_passed=(1 if 0 < max_session[0] == row["1 сессия"] else 0),
-                session_2_passed=(1 if 0 < max_session[1] == row["2 сессия"] else 0),
-                session_3_passed=(1 if 0 < max_session[2] == row["3 сессия"] else 0),
-                session_4_passed=(1 if 0 < max_session[3] == row["4 сессия"] else 0),
-                direction_id=direction.id,
+        return await self.import_file(io.BytesIO(file_bytes), "xlsx", sheet_name)
+
+    async def import_file(self, source: BinaryIO, file_format: str, direction_name: str) -> int:
+        """
+        Импорт студентов из xlsx (лист direction_name), csv или parquet.
+        Два прохода по файлу: сначала проверка колонок и максимумы по сессиям,
+        затем преобразование и вставка фрагментами — в памяти не больше одного фрагмента
+        (Excel читается целиком: pandas не умеет читать его по частям).
+        """
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"Неподдерживаемый формат файла: {file_format}")
+
+        if file_format == "xlsx":
+            df = await blocking_executor.run_io("read_excel", pd.read_excel, source, sheet_name=direction_name)
+            open_chunks = lambda: iter_frame_chunks(df)
+        else:
+            open_chunks = lambda: iter_file_chunks(source, file_format)
+
+        max_session = None
+        async for chunk in self._iter_chunks(open_chunks):
+            check_columns(chunk.columns)
+            chunk_max = session_maxima(chunk)
+            max_session = chunk_max if max_session is None else np.fmax(max_session, chunk_max)
+        if max_session is None:
+            raise ValueError("Файл не содержит данных")
+
+        direction = await self.direction_repo.get_or_create(direction_name)
+
+        count = 0
+        first_row = 0
+        async for chunk in self._iter_chunks(open_chunks):
+            rows = await blocking_executor.run_cpu(
+                "import_convert", to_student_rows, chunk, max_session, direction.id, first_row
             )
-            students.append(student)
+            count += await self.student_repo.insert_rows(rows)
+            first_row += len(chunk)
+        return count
+
+    @staticmethod
+    async def _iter_chunks(open_chunks: Callable[[], Iterator[pd.DataFrame]]) -> AsyncIterator[pd.DataFrame]:
+        """Читает фрагменты в пуле I/O, не блокируя event loop."""
+        chunks = open_chunks()
+        while True:
+            chunk = await blocking_executor.run_io("import_read", next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+
+    async def import_stream(
+            self,
+            path: str,
+            file_format: str,
+            sheet_name: str | None = None,
+            batch_size: int = 1000,
+    ) -> AsyncIterator[dict]:
+        """
+        Потоковый импорт из файла на диске: xlsx (один лист или все листы, каждый — своё направление)
+        или csv (направление sheet_name). Для каждого листа два прохода: максимумы по сессиям,
+        затем проверка, преобразование и вставка пакетами по batch_size строк.
+        После каждого пакета отдаёт прогресс и ошибки по строкам; некорректные строки пропускаются.
+        """
+        if file_format == "xlsx":
+            sheets = [sheet_name] if sheet_name else await blocking_executor.run_io(
+                "import_sheets", list_xlsx_sheets, path
+            )
+        elif file_format == "csv":
+            if not sheet_name:
+                raise ValueError("Для CSV нужно указать направление (sheet_name)")
+            sheets = [sheet_name]
+        else:
+            raise ValueError(f"Неподдерживаемый формат файла: {file_format}")
+
+        for sheet in sheets:
+            if file_format == "xlsx":
+                open_batches = partial(iter_xlsx_batches, path, sheet, batch_size)
+            else:
+                open_batches = partial(iter_csv_batches, path, batch_size)
+
+            max_session = None
+            try:
+                async for batch in self._iter_chunks(open_batches):
+                    check_columns(batch.columns)
+                    batch_max = session_maxima(batch)
+                    max_session = batch_max if max_session is None else np.fmax(max_session, batch_max)
+            except ValueError as e:
+                yield {"sheet": sheet, "status": "skipped", "detail": str(e)}
+                continue
+            if max_session is None:
+                yield {"sheet": sheet, "status": "skipped", "detail": "Лист не содержит данных"}
+                continue
 
-        await self.student_repo.bulk_add(students)
-        return len(students)
\ No newline at end of file
+            direction = await self.direction_repo.get_or_create(sheet)
+            batch_number = rows = inserted = invalid = 0
+            async for batch in self._iter_chunks(open_batches):
+                student_rows, errors = await blocking_executor.run_cpu(
+                    "import_convert", convert_batch, batch, max_session, direction.id
+                )
+                inserted += await self.student_repo.insert_rows(student_rows)
+                batch_number += 1
+                rows += len(batch)
+                invalid += len(errors)
+                yield {
+                    "sheet": sheet,
+                    "direction_id": direction.id,
+                    "batch": batch_number,
+                    "rows": rows,
+                    "inserted": inserted,
+                    "invalid": invalid,
+                    "errors": errors[:MAX_ROW_ERRORS],
+                }
@@ -1,10 +1,31 @@
+import base64
+import binascii
+import json
+
 from pydantic import BaseModel
 
+from app.student.domain.entities import BaseStudent
 from app.student.infrastructure.repository import StudentRepository
 
 from app.student.presentation.student_schemas import StudentCreate, StudentUpdate
 
 
+# Поля, по которым можно сортировать страницы (без NULL — иначе ломается keyset-курсор)
+PAGE_SORT_FIELDS = ("id", "full_name", "math_score", "russian_score", "ege_score", "direction_id")
+
+
+def encode_cursor(value, student_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, student_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        value, student_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Некорректный курсор")
+    return value, student_id
+
+
 class StudentService:
     def __init__(self, repository: StudentRepository):
         self.repository = repository
@@ -18,6 +39,41 @@ class StudentService:
     async def get_filtered_students(self, filter_student: BaseModel):
         return await self.repository.list_all(filters=filter_student)
 
+    async def get_students_page(
+            self,
+            filters: BaseModel | None = None,
+            fields: list[str] | None = None,
+            sort: str = "id",
+            order: str = "asc",
+            cursor: str | None = None,
+            limit: int = 100,
+            with_total: bool = False,
+    ) -> dict:
+        """
+        Страница студентов по курсору. fields — какие колонки выбирать (id возвращается всегда),
+        next_cursor — курсор следующей страницы или None, total считается только по запросу.
+        """
+        fields = fields or list(BaseStudent.model_fields)
+        unknown = [field for field in fields if field not in BaseStudent.model_fields]
+        if unknown:
+            raise ValueError(f"Неизвестные поля: {', '.join(unknown)}")
+        if sort not in PAGE_SORT_FIELDS:
+            raise ValueError(f"Сортировка возможна по полям: {', '.join(PAGE_SORT_FIELDS)}")
+
+        # id и поле сортировки нужны для курсора
+        selected = list(dict.fromkeys(["id", *fields, sort]))
+        after = decode_cursor(cursor) if cursor else None
+
+        # Лишняя строка показывает, есть ли следующая страница
+        rows = await self.repository.list_page(filters, selected, sort, order == "desc", after, limit + 1)
+        next_cursor = encode_cursor(rows[limit - 1][sort], rows[limit - 1]["id"]) if len(rows) > limit else None
+
+        return {
+            "items": rows[:limit],
+            "next_cursor": next_cursor,
+            "total": await self.repository.count(filters) if with_total else None,
+        }
+
     async def get_student_by_id(self, student_id: int):
         return await self.repository.get_by_id(student_id)
 
@@ -0,0 +1,59 @@
+"""
+Обучение BinaryModel: прежний путь (BFGS с численным градиентом), BFGS с аналитическим градиентом,
+метод Ньютона и statsmodels на синтетических данных.
+Запуск из backend/: python -m benchmarks.bench_binary_model [rows] [features]
+"""
+import sys
+import time
+
+import numpy as np
+import statsmodels.api as sm
+from scipy.optimize import minimize
+
+from app.ml_model.infrastructure.binary_model import LogitModel, ProbitModel
+
+
+def make_data(rows: int, features: int, probit: bool):
+    rng = np.random.default_rng(12)
+    x = rng.normal(size=(rows, features))
+    beta = rng.normal(scale=0.5, size=features)
+    z = x @ beta - 0.3
+    noise = rng.normal(size=rows) if probit else rng.logistic(size=rows)
+    return x, (z + noise > 0).astype(float)
+
+
+def fit_numeric_gradient(model, x, y):
+    """Прежний BinaryModel.fit: BFGS без jac, градиент конечными разностями."""
+    x_values = np.concatenate([x, np.ones((x.shape[0], 1))], axis=1)
+    return minimize(model._log_likelihood, np.zeros(x_values.shape[1]), args=(x_values, y), method="BFGS").x
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    features = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    for model_cls, sm_cls in ((LogitModel, sm.Logit), (ProbitModel, sm.Probit)):
+        x, y = make_data(rows, features, probit=model_cls is ProbitModel)
+        x_const = np.concatenate([x, np.ones((rows, 1))], axis=1)
+
+        reference, sm_time = timed(lambda: sm_cls(y, x_const).fit(disp=False).params)
+        numeric, numeric_time = timed(lambda: fit_numeric_gradient(model_cls(), x, y))
+        bfgs, bfgs_time = timed(lambda: model_cls().fit(x, y, method="bfgs"))
+        newton, newton_time = timed(lambda: model_cls().fit(x, y, method="newton"))
+
+        print(f"{model_cls.__name__}: rows={rows}, features={features}")
+        for name, weights, seconds, info in (
+                ("statsmodels", reference, sm_time, None),
+                ("BFGS, численный градиент", numeric, numeric_time, None),
+                ("BFGS, аналитический градиент", bfgs._weights, bfgs_time, bfgs.fit_info),
+                ("Ньютон", newton._weights, newton_time, newton.fit_info),
+        ):
+            diff = np.max(np.abs(np.asarray(weights) - reference))
+            iterations = f", итераций {info['iterations']}" if info else ""
+            print(f"  {name:30s} {seconds:8.3f} с, max |Δβ| = {diff:.2e}{iterations}")
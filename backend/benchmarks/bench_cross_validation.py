@@ -0,0 +1,66 @@
+"""
+Кросс-валидация: последовательные фолды в одном процессе против cross_validate
+(общая память + пул процессов) с разным числом воркеров. Данные синтетические.
+Запуск из backend/: python -m benchmarks.bench_cross_validation [rows] [folds]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ml_model.infrastructure.ml_model_repository import MLModelRepository
+from app.ml_model.services.cross_validation import aggregate_metrics, cross_validate, prepare_cv
+
+FIELDS = ["math_score", "russian_score", "ege_score", "session_1_passed", "session_2_passed"]
+TARGET = "session_4_passed"
+
+
+def make_data(rows: int) -> dict[str, list]:
+    rng = np.random.default_rng(12)
+    math = rng.integers(40, 100, rows)
+    russian = rng.integers(40, 100, rows)
+    sessions = rng.integers(0, 2, (rows, 2))
+    z = 0.04 * math + 0.03 * russian + 0.8 * sessions[:, 0] - 6
+    target = (rng.random(rows) < 1 / (1 + np.exp(-z))).astype(int)
+    return {
+        "math_score": math.tolist(),
+        "russian_score": russian.tolist(),
+        "ege_score": (math + russian).tolist(),
+        "session_1_passed": sessions[:, 0].tolist(),
+        "session_2_passed": sessions[:, 1].tolist(),
+        TARGET: target.tolist(),
+        "full_name": [f"Студент {i}" for i in range(rows)],
+    }
+
+
+def sequential(data: dict, n_splits: int) -> dict:
+    X, y, columns, folds = prepare_cv(data, TARGET, "stratified", n_splits, 1)
+    X, y = pd.DataFrame(X, columns=columns), pd.Series(y)
+    metrics = []
+    for train_index, test_index in folds:
+        repository = MLModelRepository(model_type="logit")
+        repository.fit(X.iloc[train_index], y.iloc[train_index])
+        metrics.append(repository.evaluate(X.iloc[test_index], y.iloc[test_index]))
+    return aggregate_metrics(metrics)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_splits = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    data = make_data(rows)
+
+    started = time.perf_counter()
+    expected = sequential(data, n_splits)
+    base = time.perf_counter() - started
+    print(f"rows={rows}, folds={n_splits}: последовательно {base:7.2f} с")
+
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        started = time.perf_counter()
+        result = cross_validate(data, TARGET, "logit", "stratified", n_splits, max_workers=workers)
+        elapsed = time.perf_counter() - started
+        actual = result["metrics"]["performance_metrics"]["ROC AUC"]
+        assert np.isclose(actual["mean"], expected["performance_metrics"]["ROC AUC"]["mean"])
+        print(f"  воркеров={workers:>2}: {elapsed:7.2f} с ({base / elapsed:.1f}x), "
+              f"AUC {actual['mean']:.4f} ± {actual['std']:.4f}")
@@ -0,0 +1,52 @@
+"""
+Дообучение (update_incremental: Ньютон из сохранённых коэффициентов с априорной ковариацией)
+против полного переобучения на старой и новой выборке: время, итерации и расхождение коэффициентов.
+Данные синтетические. Запуск из backend/: python -m benchmarks.bench_incremental_retrain [rows] [new_rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ml_model.infrastructure.ml_model_repository import MLModelRepository
+
+
+def make_frame(rows: int, seed: int) -> tuple[pd.DataFrame, pd.Series]:
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "math_score": rng.integers(40, 100, rows),
+        "russian_score": rng.integers(40, 100, rows),
+        "session_1_passed": rng.integers(0, 2, rows),
+    })
+    z = 0.05 * X["math_score"] + 0.03 * X["russian_score"] + 0.8 * X["session_1_passed"] - 6
+    y = pd.Series((rng.random(rows) < 1 / (1 + np.exp(-z))).astype(int))
+    return X, y
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    new_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    X_old, y_old = make_frame(rows, seed=12)
+    X_new, y_new = make_frame(new_rows, seed=13)
+    X_all = pd.concat([X_old, X_new], ignore_index=True)
+    y_all = pd.concat([y_old, y_new], ignore_index=True)
+
+    for link in ("logit", "probit"):
+        repo = MLModelRepository(model_type=link)
+        repo.fit(X_old, y_old)
+
+        started = time.perf_counter()
+        update = repo.update_incremental(X_new, y_new)
+        incremental_time = time.perf_counter() - started
+
+        full = MLModelRepository(model_type=link)
+        started = time.perf_counter()
+        full.fit(X_all, y_all)
+        full_time = time.perf_counter() - started
+
+        diff = np.abs(repo.result.params.to_numpy() - full.result.params.to_numpy())
+        relative = diff / full.result.bse.to_numpy()
+        print(f"{link:>6}: дообучение {incremental_time * 1000:8.1f} мс ({update['iterations']} итераций), "
+              f"полное {full_time * 1000:8.1f} мс; max |Δβ| = {diff.max():.2e} ({relative.max():.3f} SE), "
+              f"log-loss новых {update['log_loss_before']:.4f} -> {update['log_loss_after']:.4f}")
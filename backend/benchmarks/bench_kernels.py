@@ -0,0 +1,77 @@
+"""
+Ядра функций связи (app.ml_model.infrastructure.kernels) против прежних вызовов scipy.stats / numpy:
+F(z), плотность, log L и λ пробита на массивах разного размера, float64 и float32 с готовым буфером.
+Печатает время на вызов и максимальное расхождение с эталоном в float64.
+Запуск из backend/: python -m benchmarks.bench_kernels [repeats]
+"""
+import sys
+import timeit
+
+import numpy as np
+from scipy.special import log_ndtr
+from scipy.stats import norm
+
+from app.ml_model.infrastructure.kernels import inverse_mills, link_cdf, link_log_likelihood, link_pdf
+
+SIZES = (10, 100, 1_000, 100_000, 1_000_000)
+
+
+def legacy(link: str, name: str, z: np.ndarray, y: np.ndarray):
+    """Прежние реализации из binary_model и ml_model_repository."""
+    if name == "cdf":
+        return 1 / (1 + np.exp(-z)) if link == "logit" else norm.cdf(z)
+    if name == "pdf":
+        if link == "logit":
+            p = 1 / (1 + np.exp(-z))
+            return p * (1 - p)
+        return norm.pdf(z)
+    if name == "loglike":
+        if link == "logit":
+            return float(np.dot(y, z) - np.sum(np.logaddexp(0, z)))
+        return float(np.sum(log_ndtr((2 * y - 1) * z)))
+    q = 2 * y - 1
+    return q * np.exp(norm.logpdf(q * z) - log_ndtr(q * z))
+
+
+def kernel(link: str, name: str, z: np.ndarray, y: np.ndarray, out: np.ndarray):
+    if name == "cdf":
+        return link_cdf(link, z, out=out)
+    if name == "pdf":
+        return link_pdf(link, z, out=out)
+    if name == "loglike":
+        return link_log_likelihood(link, z, y, out=out)
+    return inverse_mills(z, y, out=out)
+
+
+def per_call(fn, repeats: int, size: int) -> float:
+    number = max(1, 200_000 // size)
+    return min(timeit.repeat(fn, number=number, repeat=repeats)) / number
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = np.random.default_rng(12)
+    cases = [(link, name) for link in ("logit", "probit") for name in ("cdf", "pdf", "loglike")]
+    cases.append(("probit", "mills"))
+
+    for link, name in cases:
+        print(f"{link} {name}:")
+        for size in SIZES:
+            z = rng.normal(scale=3, size=size)
+            y = (rng.random(size) < 0.5).astype(np.float64)
+            z32, y32 = z.astype(np.float32), y.astype(np.float32)
+            out, out32 = np.empty_like(z), np.empty_like(z32)
+
+            expected = legacy(link, name, z, y)
+            diff = np.max(np.abs(np.asarray(kernel(link, name, z, y, out)) - expected))
+            diff32 = np.max(np.abs(np.asarray(kernel(link, name, z32, y32, out32), dtype=np.float64) - expected))
+            if name == "loglike":
+                # Сумма: сравниваем относительную погрешность
+                diff, diff32 = diff / abs(expected), diff32 / abs(expected)
+
+            base = per_call(lambda: legacy(link, name, z, y), repeats, size)
+            fast = per_call(lambda: kernel(link, name, z, y, out), repeats, size)
+            fast32 = per_call(lambda: kernel(link, name, z32, y32, out32), repeats, size)
+            print(f"  n={size:>9}: прежний {base * 1e6:10.2f} мкс, ядро {fast * 1e6:10.2f} мкс "
+                  f"({base / fast:4.1f}x), float32 {fast32 * 1e6:10.2f} мкс ({base / fast32:4.1f}x); "
+                  f"расхождение {diff:.1e} / {diff32:.1e}")
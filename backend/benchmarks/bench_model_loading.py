@@ -0,0 +1,58 @@
+"""
+Сравнение загрузки модели: pickle результата statsmodels (joblib) и ModelArtifact (.npy + JSON).
+Запуск из backend/: python -m benchmarks.bench_model_loading [rows] [features]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from app.ml_model.infrastructure.artifact import ModelArtifact
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def measure(fn, repeat: int = 20) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    features = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    rng = np.random.default_rng(12)
+    X = pd.DataFrame(rng.normal(size=(rows, features)), columns=[f"x{i}" for i in range(features)])
+    y = (rng.random(rows) < 1 / (1 + np.exp(-X.sum(axis=1) * 0.3))).astype(int)
+    X_const = sm.add_constant(X, has_constant="add")
+    result = sm.Logit(y, X_const).fit(method="bfgs", disp=False)
+
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as artifact_dir:
+        joblib.dump(result, os.path.join(legacy_dir, "model.pkl"))
+        joblib.dump(X_const, os.path.join(legacy_dir, "train_data.pkl"))
+        ModelArtifact.from_result(result, "logit", X_const).save(artifact_dir)
+
+        def load_legacy():
+            joblib.load(os.path.join(legacy_dir, "model.pkl"))
+            joblib.load(os.path.join(legacy_dir, "train_data.pkl"))
+
+        legacy_time = measure(load_legacy)
+        artifact_time = measure(lambda: ModelArtifact.load(artifact_dir))
+
+        artifact = ModelArtifact.load(artifact_dir)
+        np.testing.assert_allclose(artifact.predict(X_const), result.predict(X_const), rtol=1e-12)
+
+        print(f"rows={rows}, features={features}")
+        print(f"joblib:   {legacy_time * 1000:8.2f} мс, {dir_size(legacy_dir) / 1024:10.1f} КБ")
+        print(f"artifact: {artifact_time * 1000:8.2f} мс, {dir_size(artifact_dir) / 1024:10.1f} КБ")
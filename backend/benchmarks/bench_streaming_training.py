@@ -0,0 +1,79 @@
+"""
+Потоковое обучение (StreamingNewtonTrainer по фрагментам серверного курсора) против statsmodels
+на всей выборке в памяти: совпадение коэффициентов и стандартных ошибок, время и пик памяти (tracemalloc).
+Данные — во временной базе SQLite. Запуск из backend/: python -m benchmarks.bench_streaming_training [100000 1000000]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import statsmodels.api as sm
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.database import Base
+from app.ml_model.infrastructure.streaming import StreamingNewtonTrainer, split_chunk
+from app.ml_model.services.prediction_data import rows_to_matrix
+from app.student.infrastructure.models.student import Student
+from benchmarks.bench_training_data import FIELDS, TARGET, fill
+
+COLUMNS = FIELDS + [TARGET]
+CHUNK_SIZE = 10_000
+TEST_SIZE = 0.3
+
+
+def in_memory(engine, link: str) -> tuple[np.ndarray, np.ndarray]:
+    with Session(engine) as session:
+        stmt = select(Student.id, *[getattr(Student, col) for col in COLUMNS]).order_by(Student.id)
+        ids, data = rows_to_matrix(session.execute(stmt).all(), COLUMNS)
+    X, y, _, _ = split_chunk(ids, data, TEST_SIZE)
+    model = sm.Logit if link == "logit" else sm.Probit
+    result = model(y, X).fit(method="newton", disp=False)
+    return np.asarray(result.params), np.asarray(result.bse)
+
+
+def streaming(engine, link: str) -> tuple[np.ndarray, np.ndarray, int]:
+    trainer = StreamingNewtonTrainer(link, len(FIELDS) + 1)
+    stmt = select(Student.id, *[getattr(Student, col) for col in COLUMNS]).order_by(Student.id)
+    finished = False
+    while not finished:
+        trainer.start_pass()
+        with Session(engine) as session:
+            result = session.execute(stmt.execution_options(yield_per=CHUNK_SIZE))
+            for rows in result.partitions(CHUNK_SIZE):
+                X, y, _, _ = split_chunk(*rows_to_matrix(rows, COLUMNS), TEST_SIZE)
+                trainer.add_chunk(X, y)
+        finished = trainer.finish_pass()
+    return trainer.params, np.sqrt(np.diag(trainer.cov_params)), trainer.passes
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(engine)
+            fill(engine, rows)
+
+            for link in ("logit", "probit"):
+                (params, bse), memory_time, memory_peak = measure(in_memory, engine, link)
+                (s_params, s_bse, passes), stream_time, stream_peak = measure(streaming, engine, link)
+                np.testing.assert_allclose(s_params, params, rtol=1e-6, atol=1e-8)
+                np.testing.assert_allclose(s_bse, bse, rtol=1e-6)
+                print(f"rows={rows:>9} {link:>6}: в памяти {memory_time:7.2f} с / {memory_peak:8.1f} МБ, "
+                      f"потоково {stream_time:7.2f} с / {stream_peak:8.1f} МБ ({passes} проходов), "
+                      f"max |Δβ| = {np.abs(s_params - params).max():.2e}")
+            engine.dispose()
@@ -0,0 +1,62 @@
+"""
+Преобразование листа студентов в строки для вставки: построчный iterrows + BaseStudent
+против колоночного to_student_rows. База данных не участвует.
+Запуск из backend/: python -m benchmarks.bench_student_import [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.student.domain.entities import BaseStudent
+from app.student.services.import_service import SESSION_COLUMNS, session_maxima, to_student_rows
+
+
+def make_sheet(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(12)
+    df = pd.DataFrame({
+        "ФИО": [f"Студент {i}" for i in range(rows)],
+        "балл по Математике": rng.integers(40, 100, rows),
+        "балл по Русскому": rng.integers(40, 100, rows),
+    })
+    df["сумма баллов ЕГЭ"] = df["балл по Математике"] + df["балл по Русскому"]
+    for column in SESSION_COLUMNS:
+        df[column] = rng.integers(0, 6, rows)
+    return df
+
+
+def convert_iterrows(df: pd.DataFrame) -> list[dict]:
+    max_session = [df[col].max() for col in SESSION_COLUMNS]
+    students = []
+    for _, row in df.iterrows():
+        students.append(BaseStudent(
+            full_name=str(row["ФИО"]),
+            math_score=row["балл по Математике"],
+            russian_score=row["балл по Русскому"],
+            ege_score=row["сумма баллов ЕГЭ"],
+            session_1_passed=(1 if 0 < max_session[0] == row["1 сессия"] else 0),
+            session_2_passed=(1 if 0 < max_session[1] == row["2 сессия"] else 0),
+            session_3_passed=(1 if 0 < max_session[2] == row["3 сессия"] else 0),
+            session_4_passed=(1 if 0 < max_session[3] == row["4 сессия"] else 0),
+            direction_id=1,
+        ).model_dump(exclude_unset=True))
+    return students
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_sheet(rows)
+
+    started = time.perf_counter()
+    expected = convert_iterrows(df)
+    iterrows_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = to_student_rows(df, session_maxima(df), direction_id=1, first_row=0)
+    columnar_time = time.perf_counter() - started
+
+    assert actual == expected, "Результаты преобразования не совпадают"
+    print(f"rows={rows}")
+    print(f"iterrows + BaseStudent: {iterrows_time:8.3f} с")
+    print(f"to_student_rows:        {columnar_time:8.3f} с ({iterrows_time / columnar_time:.0f}x)")
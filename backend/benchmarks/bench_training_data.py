@@ -0,0 +1,95 @@
+"""
+Подготовка обучающей выборки: старый путь (ORM Student -> BaseStudent -> __dict__ -> DataFrame)
+против одного SELECT по нужным колонкам и rows_to_frame. Данные — во временной базе SQLite.
+Запуск из backend/: python -m benchmarks.bench_training_data [10000 100000 1000000]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.database import Base
+from app.direction.infrastructure.models.direction import Direction
+from app.ml_model.infrastructure.models.ml_model import MLModel  # noqa: F401
+from app.ml_model.services.prediction_data import rows_to_frame
+from app.predict.infrastructure.models.prediction import Prediction  # noqa: F401
+from app.student.domain.entities import BaseStudent
+from app.student.infrastructure.models.student import Student
+
+FIELDS = ["math_score", "russian_score", "session_1_passed", "session_2_passed"]
+TARGET = "session_4_passed"
+COLUMNS = FIELDS + [TARGET, "full_name"]
+INSERT_CHUNK = 50_000
+
+
+def fill(engine, rows: int) -> None:
+    rng = np.random.default_rng(12)
+    with Session(engine) as session:
+        session.execute(insert(Direction).values(id=1, name="bench"))
+        for start in range(0, rows, INSERT_CHUNK):
+            n = min(INSERT_CHUNK, rows - start)
+            math = rng.integers(40, 100, n)
+            russian = rng.integers(40, 100, n)
+            passed = rng.integers(0, 2, (n, 4)).astype(bool)
+            session.execute(insert(Student), [
+                {
+                    "full_name": f"Студент {start + i}",
+                    "math_score": int(math[i]),
+                    "russian_score": int(russian[i]),
+                    "ege_score": int(math[i] + russian[i]),
+                    "session_1_passed": bool(passed[i, 0]),
+                    "session_2_passed": bool(passed[i, 1]),
+                    "session_3_passed": bool(passed[i, 2]),
+                    "session_4_passed": bool(passed[i, 3]),
+                    "direction_id": 1,
+                }
+                for i in range(n)
+            ])
+        session.commit()
+
+
+def orm_path(engine) -> pd.DataFrame:
+    with Session(engine) as session:
+        students = session.execute(select(Student).where(Student.direction_id == 1)).scalars().all()
+        domain = [
+            BaseStudent(**{field: getattr(student, field) for field in BaseStudent.model_fields})
+            for student in students
+        ]
+    df = pd.DataFrame([s.__dict__ for s in domain])[COLUMNS]
+    # Прежний DataProcessor.fit_transform
+    features = df[FIELDS].applymap(lambda x: int(x) if isinstance(x, bool) else x)
+    return pd.concat([features, df[[TARGET, "full_name"]]], axis=1)
+
+
+def projected_path(engine) -> pd.DataFrame:
+    with Session(engine) as session:
+        stmt = select(*[getattr(Student, col) for col in COLUMNS]).where(Student.direction_id == 1).order_by(Student.id)
+        rows = session.execute(stmt).all()
+    return rows_to_frame(rows, COLUMNS)
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(engine)
+            fill(engine, rows)
+
+            started = time.perf_counter()
+            expected = orm_path(engine)
+            orm_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            actual = projected_path(engine)
+            projected_time = time.perf_counter() - started
+
+            assert (expected[FIELDS].to_numpy() == actual[FIELDS].to_numpy()).all()
+            print(f"rows={rows:>9}: ORM {orm_time:8.2f} с, SELECT колонок {projected_time:8.2f} с "
+                  f"({orm_time / projected_time:.1f}x)")
+            engine.dispose()
@@ -0,0 +1,72 @@
+"""
+Проверка планов запросов SQLite: горячие выборки по prediction и student должны идти по индексам,
+а не полным сканированием таблиц. Схема строится миграциями (alembic upgrade head) во временном
+файле SQLite — проверяются индексы, которые создают миграции, а не объявления в моделях.
+Запуск из backend/: python -m benchmarks.check_query_plans
+"""
+import os
+import tempfile
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, select, text
+
+from app.predict.infrastructure.models.prediction import Prediction
+from app.student.infrastructure.models.student import Student
+
+# UNIQUE (student_id, model_id) в SQLite реализован автоиндексом sqlite_autoindex_prediction_N
+UNIQUE_INDEX = "sqlite_autoindex_prediction"
+
+# Запрос -> индексы, один из которых должен оказаться в плане
+QUERIES = {
+    "predictions by model": (
+        select(Prediction).where(Prediction.model_id == 1),
+        ("ix_prediction_model_id",),
+    ),
+    "prediction upsert lookup": (
+        select(Prediction.student_id).where(Prediction.student_id.in_([1, 2, 3]), Prediction.model_id == 1),
+        (UNIQUE_INDEX, "ix_prediction_model_id"),
+    ),
+    "students by direction": (
+        select(Student.id).where(Student.direction_id == 1),
+        ("ix_student_direction_id",),
+    ),
+    "students without predictions": (
+        select(Student.id)
+        .outerjoin(Prediction, (Prediction.student_id == Student.id) & (Prediction.model_id == 1))
+        .where(Student.direction_id == 1, Prediction.id.is_(None)),
+        (UNIQUE_INDEX,),
+    ),
+}
+
+
+def query_plan(conn, stmt) -> str:
+    compiled = stmt.compile(conn, compile_kwargs={"literal_binds": True})
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+def migrate(url: str) -> None:
+    """alembic upgrade head на базе url с настройками из alembic.ini."""
+    config = Config(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        url = f"sqlite:///{os.path.join(tmp_dir, 'plans.db')}"
+        migrate(url)
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            # Без статистики планировщик SQLite может предпочесть скан; ANALYZE как на живой базе
+            conn.execute(text("ANALYZE"))
+            for name, (stmt, indexes) in QUERIES.items():
+                plan = query_plan(conn, stmt)
+                ok = any(index in plan for index in indexes)
+                failed |= not ok
+                print(f"{'OK  ' if ok else 'FAIL'} {name}: {plan.replace(chr(10), '; ')}")
+        engine.dispose()
+
+    raise SystemExit(1 if failed else 0)
@@ -4,6 +4,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from app.student.infrastructure.models.student import Student
 from app.ml_model.infrastructure.models.ml_model import MLModel
+from app.ml_model.infrastructure.models.ml_model_version import MLModelVersion
 from app.predict.infrastructure.models.prediction import Prediction
 from app.direction.infrastructure.models.direction import Direction
 from app.db.database import Base
@@ -0,0 +1,45 @@
+"""ml model versions
+
+Revision ID: 4b8e2c7d1a95
+Revises: 9d3e6b1f4c28
+Create Date: 2026-10-18 18:21:09.531742
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e2c7d1a95'
+down_revision: Union[str, None] = '9d3e6b1f4c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ml_model_version',
+    sa.Column('model_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('features', sa.JSON(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['model_id'], ['ml_model.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('model_id', 'version', name='uq_ml_model_version')
+    )
+    op.create_index(op.f('ix_ml_model_version_model_id'), 'ml_model_version', ['model_id'], unique=False)
+    # NULL — версия берётся из указателя ACTIVE, у моделей старого формата — файлы из корня models/<name>/
+    with op.batch_alter_table('ml_model') as batch_op:
+        batch_op.add_column(sa.Column('active_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ml_model') as batch_op:
+        batch_op.drop_column('active_version')
+    op.drop_index(op.f('ix_ml_model_version_model_id'), table_name='ml_model_version')
+    op.drop_table('ml_model_version')
@@ -0,0 +1,35 @@
+"""prediction student model unique
+
+Revision ID: 7c41d2e9a3b5
+Revises: 2f08a48bb076
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41d2e9a3b5'
+down_revision: Union[str, None] = '2f08a48bb076'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Оставляем только последний прогноз для каждой пары (student_id, model_id)
+    op.execute(
+        "DELETE FROM prediction WHERE id NOT IN "
+        "(SELECT MAX(id) FROM prediction GROUP BY student_id, model_id)"
+    )
+    with op.batch_alter_table('prediction') as batch_op:
+        batch_op.create_unique_constraint('uq_prediction_student_model', ['student_id', 'model_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('prediction') as batch_op:
+        batch_op.drop_constraint('uq_prediction_student_model', type_='unique')
@@ -0,0 +1,31 @@
+"""prediction and student indexes
+
+Revision ID: 9d3e6b1f4c28
+Revises: 7c41d2e9a3b5
+Create Date: 2026-10-18 14:05:47.218934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e6b1f4c28'
+down_revision: Union[str, None] = '7c41d2e9a3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Поиск по student_id и по паре (student_id, model_id) обслуживает uq_prediction_student_model
+    op.create_index(op.f('ix_prediction_model_id'), 'prediction', ['model_id'], unique=False)
+    op.create_index(op.f('ix_student_direction_id'), 'student', ['direction_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_student_direction_id'), table_name='student')
+    op.drop_index(op.f('ix_prediction_model_id'), table_name='prediction')
@@ -44,12 +44,12 @@ export default function ImportModal({isOpen, onClose, onUpload}) {
                     {/* Загрузка файла */}
                     <div className="mb-6">
                         <label className="block text-sm font-medium text-gray-700 mb-1">
-                            Загрузите файл (.xlsx)
+                            Загрузите файл (.xlsx, .csv, .parquet)
                         </label>
                         <input
                             type="file"
                             name="file"
-                            accept=".xlsx"
+                            accept=".xlsx,.csv,.parquet"
                             className="w-full border border-gray-300 rounded px-3 py-2"
                         />
                     </div>
@@ -77,6 +77,17 @@ export const ModelTrainingPage = () => {
             .catch(() => setError('Ошибка загрузки моделей'));
     };
 
+    // Обучение идёт в фоне: опрашиваем состояние задачи, пока она не завершится
+    const waitForJob = async (jobId) => {
+        while (true) {
+            const res = await axios.get(`/ml/jobs/${jobId}`);
+            if (!['queued', 'running'].includes(res.data.status)) {
+                return res.data;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    };
+
     const toggleField = (field) => {
         setSelectedFields(prev =>
             prev.includes(field)
@@ -106,8 +117,14 @@ export const ModelTrainingPage = () => {
                 model_type: modelType
             });
 
+            const job = await waitForJob(response.data.job_id);
+            if (job.status !== 'succeeded') {
+                setError(job.error || 'Ошибка при обучении модели');
+                return;
+            }
+
             setTrainingStatus('Обучение завершено');
-            setMetrics(prev => ({...prev, result: response.data.result}));
+            setMetrics(prev => ({...prev, result: job.result}));
             loadModels();
         } catch {
             setError('Ошибка при обучении модели');